@@ -0,0 +1,72 @@
+from interactions import Extension, SlashContext, OptionType, Permissions, slash_command, slash_option
+import logging
+
+
+class AdminModule(Extension):
+    """Operator commands, limited to server administrators."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+
+    @slash_command(
+        name="admin",
+        description="Admin tools",
+        sub_cmd_name="perf",
+        sub_cmd_description="Show database query and connection pool statistics",
+        default_member_permissions=Permissions.ADMINISTRATOR,
+    )
+    @slash_option(
+        name="sort",
+        description="Order queries by total time, call count or slowest call",
+        required=False,
+        opt_type=OptionType.STRING,
+        choices=[
+            {"name": "total time", "value": "total"},
+            {"name": "calls", "value": "calls"},
+            {"name": "slowest", "value": "max"},
+        ]
+    )
+    @slash_option(
+        name="reset",
+        description="Clear the statistics after showing them",
+        required=False,
+        opt_type=OptionType.BOOLEAN
+    )
+    async def admin_perf_command(self, ctx: SlashContext, sort: str = "total", reset: bool = False):
+        stats = self.db.query_stats
+        pool = self.db.pool_stats()
+
+        lines = [
+            f"Pool: {pool.get('size', 0)}/{pool.get('max_size', self.db.max_size)} connections, "
+            f"{pool.get('idle', 0)} idle, {pool['waiting']} waiting (peak {pool['peak_waiting']}), "
+            f"avg acquire {pool['avg_wait_ms']:.1f} ms, max {pool['max_wait_ms']:.1f} ms, {pool['timeouts']} timeouts",
+            "",
+            stats.report(limit=8, sort=sort, width=70),
+        ]
+
+        text = "\n".join(lines)
+        if len(text) > 1900:
+            text = text[:1900] + "\n…"
+        await ctx.send(f"```\n{text}\n```", ephemeral=True)
+
+        if reset:
+            stats.reset()
+            logging.info(f"Query stats reset by {ctx.author.id}")
+
+    @slash_command(
+        name="admin",
+        description="Admin tools",
+        sub_cmd_name="latency",
+        sub_cmd_description="Show p50/p95/p99 handler latency and late acknowledgements",
+        default_member_permissions=Permissions.ADMINISTRATOR,
+    )
+    async def admin_latency_command(self, ctx: SlashContext):
+        text = self.bot.tracer.table(limit=20)
+        if len(text) > 1900:
+            text = text[:1900] + "\n…"
+        await ctx.send(f"Handler latency (ms)\n```\n{text}\n```", ephemeral=True)
+
+
+def setup(bot):
+    AdminModule(bot)
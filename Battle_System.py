@@ -4,107 +4,51 @@ import asyncio
 import re
 import logging
 from datetime import datetime
+from Inventory import Inventory
+import combat_engine
+from dice import describe as describe_dice
+from player_actions import player_action
+
+logger = logging.getLogger(__name__)
 
 class BattleSystem(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
+        self.identities = bot.identities
+        # Active battles are served from memory and written back in batches (wired in main.py)
+        self.states = bot.battle_states
+        # Party turn order, auto-skip deadlines and restart recovery
+        self.turns = bot.battle_turns
+        self.turns.on_timeout = self.handle_turn_timeout
+        # Active status effects with expiry heaps and per-attribute totals
+        self.effects = bot.effects
 
     def parse_dice(self, dice_string):
         """
         Parse dice notation like "1d6", "2d4+2", "1d8-1"
         Returns: (num_dice, sides, modifier)
         """
-        if not dice_string:
-            return (0, 0, 0)
-        
-        # Remove whitespace
-        dice_string = dice_string.strip()
-        
-        # Handle modifiers
-        modifier = 0
-        if '+' in dice_string:
-            parts = dice_string.split('+')
-            dice_string = parts[0]
-            modifier = int(parts[1])
-        elif '-' in dice_string:
-            parts = dice_string.split('-')
-            dice_string = parts[0]
-            modifier = -int(parts[1])
-        
-        # Parse dice part (e.g., "1d6")
-        if 'd' in dice_string:
-            num_dice, sides = map(int, dice_string.split('d'))
-        else:
-            # Just a number (e.g., "5" = 5 damage, no roll)
-            return (0, 0, int(dice_string))
-        
-        return (num_dice, sides, modifier)
+        return combat_engine.parse_dice(dice_string)
     
     def roll_dice_notation(self, dice_string):
         """
         Roll dice based on notation.
         Returns total rolled value (0-X for damage dice).
         """
-        num_dice, sides, modifier = self.parse_dice(dice_string)
-        
-        if num_dice == 0 and sides == 0:
-            # Just a flat modifier
-            return modifier
-        
-        total = 0
-        for _ in range(num_dice):
-            total += self.roll_dice(sides, start=0)  # 0-X for damage
-        
-        return total + modifier
+        return combat_engine.roll_dice_notation(dice_string)
     
     def format_damage_message(self, damage_by_type, total_damage):
         """
         Format damage breakdown for display.
         Returns string like "15 damage (8 slashing, 4 crushing, 3 piercing)"
         """
-        if not damage_by_type or len(damage_by_type) == 1:
-            # Single damage type or old system
-            return f"{total_damage} damage"
-        
-        # Multiple damage types - show breakdown
-        damage_parts = []
-        for damage_type, amount in damage_by_type.items():
-            if amount > 0:
-                damage_parts.append(f"{amount} {damage_type}")
-        
-        if damage_parts:
-            return f"{total_damage} damage ({', '.join(damage_parts)})"
-        else:
-            return f"{total_damage} damage"
+        return combat_engine.format_damage_message(damage_by_type, total_damage)
     
     def get_damage_type_multiplier(self, damage_type, attacker_stats):
-        """
-        Get multiplier for a specific damage type based on attacker stats.
-        Formula: 1.0 + (stat / 100) - scales per stat point
-        At 100 stat = 2.0x, at 50 stat = 1.5x, at -10 stat = 0.9x
-        """
-        if damage_type == 'piercing':
-            dex = attacker_stats.get('total_dexterity', attacker_stats.get('dexterity', 0))
-            return 1.0 + (dex / 100.0)
-        
-        elif damage_type == 'crushing':
-            str_stat = attacker_stats.get('total_strength', attacker_stats.get('strength', 0))
-            return 1.0 + (str_stat / 100.0)
-        
-        elif damage_type == 'slashing':
-            str_stat = attacker_stats.get('total_strength', attacker_stats.get('strength', 0))
-            dex = attacker_stats.get('total_dexterity', attacker_stats.get('dexterity', 0))
-            avg_stat = (str_stat + dex) / 2.0
-            return 1.0 + (avg_stat / 100.0)
-        
-        elif damage_type in ['fire', 'ice', 'lightning', 'water', 'earth', 'air', 'light', 'dark', 'magic', 'poison']:
-            # All magic/elemental damage types scale with Intelligence
-            int_stat = attacker_stats.get('total_intelligence', attacker_stats.get('intelligence', 0))
-            return 1.0 + (int_stat / 100.0)
-        
-        else:
-            return 1.0  # No multiplier for unknown types
+        """Get multiplier for a specific damage type based on attacker stats (1.0 + stat / 100)."""
+        return combat_engine.get_damage_type_multiplier(damage_type, attacker_stats)
     
     async def get_equipped_weapon_dice(self, player_id):
         """
@@ -189,15 +133,13 @@ class BattleSystem(Extension):
     def roll_dice(sides=20, start=0):
         """
         Simulates a dice roll with given sides.
-        Default: d20 (1-20) for attack rolls
+        Default: d20 (0-20) for attack rolls
         For damage: start=0 for 0-X rolls
         """
-        if start == 0:
-            return random.randint(0, sides)  # 0-X inclusive
-        else:
-            return random.randint(start, sides)  # start-X inclusive
+        return combat_engine.roll_dice(sides, start)
 
     @component_callback(re.compile(r"^hunt_\d+$"))
+    @player_action
     async def hunt_button_handler(self, ctx: ComponentContext):
         # Extract player ID from the custom ID
         original_user_id = int(ctx.custom_id.split("_")[1])
@@ -267,15 +209,11 @@ class BattleSystem(Extension):
         else:
             # No context - send as DM
             try:
-                discord_id = await self.db.fetchval("""
-                    SELECT discord_id FROM players WHERE playerid = $1
-                """, player_id)
-                if discord_id:
-                    user = await self.bot.fetch_user(discord_id)
-                    if user:
-                        await user.send(embeds=[embed], components=[buttons])
+                user = await self.identities.get_user(player_id)
+                if user:
+                    await user.send(embeds=[embed], components=[buttons])
             except Exception as e:
-                logging.error(f"Error sending battle prompt: {e}")
+                logger.error(f"Error sending battle prompt: {e}")
 
     async def start_hunt_battle(self, ctx, player_id: int, location_id: int):
         """Start a hunt battle, handling both solo and party cases."""
@@ -299,7 +237,7 @@ class BattleSystem(Extension):
                 if len(party_members) > 1:  # If there are other members in the party
                     is_solo = False
             except Exception as e:
-                print(f"[Debug] Party check failed: {e}")
+                logger.debug("Party check failed: %s", e)
                 is_solo = True  # Default to solo if party check fails
         
         # Create a new battle instance
@@ -321,12 +259,7 @@ class BattleSystem(Extension):
 
         # Fetch and spawn enemies
         enemy_count = 1 if is_solo else len(party_members)
-        enemies = await self.db.fetch("""
-            SELECT * FROM enemies 
-            WHERE locationid = $1 
-            ORDER BY RANDOM() 
-            LIMIT $2
-        """, location_id, enemy_count)
+        enemies = self.game_data.pick_enemies(location_id, enemy_count)
         
         if not enemies:
             await ctx.send("No enemies to hunt here.", ephemeral=True)
@@ -337,23 +270,20 @@ class BattleSystem(Extension):
         for enemy in enemies:
             await self.spawn_enemy_in_instance(instance_id, enemy['enemyid'])
 
-        # Get the complete battle state
-        battle_state = await self.get_instance_state(instance_id)
+        # Load the complete battle state into memory
+        battle = await self.states.get(instance_id)
         
-        if not battle_state:
+        if not battle:
             await ctx.send("Error: Could not initialize battle.", ephemeral=True)
             return
+        battle_state = battle.to_state()
 
         # Initialize turn order for party battles
         if not is_solo:
             first_turn_player = await self.initialize_turn_order(instance_id)
         else:
             first_turn_player = player_id
-            await self.db.execute("""
-                UPDATE battle_instances
-                SET current_turn_player_id = $1, turn_order = ARRAY[$1::INTEGER]
-                WHERE instance_id = $2
-            """, player_id, instance_id)
+            battle.set_fields(current_turn_player_id=player_id, turn_order=[player_id])
 
         # Instance ID is stored in database, no need for active_battles
 
@@ -368,35 +298,23 @@ class BattleSystem(Extension):
             
             # Get usernames for display
             participant_info = []
+            identities = await self.identities.resolve_many(p['player_id'] for p in battle_state['participants'])
             for p in battle_state['participants']:
-                try:
-                    discord_id = await self.db.fetchval("""
-                        SELECT discord_id FROM players WHERE playerid = $1
-                    """, p['player_id'])
-                    if discord_id:
-                        user = await self.bot.fetch_user(discord_id)
-                        username = user.display_name if user else f"Player {p['player_id']}"
-                    else:
-                        username = f"Player {p['player_id']}"
-                except:
-                    username = f"Player {p['player_id']}"
-                
-                p_data = await self.db.fetchrow("""
-                    SELECT health, mana FROM player_data WHERE playerid = $1
-                """, p['player_id'])
+                identity = identities[p['player_id']]
+                username = identity.name
                 
-                if p_data:
-                    is_current_turn = " 👈 Your Turn" if p['player_id'] == first_turn_player else ""
-                    battle_embed.add_field(
-                        name=f"{username}{is_current_turn}",
-                        value=f"Health: {p_data['health']}\nMana: {p_data['mana']}",
-                        inline=True
-                    )
-                    participant_info.append({
-                        'player_id': p['player_id'],
-                        'username': username,
-                        'discord_id': discord_id if 'discord_id' in locals() else None
-                    })
+                # Participants were just added with their current health and mana
+                is_current_turn = " 👈 Your Turn" if p['player_id'] == first_turn_player else ""
+                battle_embed.add_field(
+                    name=f"{username}{is_current_turn}",
+                    value=f"Health: {p['current_health']}\nMana: {p['current_mana']}",
+                    inline=True
+                )
+                participant_info.append({
+                    'player_id': p['player_id'],
+                    'username': username,
+                    'discord_id': identity.discord_id
+                })
             
             # Add enemy fields
             for enemy in enemies:
@@ -408,9 +326,7 @@ class BattleSystem(Extension):
             
             # Show turn order
             if len(party_members) > 1:
-                turn_order_list = await self.db.fetchval("""
-                    SELECT turn_order FROM battle_instances WHERE instance_id = $1
-                """, instance_id)
+                turn_order_list = battle.instance.get('turn_order')
                 if turn_order_list:
                     # Get usernames for turn order
                     turn_order_names = []
@@ -440,39 +356,29 @@ class BattleSystem(Extension):
                 channel_id = battle_message.channel.id if hasattr(battle_message, 'channel') else None
             
             # Store channel and message ID in battle instance for later interactions
-            await self.db.execute("""
-                UPDATE battle_instances
-                SET channel_id = $1, message_id = $2
-                WHERE instance_id = $3
-            """, channel_id, battle_message.id, instance_id)
+            battle.set_fields(channel_id=channel_id, message_id=battle_message.id)
             
             # Also send DMs to party members as backup notification
+            member_identities = await self.identities.resolve_many(m['player_id'] for m in party_members)
+            channel_mention = f"<#{channel_id}>" if channel_id else "the channel"
             for member in party_members:
+                member_user = member_identities[member['player_id']].user
+                if not member_user:
+                    continue
+                dm_embed = Embed(
+                    title="⚔️ Battle Started!",
+                    description=f"A battle has started in {channel_mention}!",
+                    color=0xFF0000
+                )
+                dm_embed.add_field(
+                    name="Location",
+                    value=f"Check {channel_mention} to take your turn!",
+                    inline=False
+                )
                 try:
-                    member_discord_id = await self.db.fetchval("""
-                        SELECT discord_id FROM players WHERE playerid = $1
-                    """, member['player_id'])
-                    
-                    if member_discord_id:
-                        member_user = await self.bot.fetch_user(member_discord_id)
-                        if member_user:
-                            channel_mention = f"<#{channel_id}>" if channel_id else "the channel"
-                            dm_embed = Embed(
-                                title="⚔️ Battle Started!",
-                                description=f"A battle has started in {channel_mention}!",
-                                color=0xFF0000
-                            )
-                            dm_embed.add_field(
-                                name="Location",
-                                value=f"Check {channel_mention} to take your turn!",
-                                inline=False
-                            )
-                            try:
-                                await member_user.send(embeds=[dm_embed])
-                            except:
-                                pass  # Silently fail if DMs disabled
-                except Exception as e:
-                    logging.error(f"Error sending DM to party member {member['player_id']}: {e}")
+                    await member_user.send(embeds=[dm_embed])
+                except:
+                    pass  # Silently fail if DMs disabled
             
             # Get channel for turn prompts (outside the loop!)
             channel_for_turns = channel if channel else (ctx.channel if hasattr(ctx, 'channel') and ctx.channel else None)
@@ -523,89 +429,26 @@ class BattleSystem(Extension):
                 channel_id = battle_message.channel.id if hasattr(battle_message, 'channel') else None
             
             # Store channel and message ID
-            await self.db.execute("""
-                UPDATE battle_instances
-                SET channel_id = $1, message_id = $2
-                WHERE instance_id = $3
-            """, channel_id, battle_message.id, instance_id)
+            battle.set_fields(channel_id=channel_id, message_id=battle_message.id)
             
             await self.prompt_next_player_turn(instance_id, player_id, channel)
 
     @staticmethod
     def extract_resistances(entity):
         """Extract resistances from an entity (player or enemy)."""
-        resistance_fields = [
-            'fire_resistance', 'ice_resistance', 'lightning_resistance',
-            'poison_resistance', 'magic_resistance', 'physical_resistance',
-            'crushing_resistance', 'piercing_resistance', 'water_resistance',
-            'earth_resistance', 'light_resistance', 'dark_resistance',
-            'air_resistance', 'sleep_resistance'
-        ]
-        
-        resistances = {}
-        for field in resistance_fields:
-            # For players, look for total_{field}
-            total_field = f'total_{field}'
-            if total_field in entity:
-                resistances[field] = entity[total_field]
-            else:
-                resistances[field] = entity.get(field, 0)
-        
-        return resistances
+        return combat_engine.extract_resistances(entity)
 
     @staticmethod
     def extract_attributes(entity):
         """Extract attributes from an entity (player or enemy)."""
-        attribute_fields = [
-            'strength', 'dexterity', 'intelligence', 'wisdom',
-            'agility', 'endurance', 'charisma', 'willpower', 'luck'
-        ]
-        
-        attributes = {}
-        for field in attribute_fields:
-            # For players, look for total_{field}
-            total_field = f'total_{field}'
-            if total_field in entity:
-                attributes[field] = entity[total_field]
-            else:
-                attributes[field] = entity.get(field, 0)
-        
-        return attributes
+        return combat_engine.extract_attributes(entity)
 
     async def calculate_attack_roll(self, attacker_stats: dict, defender_stats: dict) -> tuple[bool, bool, bool]:
         """
         Calculate attack roll results.
         Returns: (hit_success, is_critical, is_blocked)
         """
-        # Get the appropriate stats based on whether it's a player (has total_ prefix) or enemy
-        attacker_dex = attacker_stats.get('total_dexterity', attacker_stats.get('dexterity', 0))
-        attacker_luck = attacker_stats.get('total_luck', attacker_stats.get('luck', 0))
-        defender_dex = defender_stats.get('total_dexterity', defender_stats.get('dexterity', 0))
-        defender_agi = defender_stats.get('total_agility', defender_stats.get('agility', 0))
-        
-        # Base attack roll (d20) + attacker's dexterity
-        attack_roll = self.roll_dice() + attacker_dex
-        
-        # Calculate critical chance (base 5% + luck bonus)
-        critical_chance = 5 + (attacker_luck * 0.5)
-        is_critical = random.uniform(0, 100) <= critical_chance
-        
-        # Calculate dodge chance (base 5% + defender's agility)
-        dodge_chance = 5 + (defender_agi * 0.5)
-        is_dodged = random.uniform(0, 100) <= dodge_chance
-        
-        if is_dodged:
-            return False, False, False
-            
-        # Calculate block chance (base 10% + defender's dexterity)
-        block_chance = 10 + (defender_dex * 0.5)
-        is_blocked = random.uniform(0, 100) <= block_chance
-        
-        # Calculate hit success
-        hit_threshold = 10 + defender_agi
-        hit_success = attack_roll > hit_threshold
-        
-        return hit_success, is_critical, is_blocked
+        return combat_engine.attack_roll(attacker_stats, defender_stats)
 
     async def calculate_damage_with_dice(self, attacker_stats: dict, defender_stats: dict,
                                         weapon_dice: dict, is_critical: bool) -> dict:
@@ -619,46 +462,8 @@ class BattleSystem(Extension):
         Returns:
             Dict of {damage_type: final_damage} - damage after all modifiers including resistances
         """
-        damage_by_type = {}
-        
-        # Step 1: Roll dice for each damage type
-        for damage_type, dice_string in weapon_dice.items():
-            if not dice_string or not dice_string.strip():
-                continue
-            
-            # Roll the dice (0-X for damage)
-            base_roll = self.roll_dice_notation(dice_string)
-            
-            # Step 2: Apply stat multiplier
-            multiplier = self.get_damage_type_multiplier(damage_type, attacker_stats)
-            damage = base_roll * multiplier
-            
-            # Step 3: Apply critical hit multiplier (if critical)
-            if is_critical:
-                attacker_luck = attacker_stats.get('total_luck', attacker_stats.get('luck', 0))
-                critical_multiplier = 1.5 + (attacker_luck * 0.01)
-                damage *= critical_multiplier
-            
-            # Step 4: Apply resistance
-            resistance_key = f"{damage_type}_resistance"
-            total_resistance_key = f"total_{resistance_key}"
-            resistance = defender_stats.get(total_resistance_key, defender_stats.get(resistance_key, 0))
-            resistance_modifier = 1 - (resistance / 100)
-            damage *= resistance_modifier
-            
-            # Step 5: Apply status effects
-            if 'playerid' in attacker_stats:
-                status_effects = await self.get_active_effects(attacker_stats['playerid'])
-                for effect in status_effects:
-                    if effect['attribute'].startswith('damage_bonus_'):
-                        damage *= (1 + effect['modifier_value'] / 100)
-                    elif effect['attribute'].startswith('damage_reduction_'):
-                        damage *= (1 - effect['modifier_value'] / 100)
-            
-            # Store damage by type (round down, minimum 0)
-            damage_by_type[damage_type] = max(0, int(damage)) if resistance < 100 else 0
-        
-        return damage_by_type
+        effects = await self.get_attacker_effects(attacker_stats)
+        return combat_engine.damage_with_dice(attacker_stats, defender_stats, weapon_dice, is_critical, effects)
     
     async def calculate_damage(self, attacker_stats: dict, defender_stats: dict, 
                              damage_type: str, base_damage: int, is_critical: bool) -> int:
@@ -666,35 +471,17 @@ class BattleSystem(Extension):
         DEPRECATED: Legacy damage calculation. Use calculate_damage_with_dice for new system.
         Kept for backwards compatibility during migration.
         """
-        # Get resistance for damage type (handle both player and enemy stats)
-        resistance_key = f"{damage_type}_resistance"
-        total_resistance_key = f"total_{resistance_key}"
-        resistance = defender_stats.get(total_resistance_key, defender_stats.get(resistance_key, 0))
-        
-        # Calculate damage reduction/amplification from resistance
-        # Negative resistance increases damage, positive reduces it
-        resistance_modifier = 1 - (resistance / 100)
-        damage = base_damage * resistance_modifier
-        
-        # Apply critical hit multiplier if critical
-        if is_critical:
-            attacker_luck = attacker_stats.get('total_luck', attacker_stats.get('luck', 0))
-            critical_multiplier = 1.5 + (attacker_luck * 0.01)
-            damage *= critical_multiplier
-            
-        # Apply status effect modifiers if attacker is a player
+        effects = await self.get_attacker_effects(attacker_stats)
+        return combat_engine.flat_damage(attacker_stats, defender_stats, damage_type, base_damage, is_critical, effects)
+
+    async def get_attacker_effects(self, attacker_stats: dict):
+        """Active status effects for a player attacker; enemies have none."""
         if 'playerid' in attacker_stats:
-            status_effects = await self.get_active_effects(attacker_stats['playerid'])
-            for effect in status_effects:
-                if effect['attribute'].startswith('damage_bonus_'):
-                    damage *= (1 + effect['modifier_value'] / 100)
-                elif effect['attribute'].startswith('damage_reduction_'):
-                    damage *= (1 - effect['modifier_value'] / 100)
-                
-        # Ensure minimum damage of 1 unless complete immunity (100% or higher resistance)
-        return 0 if resistance >= 100 else max(1, int(damage))
+            return await self.get_active_effects(attacker_stats['playerid'])
+        return []
 
     @component_callback(re.compile(r"^attack_select_\d+$"))
+    @player_action
     async def attack_select_handler(self, ctx: ComponentContext):
         """Handle attack button click - show enemy selection if multiple enemies."""
         # Extract player ID from the custom ID
@@ -725,18 +512,16 @@ class BattleSystem(Extension):
             return
         
         # Get battle state
-        battle_state = await self.get_instance_state(instance_id)
-        if not battle_state:
+        battle = await self.get_battle(instance_id)
+        if not battle:
             await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
             return
         
         # Get living enemies
         living_enemies = []
-        for battle_enemy in battle_state['enemies']:
+        for battle_enemy in battle.living_enemies():
             if battle_enemy['current_health'] > 0:
-                enemy_data = await self.db.fetchrow("""
-                    SELECT * FROM enemies WHERE enemyid = $1
-                """, battle_enemy['enemy_id'])
+                enemy_data = battle.get_enemy_row(battle_enemy['enemy_id'])
                 if enemy_data:
                     living_enemies.append({
                         'battle_enemy': battle_enemy,
@@ -781,6 +566,7 @@ class BattleSystem(Extension):
         await ctx.send(embeds=[embed], components=button_rows, ephemeral=True)
     
     @component_callback(re.compile(r"^attack_\d+_\d+$"))
+    @player_action
     async def attack_button_handler(self, ctx: ComponentContext):
         # Extract player ID and enemy ID from the custom ID
         _, player_id, enemy_id = ctx.custom_id.split("_")
@@ -815,9 +601,7 @@ class BattleSystem(Extension):
             return
 
         # Fetch player stats from the view
-        player_stats = await self.db.fetchrow("""
-            SELECT * FROM player_stats_view WHERE playerid = $1
-        """, player_id)
+        player_stats = await self.db.fetch_view_stats(player_id)
 
         if not player_stats:
             await ctx.send("Error: Could not retrieve player stats.", ephemeral=True)
@@ -826,66 +610,14 @@ class BattleSystem(Extension):
         player_stats = dict(player_stats)
 
         # Get battle state
-        battle_state = await self.get_instance_state(instance_id)
-        if not battle_state:
+        battle = await self.get_battle(instance_id)
+        if not battle:
             await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
             return
+        battle_state = battle.to_state()
 
         # Find the target enemy in the battle
-        target_enemy = None
-        target_battle_enemy = None
-        for battle_enemy in battle_state['enemies']:
-            enemy = await self.db.fetchrow("""
-                SELECT * FROM enemies WHERE enemyid = $1
-            """, battle_enemy['enemy_id'])
-            if enemy and enemy['enemyid'] == enemy_id:
-                target_enemy = enemy
-                target_battle_enemy = battle_enemy
-                break
-
-        if not target_enemy:
-            await ctx.send("Target enemy not found in battle.", ephemeral=True)
-            return
-
-        # Get battle instance for this player
-        instance_id = await self.get_player_battle_instance(player_id)
-        if not instance_id:
-            await ctx.send("No active battle found.", ephemeral=True)
-            return
-        
-        # Check if it's this player's turn (for party battles)
-        current_turn_player = await self.get_current_turn_player(instance_id)
-        if current_turn_player and current_turn_player != player_id:
-            await ctx.send("⏳ It's not your turn! Please wait for your turn.", ephemeral=True)
-            return
-
-        # Fetch player stats from the view
-        player_stats = await self.db.fetchrow("""
-            SELECT * FROM player_stats_view WHERE playerid = $1
-        """, player_id)
-
-        if not player_stats:
-            await ctx.send("Error: Could not retrieve player stats.", ephemeral=True)
-            return
-
-        player_stats = dict(player_stats)
-
-        # Get battle state
-        battle_state = await self.get_instance_state(instance_id)
-        if not battle_state:
-            await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
-            return
-
-        # Find the target enemy in the battle
-        target_enemy = None
-        for battle_enemy in battle_state['enemies']:
-            enemy = await self.db.fetchrow("""
-                SELECT * FROM enemies WHERE enemyid = $1
-            """, battle_enemy['enemy_id'])
-            if enemy['enemyid'] == enemy_id:
-                target_enemy = enemy
-                target_battle_enemy = battle_enemy
-                break
+        target_battle_enemy, target_enemy = battle.find_enemy(enemy_id)
 
         if not target_enemy:
             await ctx.send("Target enemy not found in battle.", ephemeral=True)
@@ -897,11 +629,7 @@ class BattleSystem(Extension):
         )
 
         # Get player username for messages
-        player_discord_id = await self.db.fetchval("""
-            SELECT discord_id FROM players WHERE playerid = $1
-        """, player_id)
-        player_user = await self.bot.fetch_user(player_discord_id) if player_discord_id else None
-        player_name = player_user.display_name if player_user else f"Player {player_id}"
+        player_name = await self.identities.get_name(player_id)
         
         damage_dealt = 0
         new_enemy_health = target_battle_enemy['current_health']
@@ -967,17 +695,11 @@ class BattleSystem(Extension):
 
             # Broadcast attack to other party members (deprecated - now using channel messages)
             if battle_state['instance_type'] == 'party':
-                for participant in battle_state['participants']:
-                    if participant['player_id'] != player_id:
-                        user = await self.bot.fetch_user(participant['player_id'])
-                        if user:
-                            attacker = await self.db.fetchrow("""
-                                SELECT username FROM player_data WHERE playerid = $1
-                            """, player_id)
-                            await user.send(
-                                f"{attacker['username']} dealt {damage_dealt} damage to {target_enemy['name']}! " +
-                                f"(Remaining health: {new_health})"
-                            )
+                self.bot.outbox.dm_many(
+                    (p['player_id'] for p in battle_state['participants'] if p['player_id'] != player_id),
+                    f"{player_name} dealt {damage_dealt} damage to {target_enemy['name']}! " +
+                    f"(Remaining health: {new_health})"
+                )
 
         # Check if enemy is dead
         enemy_dead = new_enemy_health <= 0
@@ -986,37 +708,22 @@ class BattleSystem(Extension):
         player_survived = True
         if not enemy_dead:  # Only have enemies attack if they're still alive
             if battle_state['instance_type'] == 'party':
-                for battle_enemy in battle_state['enemies']:
-                    if battle_enemy['current_health'] > 0:
-                        # Select random target from participants
-                        target_participant = random.choice(battle_state['participants'])
-                        survived = await self.enemy_attack(
-                            ctx, 
-                            target_participant['player_id'], 
-                            await self.db.fetchrow("""
-                                SELECT * FROM enemies WHERE enemyid = $1
-                            """, battle_enemy['enemy_id']),
-                            instance_id
-                        )
-                        player_survived = player_survived and survived
+                player_survived = await self.resolve_enemy_phase(
+                    ctx, instance_id, self.plan_enemy_phase(battle)
+                )
             else:
                 # Solo battle - enemy attacks player
                 player_survived = await self.enemy_attack(ctx, player_id, target_enemy, instance_id)
 
         # Advance turn for party battles
         if battle_state['instance_type'] == 'party':
-            next_player = await self.advance_turn(instance_id)
+            next_player = await self.advance_turn(instance_id, player_id)
             if next_player:
                 # Get channel from battle instance
-                channel_id = await self.db.fetchval("""
-                    SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                """, instance_id)
+                channel_id = await self.get_battle_channel_id(instance_id)
                 channel = None
                 if channel_id:
-                    try:
-                        channel = await self.bot.fetch_channel(channel_id)
-                    except:
-                        pass
+                    channel = await self.bot.outbox.get_channel(channel_id)
                 # Prompt next player
                 await self.prompt_next_player_turn(instance_id, next_player, channel)
         else:
@@ -1029,15 +736,10 @@ class BattleSystem(Extension):
                     living_enemies = [be for be in battle_state['enemies'] if be['current_health'] > 0]
                     if living_enemies:
                         # Get channel from battle instance
-                        channel_id = await self.db.fetchval("""
-                            SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                        """, instance_id)
+                        channel_id = await self.get_battle_channel_id(instance_id)
                         channel = None
                         if channel_id:
-                            try:
-                                channel = await self.bot.fetch_channel(channel_id)
-                            except:
-                                pass
+                            channel = await self.bot.outbox.get_channel(channel_id)
                         # Prompt player for next turn
                         await self.prompt_next_player_turn(instance_id, player_id, channel)
 
@@ -1045,116 +747,144 @@ class BattleSystem(Extension):
         await self.handle_combat_end(ctx, player_id, target_enemy)
 
     async def enemy_attack(self, ctx, player_id, enemy, instance_id=None):
-        # Fetch player stats from the view
-        player_stats = await self.db.fetchrow("""
-            SELECT * FROM player_stats_view WHERE playerid = $1
-        """, player_id)
-        
-        if not player_stats:
-            await ctx.send("Error: Could not retrieve player stats.", ephemeral=True)
-            return False
+        """Single enemy attack on one player (see resolve_enemy_phase)."""
+        return await self.resolve_enemy_phase(ctx, instance_id, [(enemy, player_id)])
+
+    def plan_enemy_phase(self, battle):
+        """Every living enemy attacks a random living participant: [(enemy_row, player_id), ...]."""
+        targets = battle.living_participants() or list(battle.participants.values())
+        if not targets:
+            return []
+        return [
+            (battle.get_enemy_row(battle_enemy['enemy_id']), random.choice(targets)['player_id'])
+            for battle_enemy in battle.living_enemies()
+            if battle.get_enemy_row(battle_enemy['enemy_id'])
+        ]
 
-        player_stats = dict(player_stats)
-        
-        # Get current health from player_data
-        current_stats = await self.db.fetchrow("""
-            SELECT health FROM player_data WHERE playerid = $1
-        """, player_id)
+    async def resolve_enemy_phase(self, ctx, instance_id, attacks):
+        """
+        Resolve a round of enemy attacks in one pass.
 
-        if not current_stats:
-            await ctx.send("Error: Could not retrieve current stats.", ephemeral=True)
-            return False
-        
-        # Get battle instance for enemy effects (if needed in the future)
-        # For now, enemy effects are handled through the battle_effects table
-        # This section can be expanded later if needed
-        
-        # Calculate attack roll results for enemy
-        hit_success, is_critical, is_blocked = await self.calculate_attack_roll(
-            enemy, player_stats
-        )
+        Loads every targeted player's stats, health and damage-over-time effects up front,
+        rolls all attacks in memory, writes the new health values with a single UPDATE and
+        posts one combined message.
 
-        # Get player username for messages
-        player_discord_id = await self.db.fetchval("""
-            SELECT discord_id FROM players WHERE playerid = $1
-        """, player_id)
-        player_user = await self.bot.fetch_user(player_discord_id) if player_discord_id else None
-        player_name = player_user.display_name if player_user else f"Player {player_id}"
-        
-        # Check if this is a party battle
-        is_party = False
-        if instance_id:
-            battle_state = await self.get_instance_state(instance_id)
-            is_party = battle_state and battle_state.get('instance_type') == 'party'
-        
-        if is_blocked:
-            message = f"🛡️ {player_name} blocked {enemy['name']}'s attack!"
-            if is_party:
-                await self.send_battle_message(instance_id, message)
-            await ctx.send(f"You blocked {enemy['name']}'s attack!", ephemeral=True)
-            return True
-        elif not hit_success:
-            message = f"❌ {enemy['name']} missed their attack on {player_name}!"
-            if is_party:
-                await self.send_battle_message(instance_id, message)
-            await ctx.send(f"{enemy['name']} missed their attack!", ephemeral=True)
+        Args:
+            attacks: list of (enemy_row, player_id) in attack order
+
+        Returns:
+            True if every targeted player is still standing
+        """
+        if not attacks:
             return True
-        else:
-            # Calculate damage with status effects
-            base_damage = enemy['strength']
-            damage_received = await self.calculate_damage(
-                enemy, player_stats,
-                'physical', base_damage, is_critical
-            )
-            
-            # Apply any damage-over-time effects on player
-            dot_effects = [e for e in await self.get_active_effects(player_id) if e['attribute'].startswith('dot_')]
-            for dot in dot_effects:
-                damage_received += dot['modifier_value']
 
-            # Update player's health
-            new_health = current_stats['health'] - damage_received
-            new_health = max(0, new_health)  # Ensure health doesn't go below 0
-            
-            # Update health in battle instance (for both party and solo battles)
-            if instance_id:
-                await self.update_battle_health(instance_id, 'player', player_id, new_health)
-            
-            # Also update player_data for solo battles
-            if not is_party:
-                await self.db.execute("""
-                    UPDATE player_data
-                    SET health = $1
-                    WHERE playerid = $2
-                """, new_health, player_id)
-            
-            # Send combat message to channel for party visibility
-            message = f"💥 **{enemy['name']}** attacked **{player_name}** for {damage_received} damage"
-            if is_critical:
-                message += " 💥 **Critical Hit!**"
-            message += f"\n{player_name}'s health: {new_health}"
-            
-            if is_party:
-                await self.send_battle_message(instance_id, message)
-            
-            # Send personal message to the attacked player
-            personal_message = f"{enemy['name']} dealt {damage_received} damage to you"
-            if is_critical:
-                personal_message += " (Critical Hit!)"
-            personal_message += f". Your health: {new_health}"
-            await ctx.send(personal_message, ephemeral=True)
+        battle = await self.states.get(instance_id) if instance_id else None
+        is_party = bool(battle and battle.is_party)
+        player_ids = list({player_id for _, player_id in attacks})
+
+        stats_by_player = await self.db.fetch_view_stats_many(player_ids)
+        player_rows = await self.db.fetch("""
+            SELECT pd.playerid, pd.health
+            FROM player_data pd
+            WHERE pd.playerid = ANY($1::int[])
+        """, player_ids)
+        players = {row['playerid']: row for row in player_rows}
+        await self.effects.load_players(player_ids)
+
+        identities = await self.identities.resolve_many(player_ids)
+
+        health = {}
+        names = {}
+        for player_id, row in players.items():
+            participant = battle.get_participant(player_id) if battle else None
+            # The battle copy is authoritative while a fight is running
+            health[player_id] = participant['current_health'] if participant else row['health']
+            names[player_id] = identities[player_id].name
+
+        channel_lines = []
+        personal_lines = []
+        for enemy, player_id in attacks:
+            player_stats = stats_by_player.get(player_id)
+            if not player_stats or player_id not in players:
+                logger.error(f"Enemy phase: no stats for player {player_id} in instance {instance_id}")
+                continue
+            if health[player_id] <= 0:
+                continue  # already down this round
+
+            player_name = names[player_id]
+            hit_success, is_critical, is_blocked = combat_engine.attack_roll(enemy, player_stats)
+
+            if is_blocked:
+                channel_lines.append(f"🛡️ {player_name} blocked {enemy['name']}'s attack!")
+                personal_lines.append(f"{player_name} blocked {enemy['name']}'s attack!")
+            elif not hit_success:
+                channel_lines.append(f"❌ {enemy['name']} missed their attack on {player_name}!")
+                personal_lines.append(f"{enemy['name']} missed their attack on {player_name}!")
+            else:
+                damage_received = combat_engine.flat_damage(
+                    enemy, player_stats, 'physical', enemy['strength'], is_critical
+                )
+                damage_received += self.effects.total(('player', player_id), 'dot_')
+                health[player_id] = max(0, health[player_id] - damage_received)
 
-            # Return whether player survived
-            return new_health > 0
+                message = f"💥 **{enemy['name']}** attacked **{player_name}** for {damage_received} damage"
+                if is_critical:
+                    message += " 💥 **Critical Hit!**"
+                message += f"\n{player_name}'s health: {health[player_id]}"
+                channel_lines.append(message)
+                personal_lines.append(
+                    f"{enemy['name']} dealt {damage_received} damage to {player_name}"
+                    + (" (Critical Hit!)" if is_critical else "")
+                    + f". Health: {health[player_id]}"
+                )
 
-        # Clean up expired effects
-        await self.db.execute("""
-            DELETE FROM temporary_effects
-            WHERE player_id = $1
-            AND start_time + (duration * interval '1 second') <= NOW()
-        """, player_id)
+        await self.apply_enemy_phase_health(battle, health, sync_player_data=not is_party)
+
+        if is_party and channel_lines:
+            await self.send_battle_message(instance_id, "\n".join(channel_lines))
+        if personal_lines:
+            await ctx.send("\n".join(personal_lines), ephemeral=True)
+
+        return all(health.get(player_id, 0) > 0 for player_id in player_ids)
+
+    async def apply_enemy_phase_health(self, battle, health: dict, sync_player_data: bool):
+        """Write enemy-phase health for all targeted players in one statement."""
+        if not health:
+            return
 
-        return True
+        rows = []
+        for player_id, new_health in health.items():
+            participant = battle.get_participant(player_id) if battle else None
+            if participant:
+                battle.set_health('player', player_id, new_health)
+            rows.append((player_id, new_health, participant['current_mana'] if participant else None))
+
+        # These rows are written here, so the write-behind flush can skip them
+        if battle:
+            battle.dirty_participants.difference_update(health)
+
+        values = ", ".join(
+            f"(${i * 3 + 3}::int, ${i * 3 + 4}::int, ${i * 3 + 5}::int)" for i in range(len(rows))
+        )
+        args = [p for row in rows for p in row]
+        try:
+            await self.db.execute(f"""
+                WITH v(player_id, health, mana) AS (VALUES {values}),
+                participants AS (
+                    UPDATE battle_participants bp
+                    SET current_health = v.health, current_mana = COALESCE(v.mana, bp.current_mana)
+                    FROM v
+                    WHERE bp.instance_id = $1 AND bp.player_id = v.player_id
+                )
+                UPDATE player_data pd
+                SET health = v.health
+                FROM v
+                WHERE pd.playerid = v.player_id AND $2
+            """, battle.instance_id if battle else None, sync_player_data, *args)
+        except Exception:
+            if battle:
+                battle.dirty_participants.update(pid for pid in health if pid in battle.participants)
+            raise
 
     async def handle_combat_end(self, ctx: SlashContext, player_id: int, enemy):
         """Handles the ending of combat when either the player or enemy reaches zero health."""
@@ -1209,18 +939,11 @@ class BattleSystem(Extension):
                 await self.distribute_party_loot(instance_id, all_loot)
             
             # Notify all party members of victory
-            for participant in battle_state['participants']:
-                if participant['current_health'] > 0:
-                    try:
-                        discord_id = await self.db.fetchval("""
-                            SELECT discord_id FROM players WHERE playerid = $1
-                        """, participant['player_id'])
-                        if discord_id and participant['player_id'] != player_id:
-                            user = await self.bot.fetch_user(discord_id)
-                            if user:
-                                await user.send("🎉 Victory! All enemies have been defeated!")
-                    except:
-                        pass
+            self.bot.outbox.dm_many(
+                (p['player_id'] for p in battle_state['participants']
+                 if p['current_health'] > 0 and p['player_id'] != player_id),
+                "🎉 Victory! All enemies have been defeated!"
+            )
 
             # Clean up
             await self.end_battle_instance(instance_id)
@@ -1249,12 +972,8 @@ class BattleSystem(Extension):
 
     async def handle_enemy_defeat(self, ctx: SlashContext, instance_id: int, enemy_id: int):
         """Handle enemy defeat and distribute loot to party members."""
-        # Fetch drop chances for this enemy
-        drop_list = await self.db.fetch("""
-            SELECT itemid, droprate, quantity
-            FROM enemyloot
-            WHERE enemyid = $1
-        """, enemy_id)
+        # Drop chances for this enemy come from the game data cache
+        drop_list = self.game_data.get_enemy_loot(enemy_id)
 
         if not drop_list:
             return []  # Return empty list if no loot
@@ -1271,13 +990,10 @@ class BattleSystem(Extension):
         return all_drops
     
     async def distribute_party_loot(self, instance_id: int, all_loot: list):
-        """Distribute loot equally among party members."""
+        """Split the encounter's drops equally among surviving members and settle them at once."""
         # Get all surviving party members
-        participants = await self.db.fetch("""
-            SELECT bp.player_id, bp.is_leader
-            FROM battle_participants bp
-            WHERE bp.instance_id = $1 AND bp.current_health > 0
-        """, instance_id)
+        battle = await self.get_battle(instance_id)
+        participants = battle.living_participants() if battle else []
         
         if not participants or not all_loot:
             return
@@ -1292,79 +1008,71 @@ class BattleSystem(Extension):
         if not leader_id and participants:
             leader_id = participants[0]['player_id']  # Default to first if no leader
         
-        # Distribute each item
+        # Split each item equally, leader gets the remainder
+        shares = {p['player_id']: [] for p in participants}
         for loot_item in all_loot:
             itemid = loot_item['itemid']
-            total_quantity = loot_item['quantity']
-            
-            # Get item name
-            item_name = await self.db.fetchval("SELECT name FROM items WHERE itemid = $1", itemid)
-            if not item_name:
+            if not self.game_data.get_item_name(itemid):
                 continue
-            
-            # Split quantity equally
-            per_person = total_quantity // party_size
-            remainder = total_quantity % party_size
-            
-            # Distribute to each member
+            per_person, remainder = divmod(loot_item['quantity'], party_size)
             for participant in participants:
-                quantity_to_give = per_person
-                if participant['player_id'] == leader_id:
-                    quantity_to_give += remainder  # Leader gets remainder
-                
+                quantity_to_give = per_person + (remainder if participant['player_id'] == leader_id else 0)
                 if quantity_to_give > 0:
-                    # Check inventory space
-                    has_space = await self.db.can_add_to_inventory(participant['player_id'], 1)
-                    if has_space:
-                        await self.db.execute("""
-                            INSERT INTO inventory (playerid, itemid, quantity, isequipped)
-                            VALUES ($1, $2, $3, false)
-                            ON CONFLICT (playerid, itemid) DO UPDATE 
-                            SET quantity = inventory.quantity + $3
-                        """, participant['player_id'], itemid, quantity_to_give)
-                        
-                        # Notify player
-                        try:
-                            discord_id = await self.db.fetchval("""
-                                SELECT discord_id FROM players WHERE playerid = $1
-                            """, participant['player_id'])
-                            if discord_id:
-                                user = await self.bot.fetch_user(discord_id)
-                                if user:
-                                    await user.send(f"🎁 You received **{quantity_to_give}x {item_name}** from the battle!")
-                        except:
-                            pass
+                    shares[participant['player_id']].append((itemid, quantity_to_give))
 
-    async def roll_for_loot(self, ctx, player_id, drop_list):
-        for drop in drop_list:
-            if random.uniform(0, 100) <= drop['droprate']:
-                # Ensure that itemid is converted to an integer
-                itemid = int(drop['itemid'])
-                quantity = drop['quantity']
-
-                # Ensure the player has room in their inventory
-                has_slots = await self.db.can_add_to_inventory(player_id)
-                if not has_slots:
-                    await ctx.send("You don't have enough space in your inventory for the loot.", ephemeral=True)
-                    return
+        await self.settle_loot({member_id: items for member_id, items in shares.items() if items})
 
-                # Fetch the item name from the items table
-                item = await self.db.fetchrow("""
-                    SELECT name FROM items WHERE itemid = $1
-                """, itemid)
+    async def settle_loot(self, grants: dict, source: str = "the battle"):
+        """
+        Write every player's loot in one statement inside one transaction (all of it or none),
+        then queue each player a single message listing what they received.
 
-                if not item:
-                    await ctx.send("Error: Unable to retrieve item data.", ephemeral=True)
-                    return
+        grants: {player_id: [(itemid, quantity), ...]}
+        """
+        if not grants:
+            return {}
+        async with self.db.transaction():
+            results = await Inventory.add_items_for_players(self.db, grants)
+
+        for member_id, result in results.items():
+            if result['added'] or result['failed']:
+                self.bot.outbox.dm(member_id, self.format_loot_summary(result, source))
+        return results
+
+    def format_loot_summary(self, result: dict, source: str) -> str:
+        """One "you received…" message for a player's settled loot."""
+        lines = []
+        if result['added']:
+            received = ", ".join(
+                f"**{quantity}x {self.game_data.get_item_name(itemid)}**"
+                for itemid, quantity in result['added'].items()
+            )
+            lines.append(f"🎁 You received {received} from {source}!")
+        full = [itemid for itemid, reason in result['failed'].items() if reason == 'full']
+        refused = [itemid for itemid, reason in result['failed'].items() if reason != 'full']
+        if full:
+            missed = ", ".join(self.game_data.get_item_name(itemid) or "Unknown item" for itemid in full)
+            lines.append(f"⚠️ Your inventory is full, so you missed: {missed}.")
+        if refused:
+            missed = ", ".join(self.game_data.get_item_name(itemid) or "Unknown item" for itemid in refused)
+            lines.append(f"⚠️ Could not add: {missed}.")
+        return "\n".join(lines)
 
-                # Add the item to inventory
-                await self.db.execute("""
-                    INSERT INTO inventory (playerid, itemid, quantity, isequipped)
-                    VALUES ($1, $2, $3, false)
-                    ON CONFLICT (playerid, itemid) DO UPDATE SET quantity = inventory.quantity + $3
-                """, player_id, itemid, quantity)
+    async def roll_for_loot(self, ctx, player_id, drop_list):
+        """Roll a drop list for one player and settle the drops like party loot."""
+        drops = [
+            (int(drop['itemid']), drop['quantity'])
+            for drop in drop_list
+            if random.uniform(0, 100) <= drop['droprate']
+        ]
+        if not drops:
+            return
+
+        async with self.db.transaction():
+            result = (await Inventory.add_items_for_players(self.db, {player_id: drops}))[player_id]
 
-                await ctx.send(f"x** {quantity}  {item['name']}!** Added to your inventory.", ephemeral=True)
+        if result['added'] or result['failed']:
+            await ctx.send(self.format_loot_summary(result, "the battle"), ephemeral=True)
 
     @component_callback(re.compile(r"^ability_select_\d+$"))
     async def ability_select_handler(self, ctx: ComponentContext):
@@ -1397,18 +1105,16 @@ class BattleSystem(Extension):
             return
         
         # Get battle state
-        battle_state = await self.get_instance_state(instance_id)
-        if not battle_state:
+        battle = await self.get_battle(instance_id)
+        if not battle:
             await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
             return
         
         # Get living enemies
         living_enemies = []
-        for battle_enemy in battle_state['enemies']:
+        for battle_enemy in battle.living_enemies():
             if battle_enemy['current_health'] > 0:
-                enemy_data = await self.db.fetchrow("""
-                    SELECT * FROM enemies WHERE enemyid = $1
-                """, battle_enemy['enemy_id'])
+                enemy_data = battle.get_enemy_row(battle_enemy['enemy_id'])
                 if enemy_data:
                     living_enemies.append({
                         'battle_enemy': battle_enemy,
@@ -1466,8 +1172,8 @@ class BattleSystem(Extension):
             enemy_id = int(parts[2])
 
             # Debugging information to verify what's happening
-            print(f"[Debug] Custom ID: {ctx.custom_id}")
-            print(f"[Debug] Player ID from button: {button_player_id}, Author Discord ID: {ctx.author.id}")
+            logger.debug("Custom ID: %s, player ID from button: %s, author Discord ID: %s",
+                         ctx.custom_id, button_player_id, ctx.author.id)
 
             # Fetch the player's data using the Discord ID to verify identity
             player_data = await self.db.fetchrow("""
@@ -1484,7 +1190,7 @@ class BattleSystem(Extension):
 
             # Compare player ID from the button with the actual player ID retrieved from the database
             if button_player_id != actual_player_id:
-                print("[Debug] Authorization failed - Player IDs do not match.")
+                logger.debug("Authorization failed - Player IDs do not match.")
                 await ctx.send("You are not authorized to interact with this button.", ephemeral=True)
                 return
 
@@ -1501,7 +1207,7 @@ class BattleSystem(Extension):
             await self.show_ability_selection(ctx, actual_player_id, enemy_id, instance_id)
         
         except Exception as e:
-            logging.error(f"Error in ability_button_handler: {e}")
+            logger.error(f"Error in ability_button_handler: {e}")
             import traceback
             traceback.print_exc()
             await ctx.send("Error: Could not process ability selection.", ephemeral=True)
@@ -1535,9 +1241,20 @@ class BattleSystem(Extension):
         for i in range(0, len(ability_buttons), 5):
             button_rows.append(ActionRow(*ability_buttons[i:i+5]))
 
+        # List each ability's damage range next to the buttons
+        ability_lines = []
+        for ability in abilities:
+            damage_parts = [
+                f"{describe_dice(ability.get(f'{damage_type}_damage'))} {damage_type}"
+                for damage_type in combat_engine.DAMAGE_TYPES
+                if ability.get(f'{damage_type}_damage') and str(ability.get(f'{damage_type}_damage')).strip()
+            ]
+            if damage_parts:
+                ability_lines.append(f"**{ability['name']}**: {', '.join(damage_parts)}")
+
         # Send the prompt for the player to choose an ability
         await ctx.send(
-            content="Choose an ability to use:",
+            content="\n".join(["Choose an ability to use:"] + ability_lines),
             components=button_rows,
             ephemeral=True
         )
@@ -1547,27 +1264,7 @@ class BattleSystem(Extension):
         Calculate if an ability hits and if it crits.
         Returns: (hit_success, is_critical)
         """
-        # For magical abilities, use intelligence and willpower
-        if ability_type in ['fire', 'ice', 'lightning', 'water', 'earth', 'air', 'light', 'dark', 'magic']:
-            attacker_stat = attacker_stats.get('total_intelligence', attacker_stats.get('intelligence', 0))
-            defender_stat = defender_stats.get('total_willpower', defender_stats.get('willpower', 0))
-        else:
-            # For physical abilities, use dexterity and agility
-            attacker_stat = attacker_stats.get('total_dexterity', attacker_stats.get('dexterity', 0))
-            defender_stat = defender_stats.get('total_agility', defender_stats.get('agility', 0))
-        
-        # Base hit roll (d20) + attacker's relevant stat
-        hit_roll = self.roll_dice() + attacker_stat
-        
-        # Calculate critical chance (base 5% + intelligence/dexterity bonus)
-        critical_chance = 5 + (attacker_stat * 0.5)
-        is_critical = random.uniform(0, 100) <= critical_chance
-        
-        # Calculate hit success - abilities are easier to land than physical attacks
-        hit_threshold = 8 + defender_stat
-        hit_success = hit_roll > hit_threshold
-        
-        return hit_success, is_critical
+        return combat_engine.ability_hit(attacker_stats, defender_stats, ability_type)
 
     @component_callback(re.compile(r"^cast_ability_\d+_\d+_\d+$"))
     async def cast_ability_handler(self, ctx: ComponentContext):
@@ -1606,27 +1303,21 @@ class BattleSystem(Extension):
                 await ctx.send("⏳ It's not your turn! Please wait for your turn.", ephemeral=True)
                 return
             
-            battle_state = await self.get_instance_state(instance_id)
+            battle = await self.get_battle(instance_id)
+            if not battle:
+                await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
+                return
+            battle_state = battle.to_state()
 
             # Find the target enemy in the battle
-            target_enemy = None
-            for battle_enemy in battle_state['enemies']:
-                enemy = await self.db.fetchrow("""
-                    SELECT * FROM enemies WHERE enemyid = $1
-                """, battle_enemy['enemy_id'])
-                if enemy['enemyid'] == enemy_id:
-                    target_enemy = enemy
-                    target_battle_enemy = battle_enemy
-                    break
+            target_battle_enemy, target_enemy = battle.find_enemy(enemy_id)
 
             if not target_enemy:
                 await ctx.send("Target enemy not found in battle.", ephemeral=True)
                 return
 
             # Get player stats and check mana
-            player_stats = await self.db.fetchrow("""
-                SELECT * FROM player_stats_view WHERE playerid = $1
-            """, player_id)
+            player_stats = await self.db.fetch_view_stats(player_id)
 
             if not player_stats:
                 await ctx.send("Error: Could not retrieve player stats.", ephemeral=True)
@@ -1651,11 +1342,7 @@ class BattleSystem(Extension):
                 return
 
             # Get player username for messages
-            player_discord_id = await self.db.fetchval("""
-                SELECT discord_id FROM players WHERE playerid = $1
-            """, player_id)
-            player_user = await self.bot.fetch_user(player_discord_id) if player_discord_id else None
-            player_name = player_user.display_name if player_user else f"Player {player_id}"
+            player_name = await self.identities.get_name(player_id)
             
             # Get enemy stats for hit calculation
             enemy_stats = self.extract_attributes(target_enemy)
@@ -1752,36 +1439,21 @@ class BattleSystem(Extension):
             # Enemy's turn - in party battles, enemies attack random participants
             player_survived = True
             if battle_state['instance_type'] == 'party':
-                for battle_enemy in battle_state['enemies']:
-                    if battle_enemy['current_health'] > 0:
-                        # Select random target from participants
-                        target_participant = random.choice(battle_state['participants'])
-                        survived = await self.enemy_attack(
-                            ctx, 
-                            target_participant['player_id'], 
-                            await self.db.fetchrow("""
-                                SELECT * FROM enemies WHERE enemyid = $1
-                            """, battle_enemy['enemy_id']),
-                            instance_id
-                        )
-                        player_survived = player_survived and survived
+                player_survived = await self.resolve_enemy_phase(
+                    ctx, instance_id, self.plan_enemy_phase(battle)
+                )
             else:
                 player_survived = await self.enemy_attack(ctx, player_id, target_enemy, instance_id)
 
             # Advance turn for party battles
             if battle_state['instance_type'] == 'party':
-                next_player = await self.advance_turn(instance_id)
+                next_player = await self.advance_turn(instance_id, player_id)
                 if next_player:
                     # Get channel from battle instance
-                    channel_id = await self.db.fetchval("""
-                        SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                    """, instance_id)
+                    channel_id = await self.get_battle_channel_id(instance_id)
                     channel = None
                     if channel_id:
-                        try:
-                            channel = await self.bot.fetch_channel(channel_id)
-                        except:
-                            pass
+                        channel = await self.bot.outbox.get_channel(channel_id)
                     # Prompt next player
                     await self.prompt_next_player_turn(instance_id, next_player, channel)
             else:
@@ -1794,7 +1466,7 @@ class BattleSystem(Extension):
             await self.handle_combat_end(ctx, player_id, target_enemy)
 
         except Exception as e:
-            logging.error(f"Error in cast_ability_handler: {e}")
+            logger.error(f"Error in cast_ability_handler: {e}")
             import traceback
             traceback.print_exc()
             await ctx.send(f"Error: Could not process ability cast. {str(e)}", ephemeral=True)
@@ -1865,7 +1537,7 @@ class BattleSystem(Extension):
             await ctx.send("Choose an item to use:", components=[use_select], ephemeral=True)
             
         except Exception as e:
-            logging.error(f"Error in use_item_combat_handler: {e}")
+            logger.error(f"Error in use_item_combat_handler: {e}")
             import traceback
             traceback.print_exc()
             await ctx.send("Error: Could not process item selection.", ephemeral=True)
@@ -1945,7 +1617,7 @@ class BattleSystem(Extension):
                 return
             
         except Exception as e:
-            logging.error(f"Error in select_combat_item_handler: {e}")
+            logger.error(f"Error in select_combat_item_handler: {e}")
             import traceback
             traceback.print_exc()
             await ctx.send("Error: Could not process item usage.", ephemeral=True)
@@ -1959,7 +1631,7 @@ class BattleSystem(Extension):
             return
         
         # Get food effects
-        food_effects = inventory_system.get_food_effects(item_name)
+        food_effects = inventory_system.roll_food_effects(item_name)
         if not food_effects:
             await ctx.send(f"{item_name} cannot be consumed.", ephemeral=True)
             return
@@ -1994,14 +1666,11 @@ class BattleSystem(Extension):
         
         # Update battle participant health/mana for party battles
         if battle_state['instance_type'] == 'party':
-            await self.db.execute("""
-                UPDATE battle_participants
-                SET current_health = $1, current_mana = $2
-                WHERE instance_id = $3 AND player_id = $4
-            """, new_health, new_mana, instance_id, player_id)
+            await self.update_battle_health(instance_id, 'player', player_id, new_health, new_mana)
         
         # Refresh battle state to get updated stats for embeds
-        battle_state = await self.get_instance_state(instance_id)
+        battle = await self.get_battle(instance_id)
+        battle_state = battle.to_state()
         
         # Remove one quantity of the item
         inventory_entry = await self.db.fetchrow("""
@@ -2053,42 +1722,25 @@ class BattleSystem(Extension):
         # Enemy's turn - in party battles, enemies attack random participants
         player_survived = True
         if battle_state['instance_type'] == 'party':
-            for battle_enemy in battle_state['enemies']:
-                if battle_enemy['current_health'] > 0:
-                    # Select random target from participants
-                    target_participant = random.choice(battle_state['participants'])
-                    survived = await self.enemy_attack(
-                        ctx, 
-                        target_participant['player_id'], 
-                        await self.db.fetchrow("""
-                            SELECT * FROM enemies WHERE enemyid = $1
-                        """, battle_enemy['enemy_id']),
-                        instance_id
-                    )
-                    player_survived = player_survived and survived
+            player_survived = await self.resolve_enemy_phase(
+                ctx, instance_id, self.plan_enemy_phase(battle)
+            )
         else:
             # Solo battle - enemy attacks player
             if battle_state['enemies']:
-                target_enemy = await self.db.fetchrow("""
-                    SELECT * FROM enemies WHERE enemyid = $1
-                """, battle_state['enemies'][0]['enemy_id'])
+                target_enemy = battle.get_enemy_row(battle_state['enemies'][0]['enemy_id'])
                 if target_enemy:
                     player_survived = await self.enemy_attack(ctx, player_id, target_enemy, instance_id)
         
         # Advance turn for party battles
         if battle_state['instance_type'] == 'party':
-            next_player = await self.advance_turn(instance_id)
+            next_player = await self.advance_turn(instance_id, player_id)
             if next_player:
                 # Get channel from battle instance
-                channel_id = await self.db.fetchval("""
-                    SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                """, instance_id)
+                channel_id = await self.get_battle_channel_id(instance_id)
                 channel = None
                 if channel_id:
-                    try:
-                        channel = await self.bot.fetch_channel(channel_id)
-                    except:
-                        pass
+                    channel = await self.bot.outbox.get_channel(channel_id)
                 # Prompt next player
                 await self.prompt_next_player_turn(instance_id, next_player, channel)
         else:
@@ -2099,9 +1751,7 @@ class BattleSystem(Extension):
         
         # Check combat end
         if battle_state['enemies']:
-            target_enemy = await self.db.fetchrow("""
-                SELECT * FROM enemies WHERE enemyid = $1
-            """, battle_state['enemies'][0]['enemy_id'])
+            target_enemy = battle.get_enemy_row(battle_state['enemies'][0]['enemy_id'])
             if target_enemy:
                 await self.handle_combat_end(ctx, player_id, target_enemy)
 
@@ -2125,29 +1775,21 @@ class BattleSystem(Extension):
 
     async def apply_status_effect(self, target_id: int, effect_type: str, duration: int, value: int):
         """Apply a status effect to a target (player or enemy)."""
-        await self.db.execute("""
-            INSERT INTO temporary_effects (player_id, attribute, modifier_value, duration, start_time)
-            VALUES ($1, $2, $3, $4, NOW())
-        """, target_id, effect_type, value, duration)
+        await self.effects.add_player_effect(target_id, effect_type, value, duration)
 
     async def get_active_effects(self, target_id: int):
         """Get all active status effects for a target."""
-        return await self.db.fetch("""
-            SELECT attribute, modifier_value, duration, start_time
-            FROM temporary_effects
-            WHERE player_id = $1
-            AND start_time + (duration * interval '1 second') > NOW()
-        """, target_id)
+        return await self.effects.player_effects(target_id)
 
     async def calculate_effective_stats(self, base_stats: dict, target_id: int):
         """Calculate effective stats including status effects."""
-        effects = await self.get_active_effects(target_id)
+        await self.effects.load_players([target_id])
         effective_stats = base_stats.copy()
 
-        for effect in effects:
-            attribute = effect['attribute']
+        # Per-attribute totals are kept up to date as effects are added and expire
+        for attribute, delta in self.effects.totals(('player', target_id)).items():
             if attribute in effective_stats:
-                effective_stats[attribute] += effect['modifier_value']
+                effective_stats[attribute] += delta
 
         return effective_stats
 
@@ -2180,7 +1822,7 @@ class BattleSystem(Extension):
             SELECT bp.player_id, COALESCE(psv.total_agility, pd.agility, 10) as agility
             FROM battle_participants bp
             JOIN player_data pd ON bp.player_id = pd.playerid
-            LEFT JOIN player_stats_view psv ON bp.player_id = psv.playerid
+            LEFT JOIN player_stats_cache psv ON bp.player_id = psv.playerid
             WHERE bp.instance_id = $1 AND bp.current_health > 0
             ORDER BY agility DESC, bp.player_id
         """, instance_id)
@@ -2195,75 +1837,58 @@ class BattleSystem(Extension):
         current_turn_player = turn_order[0] if turn_order else None
         
         # Update battle instance with turn order
-        await self.db.execute("""
-            UPDATE battle_instances
-            SET turn_order = $1, current_turn_player_id = $2, turn_number = 0
-            WHERE instance_id = $3
-        """, turn_order, current_turn_player, instance_id)
+        battle = await self.states.get(instance_id)
+        battle.set_fields(turn_order=turn_order, current_turn_player_id=current_turn_player, turn_number=0)
+        self.turns.start(battle)
         
         return current_turn_player
     
     async def get_current_turn_player(self, instance_id: int):
         """Get the player whose turn it is."""
-        return await self.db.fetchval("""
-            SELECT current_turn_player_id FROM battle_instances
-            WHERE instance_id = $1 AND is_active = true
-        """, instance_id)
+        battle = await self.states.get(instance_id)
+        if not battle or not battle.instance.get('is_active'):
+            return None
+        return battle.instance.get('current_turn_player_id')
     
-    async def advance_turn(self, instance_id: int):
-        """Advance to the next player's turn. Returns next player_id or None if round complete."""
-        battle = await self.db.fetchrow("""
-            SELECT turn_order, current_turn_player_id, turn_number
-            FROM battle_instances
-            WHERE instance_id = $1
-        """, instance_id)
+    async def advance_turn(self, instance_id: int, player_id: int = None):
+        """Advance to the next living player's turn and start their deadline. Returns next player_id or None.
+
+        With player_id, only advances if it is still that player's turn (their deadline may have skipped them).
+        """
+        battle = await self.states.get(instance_id)
         
-        if not battle or not battle['turn_order']:
+        if not battle or not battle.instance.get('turn_order'):
             return None
         
-        turn_order = battle['turn_order']
-        current_player = battle['current_turn_player_id']
-        turn_number = battle['turn_number'] or 0
-        
-        # Find current player index
-        try:
-            current_index = turn_order.index(current_player)
-        except ValueError:
-            current_index = 0
-        
-        # Get next player (skip dead players)
-        next_index = (current_index + 1) % len(turn_order)
-        next_player = turn_order[next_index]
-        
-        # Check if we've completed a full round
-        if next_index == 0:
-            turn_number += 1
-        
-        # Skip dead players
-        attempts = 0
-        while attempts < len(turn_order):
-            # Check if next player is alive
-            participant = await self.db.fetchrow("""
-                SELECT current_health FROM battle_participants
-                WHERE instance_id = $1 AND player_id = $2
-            """, instance_id, next_player)
-            
-            if participant and participant['current_health'] > 0:
-                break
-            
-            # Player is dead, move to next
-            next_index = (next_index + 1) % len(turn_order)
-            next_player = turn_order[next_index]
-            attempts += 1
-        
-        # Update battle instance
-        await self.db.execute("""
-            UPDATE battle_instances
-            SET current_turn_player_id = $1, turn_number = $2
-            WHERE instance_id = $3
-        """, next_player, turn_number, instance_id)
-        
-        return next_player
+        return self.turns.get(battle).advance(expected=player_id)
+
+    async def handle_turn_timeout(self, scheduler, player_id: int):
+        """A party turn's deadline passed: skip the player and prompt the next one."""
+        # Give an action that is still being processed a moment to finish and advance the turn itself
+        discord_id = await self.identities.get_discord_id(player_id)
+        if discord_id is not None and self.bot.player_actions.is_busy(discord_id):
+            scheduler.arm(delay=5)
+            return
+
+        instance_id = scheduler.instance_id
+        next_player = scheduler.advance(expected=player_id, timed_out=True)
+        if not next_player:
+            return
+        logger.info("Turn of player %s in battle %s timed out", player_id, instance_id)
+
+        # Nobody has acted for two full rounds: the party has left
+        if scheduler.idle_turns >= 2 * scheduler.active_players:
+            await self.send_battle_message(instance_id, "💤 Nobody has acted for two rounds; the battle has ended.")
+            await self.end_battle_instance(instance_id, reason='abandoned')
+            return
+
+        player_name = await self.identities.get_name(player_id)
+        await self.send_battle_message(instance_id, f"⏰ {player_name} took too long; their turn was skipped.")
+        channel_id = await self.get_battle_channel_id(instance_id)
+        channel = None
+        if channel_id:
+            channel = await self.bot.outbox.get_channel(channel_id)
+        await self.prompt_next_player_turn(instance_id, next_player, channel)
 
     async def add_player_to_instance(self, instance_id: int, player_id: int, is_leader: bool = False):
         """Add a player to a battle instance."""
@@ -2280,9 +1905,7 @@ class BattleSystem(Extension):
 
     async def spawn_enemy_in_instance(self, instance_id: int, enemy_id: int, is_boss: bool = False):
         """Spawn an enemy in a battle instance."""
-        enemy = await self.db.fetchrow("""
-            SELECT * FROM enemies WHERE enemyid = $1
-        """, enemy_id)
+        enemy = self.game_data.get_enemy(enemy_id)
 
         await self.db.execute("""
             INSERT INTO battle_enemies 
@@ -2293,89 +1916,56 @@ class BattleSystem(Extension):
     async def apply_battle_effect(self, instance_id: int, target_type: str, target_id: int, 
                                 effect_type: str, effect_value: int, duration: int):
         """Apply an effect in a battle instance."""
-        await self.db.execute("""
-            INSERT INTO battle_effects 
-            (instance_id, target_type, target_id, effect_type, effect_value, duration)
-            VALUES ($1, $2, $3, $4, $5, $6)
-        """, instance_id, target_type, target_id, effect_type, effect_value, duration)
+        effect = await self.effects.add_battle_effect(
+            instance_id, target_type, target_id, effect_type, effect_value, duration
+        )
+
+        battle = self.states.get_cached(instance_id)
+        if battle and effect:
+            battle.add_effect(effect)
 
     async def get_active_battle_effects(self, instance_id: int, target_type: str, target_id: int):
         """Get all active effects for a target in a battle."""
-        return await self.db.fetch("""
-            SELECT * FROM battle_effects 
-            WHERE instance_id = $1 
-            AND target_type = $2 
-            AND target_id = $3 
-            AND start_time + (duration * interval '1 second') > NOW()
-        """, instance_id, target_type, target_id)
+        return await self.effects.battle_effects(instance_id, target_type, target_id)
 
     async def update_battle_health(self, instance_id: int, target_type: str, target_id: int, new_health: int, new_mana: int = None):
-        """Update health and optionally mana for a participant in battle."""
-        if target_type == 'player':
-            if new_mana is not None:
-                await self.db.execute("""
-                    UPDATE battle_participants 
-                    SET current_health = $1, current_mana = $2
-                    WHERE instance_id = $3 AND player_id = $4
-                """, new_health, new_mana, instance_id, target_id)
-            else:
-                await self.db.execute("""
-                    UPDATE battle_participants 
-                    SET current_health = $1
-                    WHERE instance_id = $2 AND player_id = $3
-                """, new_health, instance_id, target_id)
-        else:
-            await self.db.execute("""
-                UPDATE battle_enemies 
-                SET current_health = $1 
-                WHERE instance_id = $2 AND battle_enemy_id = $3
-            """, new_health, instance_id, target_id)
+        """Update health and optionally mana for a participant in battle (written back on the next flush)."""
+        battle = await self.states.get(instance_id)
+        if battle:
+            battle.set_health(target_type, target_id, new_health, new_mana)
+
+    async def get_battle(self, instance_id: int):
+        """Get the in-memory BattleInstance for a battle."""
+        return await self.states.get(instance_id)
 
     async def get_instance_state(self, instance_id: int):
         """Get the complete state of a battle instance."""
-        # First get the base instance data
-        instance = await self.db.fetchrow("""
-            SELECT * FROM battle_instances WHERE instance_id = $1
-        """, instance_id)
-        
-        if not instance:
+        battle = await self.states.get(instance_id)
+        if not battle:
             return None
-            
-        # Get participants
-        participants = await self.db.fetch("""
-            SELECT * FROM battle_participants WHERE instance_id = $1
-        """, instance_id)
-        
-        # Get enemies
-        enemies = await self.db.fetch("""
-            SELECT * FROM battle_enemies WHERE instance_id = $1
-        """, instance_id)
-        
-        # Get effects
-        effects = await self.db.fetch("""
-            SELECT * FROM battle_effects WHERE instance_id = $1
-        """, instance_id)
-        
-        # Combine all data
-        battle_state = {
-            **dict(instance),
-            'participants': participants,
-            'enemies': enemies,
-            'effects': effects
-        }
-        
-        return battle_state
-
-    async def end_battle_instance(self, instance_id: int):
-        """End a battle instance and clean up."""
+        return battle.to_state()
+
+    async def get_battle_channel_id(self, instance_id: int):
+        """Get the channel a battle is being played in."""
+        battle = await self.states.get(instance_id)
+        return battle.instance.get('channel_id') if battle else None
+
+    async def end_battle_instance(self, instance_id: int, reason: str = None):
+        """End a battle instance and clean up (BattleMaintenance archives it later)."""
+        self.turns.discard(instance_id)
+        self.effects.forget_battle(instance_id)
+        await self.states.end(instance_id)
         await self.db.execute("""
             UPDATE battle_instances 
-            SET is_active = false 
+            SET is_active = false, ended_at = NOW(), end_reason = $2
             WHERE instance_id = $1
-        """, instance_id)
+        """, instance_id, reason)
 
     async def get_player_battle_instance(self, player_id: int):
-        """Get active battle instance for a player from database."""
+        """Get active battle instance for a player."""
+        instance_id = self.states.find_instance_for_player(player_id)
+        if instance_id:
+            return instance_id
         return await self.db.fetchval("""
             SELECT bi.instance_id FROM battle_instances bi
             JOIN battle_participants bp ON bi.instance_id = bp.instance_id
@@ -2387,37 +1977,30 @@ class BattleSystem(Extension):
     async def send_battle_message(self, instance_id: int, message: str, embed: Embed = None):
         """Send a message to the battle channel for party visibility."""
         try:
-            channel_id = await self.db.fetchval("""
-                SELECT channel_id FROM battle_instances WHERE instance_id = $1
-            """, instance_id)
+            channel_id = await self.get_battle_channel_id(instance_id)
             
             if channel_id:
-                channel = await self.bot.fetch_channel(channel_id)
-                if channel:
-                    if embed:
-                        await channel.send(content=message, embeds=[embed])
-                    else:
-                        await channel.send(message)
-                    return True
+                # Queued: lines posted by one turn go out as one message, off the handler's path
+                self.bot.outbox.post(channel_id, message, embeds=[embed] if embed else None)
+                return True
         except Exception as e:
-            logging.error(f"Error sending battle message: {e}")
+            logger.error(f"Error sending battle message: {e}")
         return False
     
     async def prompt_next_player_turn(self, instance_id: int, player_id: int, channel=None):
         """Prompt the next player whose turn it is. Sends to channel if provided, otherwise DM."""
         try:
-            battle_state = await self.get_instance_state(instance_id)
-            if not battle_state:
-                logging.error(f"No battle state found for instance {instance_id}")
+            battle = await self.get_battle(instance_id)
+            if not battle:
+                logger.error(f"No battle state found for instance {instance_id}")
                 return
+            battle_state = battle.to_state()
             
             # Get player stats
-            player_stats = await self.db.fetchrow("""
-                SELECT * FROM player_stats_view WHERE playerid = $1
-            """, player_id)
+            player_stats = await self.db.fetch_view_stats(player_id)
             
             if not player_stats:
-                logging.error(f"No player stats found for player {player_id}")
+                logger.error(f"No player stats found for player {player_id}")
                 return
             
             # Find first living enemy
@@ -2425,50 +2008,36 @@ class BattleSystem(Extension):
             target_battle_enemy = None
             for battle_enemy in battle_state['enemies']:
                 if battle_enemy['current_health'] > 0:
-                    enemy_data = await self.db.fetchrow("""
-                        SELECT * FROM enemies WHERE enemyid = $1
-                    """, battle_enemy['enemy_id'])
+                    enemy_data = battle.get_enemy_row(battle_enemy['enemy_id'])
                     if enemy_data:
                         target_enemy = enemy_data
                         target_battle_enemy = battle_enemy
                         break
             
             if not target_enemy:
-                logging.error(f"No living enemies found in battle {instance_id}")
+                logger.error(f"No living enemies found in battle {instance_id}")
                 return
             
-            # Get fresh participant data from database to ensure current health/mana
-            participant = await self.db.fetchrow("""
-                SELECT * FROM battle_participants 
-                WHERE instance_id = $1 AND player_id = $2
-            """, instance_id, player_id)
+            # The in-memory battle always holds the current health/mana
+            participant = battle.get_participant(player_id)
             
             if not participant:
-                logging.error(f"Player {player_id} not found in battle participants")
+                logger.error(f"Player {player_id} not found in battle participants")
                 return
             
-            # Also refresh battle_state participants for display
-            battle_state['participants'] = await self.db.fetch("""
-                SELECT * FROM battle_participants WHERE instance_id = $1
-            """, instance_id)
-            
-            # Refresh enemies too
-            battle_state['enemies'] = await self.db.fetch("""
-                SELECT * FROM battle_enemies WHERE instance_id = $1
-            """, instance_id)
-            
-            # Get player's Discord ID and username
-            discord_id = await self.db.fetchval("""
-                SELECT discord_id FROM players WHERE playerid = $1
-            """, player_id)
+            # Resolve every participant's Discord user at once (the current player included)
+            identities = await self.identities.resolve_many(
+                [player_id] + [p['player_id'] for p in battle_state['participants']]
+            )
+            identity = identities[player_id]
             
-            if not discord_id:
-                logging.error(f"No Discord ID found for player {player_id}")
+            if not identity.discord_id:
+                logger.error(f"No Discord ID found for player {player_id}")
                 return
             
-            user = await self.bot.fetch_user(discord_id)
+            user = identity.user
             if not user:
-                logging.error(f"Could not fetch Discord user for ID {discord_id}")
+                logger.error(f"Could not fetch Discord user for ID {identity.discord_id}")
                 return
             
             # If channel is provided, send to channel and mention the player
@@ -2483,17 +2052,7 @@ class BattleSystem(Extension):
                     
                     # Add all party members' status
                     for p in battle_state['participants']:
-                        try:
-                            p_discord_id = await self.db.fetchval("""
-                                SELECT discord_id FROM players WHERE playerid = $1
-                            """, p['player_id'])
-                            if p_discord_id:
-                                p_user = await self.bot.fetch_user(p_discord_id)
-                                p_name = p_user.display_name if p_user else f"Player {p['player_id']}"
-                            else:
-                                p_name = f"Player {p['player_id']}"
-                        except:
-                            p_name = f"Player {p['player_id']}"
+                        p_name = identities[p['player_id']].name
                         
                         is_current_turn = " 👈" if p['player_id'] == player_id else ""
                         status_icon = "💀" if p['current_health'] <= 0 else "❤️"
@@ -2506,9 +2065,7 @@ class BattleSystem(Extension):
                     # Add all enemies' status
                     for battle_enemy in battle_state['enemies']:
                         if battle_enemy['current_health'] > 0:
-                            enemy_data = await self.db.fetchrow("""
-                                SELECT * FROM enemies WHERE enemyid = $1
-                            """, battle_enemy['enemy_id'])
+                            enemy_data = battle.get_enemy_row(battle_enemy['enemy_id'])
                             if enemy_data:
                                 status_icon = "💀" if battle_enemy['current_health'] <= 0 else "👹"
                                 embed.add_field(
@@ -2544,18 +2101,15 @@ class BattleSystem(Extension):
                         )
                     )
                     
-                    # Send buttons to channel
+                    # Send buttons to channel, after the combat lines still queued for it
+                    await self.bot.outbox.flush(channel.id)
                     turn_message = await channel.send(content=user.mention, embeds=[embed], components=[buttons])
-                    logging.info(f"Sent turn prompt to channel {channel.id} for player {player_id} (message ID: {turn_message.id})")
+                    logger.debug("Sent turn prompt to channel %s for player %s (message ID: %s)", channel.id, player_id, turn_message.id)
                     
                     # Update battle instance with turn message ID for reference
-                    await self.db.execute("""
-                        UPDATE battle_instances
-                        SET message_id = $1
-                        WHERE instance_id = $2
-                    """, turn_message.id, instance_id)
+                    battle.set_fields(message_id=turn_message.id)
                 except Exception as e:
-                    logging.error(f"Error sending turn prompt to channel: {e}")
+                    logger.error(f"Error sending turn prompt to channel: {e}")
                     import traceback
                     traceback.print_exc()
                     # Fallback to DM
@@ -2572,7 +2126,7 @@ class BattleSystem(Extension):
                     )
             else:
                 # Fallback to DM if no channel
-                logging.info(f"No channel provided, sending DM to player {player_id}")
+                logger.debug("No channel provided, sending DM to player %s", player_id)
                 await self.prompt_player_action(
                     None,
                     player_id,
@@ -2585,7 +2139,7 @@ class BattleSystem(Extension):
                     self.extract_resistances(target_enemy)
                 )
         except Exception as e:
-            logging.error(f"Error in prompt_next_player_turn: {e}")
+            logger.error(f"Error in prompt_next_player_turn: {e}")
             import traceback
             traceback.print_exc()
     
@@ -2608,10 +2162,9 @@ class BattleSystem(Extension):
                 break
 
         # Add enemy fields
+        battle = await self.get_battle(battle_state['instance_id'])
         for battle_enemy in battle_state['enemies']:
-            enemy = await self.db.fetchrow("""
-                SELECT name FROM enemies WHERE enemyid = $1
-            """, battle_enemy['enemy_id'])
+            enemy = battle.get_enemy_row(battle_enemy['enemy_id']) if battle else None
             if enemy:
                 embed.add_field(
                     name=enemy['name'],
@@ -2667,9 +2220,7 @@ class BattleSystem(Extension):
         is_their_turn = (current_turn_player == player_id) if current_turn_player else False
 
         # Fetch player stats from the view
-        player_stats = await self.db.fetchrow("""
-            SELECT * FROM player_stats_view WHERE playerid = $1
-        """, player_id)
+        player_stats = await self.db.fetch_view_stats(player_id)
 
         if not player_stats:
             await ctx.send("Error: Could not retrieve player stats.", ephemeral=True)
@@ -2678,10 +2229,11 @@ class BattleSystem(Extension):
         player_stats = dict(player_stats)
 
         # Get battle state
-        battle_state = await self.get_instance_state(instance_id)
-        if not battle_state:
+        battle = await self.get_battle(instance_id)
+        if not battle:
             await ctx.send("Error: Could not retrieve battle state.", ephemeral=True)
             return
+        battle_state = battle.to_state()
 
         # Calculate player's agility check (d20 + agility modifier)
         player_agility = player_stats.get('total_agility', player_stats.get('agility', 0))
@@ -2698,9 +2250,7 @@ class BattleSystem(Extension):
             if battle_enemy['current_health'] <= 0:
                 continue
 
-            enemy = await self.db.fetchrow("""
-                SELECT * FROM enemies WHERE enemyid = $1
-            """, battle_enemy['enemy_id'])
+            enemy = battle.get_enemy_row(battle_enemy['enemy_id'])
             
             if not enemy:
                 continue
@@ -2716,114 +2266,28 @@ class BattleSystem(Extension):
         # If no enemies beat the player's roll, escape is successful
         if not successful_enemies:
             # Get player username for messages
-            player_discord_id = await self.db.fetchval("""
-                SELECT discord_id FROM players WHERE playerid = $1
-            """, player_id)
-            player_user = await self.bot.fetch_user(player_discord_id) if player_discord_id else None
-            player_name = player_user.display_name if player_user else f"Player {player_id}"
+            player_name = await self.identities.get_name(player_id)
             
             # Check if this is a party battle
             is_party = battle_state.get('instance_type') == 'party'
             
             if is_party:
-                # Use the turn check we did earlier (before any changes)
-                was_their_turn = is_their_turn
-                
-                # Get current turn order to find next player
-                turn_order = await self.db.fetchval("""
-                    SELECT turn_order FROM battle_instances WHERE instance_id = $1
-                """, instance_id)
-                
-                # Find the next player in the original turn order (before removing fleeing player)
-                next_player = None
-                if was_their_turn and turn_order and player_id in turn_order:
-                    try:
-                        current_index = turn_order.index(player_id)
-                        # Find next alive player after the fleeing player
-                        for i in range(1, len(turn_order)):
-                            next_index = (current_index + i) % len(turn_order)
-                            candidate_id = turn_order[next_index]
-                            
-                            # Skip the fleeing player if we wrap around
-                            if candidate_id == player_id:
-                                continue
-                            
-                            # Check if this player is still in battle and alive
-                            participant = await self.db.fetchrow("""
-                                SELECT current_health FROM battle_participants
-                                WHERE instance_id = $1 AND player_id = $2
-                            """, instance_id, candidate_id)
-                            
-                            if participant and participant['current_health'] > 0:
-                                next_player = candidate_id
-                                break
-                    except ValueError:
-                        pass
-                
                 # Remove player from battle participants
                 await self.db.execute("""
                     DELETE FROM battle_participants
                     WHERE instance_id = $1 AND player_id = $2
                 """, instance_id, player_id)
+                battle.remove_participant(player_id)
                 
-                # Remove player from turn order
-                if turn_order and player_id in turn_order:
-                    new_turn_order = [p for p in turn_order if p != player_id]
-                    await self.db.execute("""
-                        UPDATE battle_instances
-                        SET turn_order = $1
-                        WHERE instance_id = $2
-                    """, new_turn_order, instance_id)
-                    
-                    # If it was this player's turn, set the next player
-                    if was_their_turn:
-                        if next_player:
-                            # Set the next player we found as current turn
-                            await self.db.execute("""
-                                UPDATE battle_instances
-                                SET current_turn_player_id = $1
-                                WHERE instance_id = $2
-                            """, next_player, instance_id)
-                            
-                            # Get channel and prompt next player
-                            channel_id = await self.db.fetchval("""
-                                SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                            """, instance_id)
-                            channel = None
-                            if channel_id:
-                                try:
-                                    channel = await self.bot.fetch_channel(channel_id)
-                                except:
-                                    pass
-                            if channel:
-                                await self.prompt_next_player_turn(instance_id, next_player, channel)
-                        else:
-                            # No next player found, try to get first alive player from new turn order
-                            for p_id in new_turn_order:
-                                participant = await self.db.fetchrow("""
-                                    SELECT current_health FROM battle_participants
-                                    WHERE instance_id = $1 AND player_id = $2
-                                """, instance_id, p_id)
-                                if participant and participant['current_health'] > 0:
-                                    await self.db.execute("""
-                                        UPDATE battle_instances
-                                        SET current_turn_player_id = $1
-                                        WHERE instance_id = $2
-                                    """, p_id, instance_id)
-                                    
-                                    # Get channel and prompt next player
-                                    channel_id = await self.db.fetchval("""
-                                        SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                                    """, instance_id)
-                                    channel = None
-                                    if channel_id:
-                                        try:
-                                            channel = await self.bot.fetch_channel(channel_id)
-                                        except:
-                                            pass
-                                    if channel:
-                                        await self.prompt_next_player_turn(instance_id, p_id, channel)
-                                    break
+                # Remove player from turn order; if it was their turn, the next living player is up
+                next_player = self.turns.get(battle).remove(player_id)
+                if next_player:
+                    channel_id = await self.get_battle_channel_id(instance_id)
+                    channel = None
+                    if channel_id:
+                        channel = await self.bot.outbox.get_channel(channel_id)
+                    if channel:
+                        await self.prompt_next_player_turn(instance_id, next_player, channel)
                 
                 # Remove player from party
                 party = await self.db.fetchrow("""
@@ -2852,11 +2316,11 @@ class BattleSystem(Extension):
                             WHERE pm.party_id = $1
                         """, party['party_id'])
                         
-                        for member in remaining_members:
+                        member_identities = await self.identities.resolve_many(m['player_id'] for m in remaining_members)
+                        for identity in member_identities.values():
                             try:
-                                member_user = await self.bot.fetch_user(member['discord_id'])
-                                if member_user:
-                                    await member_user.send("⚠️ Your party leader has fled and the party has been disbanded!")
+                                if identity.user:
+                                    await identity.user.send("⚠️ Your party leader has fled and the party has been disbanded!")
                             except:
                                 pass
                     else:
@@ -2867,25 +2331,18 @@ class BattleSystem(Extension):
                         """, party['party_id'], player_id)
                         
                         # Notify party leader
-                        leader_discord_id = await self.db.fetchval("""
-                            SELECT discord_id FROM players WHERE playerid = $1
-                        """, party['leader_id'])
-                        if leader_discord_id:
-                            try:
-                                leader_user = await self.bot.fetch_user(leader_discord_id)
-                                if leader_user:
-                                    await leader_user.send(f"⚠️ {player_name} has fled from battle and left the party!")
-                            except:
-                                pass
+                        try:
+                            leader_user = await self.identities.get_user(party['leader_id'])
+                            if leader_user:
+                                await leader_user.send(f"⚠️ {player_name} has fled from battle and left the party!")
+                        except:
+                            pass
                 
                 # Send message to battle channel
                 await self.send_battle_message(instance_id, f"🏃 **{player_name}** has successfully fled from battle!")
                 
                 # Check if any participants remain
-                remaining_participants = await self.db.fetch("""
-                    SELECT * FROM battle_participants
-                    WHERE instance_id = $1 AND current_health > 0
-                """, instance_id)
+                remaining_participants = battle.living_participants()
                 
                 if not remaining_participants:
                     # No one left in battle - end it
@@ -2899,6 +2356,7 @@ class BattleSystem(Extension):
                     DELETE FROM battle_participants
                     WHERE instance_id = $1 AND player_id = $2
                 """, instance_id, player_id)
+                battle.remove_participant(player_id)
                 await self.end_battle_instance(instance_id)
                 await ctx.send("You successfully escaped from battle!", ephemeral=True)
             return
@@ -2906,12 +2364,9 @@ class BattleSystem(Extension):
             await ctx.send(f"Failed to escape! {len(successful_enemies)} enemies caught up to you!", ephemeral=True)
             
             # Only enemies that beat the roll get to attack
-            player_survived = True
-            for enemy in successful_enemies:
-                if not player_survived:
-                    break
-                    
-                player_survived = await self.enemy_attack(ctx, player_id, enemy, instance_id)
+            player_survived = await self.resolve_enemy_phase(
+                ctx, instance_id, [(enemy, player_id) for enemy in successful_enemies]
+            )
             
             # Get battle state to check if it's a party battle
             battle_state = await self.get_instance_state(instance_id)
@@ -2920,18 +2375,13 @@ class BattleSystem(Extension):
             
             # Advance turn for party battles only if it was this player's turn (since flee attempt uses up the turn)
             if battle_state['instance_type'] == 'party' and is_their_turn:
-                next_player = await self.advance_turn(instance_id)
+                next_player = await self.advance_turn(instance_id, player_id)
                 if next_player:
                     # Get channel from battle instance
-                    channel_id = await self.db.fetchval("""
-                        SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                    """, instance_id)
+                    channel_id = await self.get_battle_channel_id(instance_id)
                     channel = None
                     if channel_id:
-                        try:
-                            channel = await self.bot.fetch_channel(channel_id)
-                        except:
-                            pass
+                        channel = await self.bot.outbox.get_channel(channel_id)
                     if channel:
                         # Prompt next player
                         await self.prompt_next_player_turn(instance_id, next_player, channel)
@@ -2942,15 +2392,10 @@ class BattleSystem(Extension):
                     battle_state = await self.get_instance_state(instance_id)
                     if battle_state:
                         # Get channel from battle instance
-                        channel_id = await self.db.fetchval("""
-                            SELECT channel_id FROM battle_instances WHERE instance_id = $1
-                        """, instance_id)
+                        channel_id = await self.get_battle_channel_id(instance_id)
                         channel = None
                         if channel_id:
-                            try:
-                                channel = await self.bot.fetch_channel(channel_id)
-                            except:
-                                pass
+                            channel = await self.bot.outbox.get_channel(channel_id)
                         if channel:
                             # Prompt player for next turn
                             await self.prompt_next_player_turn(instance_id, player_id, channel)
@@ -2,6 +2,8 @@ from interactions import Extension, Button, ButtonStyle, ComponentContext, compo
 import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 
 class CauldronModule(Extension):
     def __init__(self, bot):
@@ -58,7 +60,7 @@ class CauldronModule(Extension):
                 VALUES ($1, $2, $3, $4)
             """, player_id, location_id, item_id, quantity)
 
-        logging.info(f"Added item_id {item_id} to the cauldron at location {location_id} for player_id {player_id}.")
+        logger.debug("Added item_id %s to the cauldron at location %s for player_id %s.", item_id, location_id, player_id)
 
 
 
@@ -66,11 +68,9 @@ class CauldronModule(Extension):
 
     async def get_item_name(self, item_id):
         """
-        Fetch the name of an item.
+        Fetch the name of an item from the game data cache.
         """
-        return await self.db.fetchval("""
-            SELECT name FROM items WHERE itemid = $1
-        """, item_id)
+        return self.bot.game_data.get_item_name(item_id)
 
     
 
@@ -215,7 +215,7 @@ class CauldronModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in view_cauldron_handler: {e}")
+            logger.error(f"Error in view_cauldron_handler: {e}")
             await ctx.send("An error occurred while viewing the cauldron. Please try again.", ephemeral=True)
 
 
@@ -263,7 +263,7 @@ class CauldronModule(Extension):
             await ctx.send("The cauldron has been cleared.", ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in clear_cauldron_handler: {e}")
+            logger.error(f"Error in clear_cauldron_handler: {e}")
             await ctx.send("An error occurred while clearing the cauldron. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^add_ingredient_\d+$"))
@@ -392,7 +392,7 @@ class CauldronModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in add_ingredient_handler: {e}")
+            logger.error(f"Error in add_ingredient_handler: {e}")
             await ctx.send(
                 "An error occurred while adding the ingredient. Please try again.",
                 ephemeral=True
@@ -471,14 +471,14 @@ class CauldronModule(Extension):
             """, player_id, selected_inventory_id)
 
             # Log the item details for debugging
-            logging.info(f"Player {player_id}, Location {location_id}, Selected Item: {item}")
+            logger.debug("Player %s, Location %s, Selected Item: %s", player_id, location_id, item)
 
             if not item:
                 return await ctx.send("You do not have this item in your inventory.", ephemeral=True)
 
             # Check if the player has enough of the selected item
             if item['effective_quantity'] <= 0:
-                logging.warning(
+                logger.warning(
                     f"Player {player_id} does not have enough of item ID {item['itemid']} (Effective Quantity: {item['effective_quantity']})."
                 )
                 return await ctx.send("You do not have enough of this item to add.", ephemeral=True)
@@ -496,8 +496,9 @@ class CauldronModule(Extension):
             """, player_id, location_id, recipe_id, ingredient_id, caught_fish_id, 1)
 
             # Log successful addition to the cauldron
-            logging.info(
-                f"Added item {item['itemid']} or fish {item['caught_fish_id']} to cauldron at location {location_id} for player {player_id}."
+            logger.info(
+                "Added item %s or fish %s to cauldron at location %s for player %s.",
+                item['itemid'], item['caught_fish_id'], location_id, player_id
             )
 
             # Decrease the quantity of the item in the player's inventory
@@ -520,7 +521,7 @@ class CauldronModule(Extension):
             await ctx.send(f"Added {item_name} to the cauldron.", ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in select_ingredient_handler: {e}")
+            logger.error(f"Error in select_ingredient_handler: {e}")
             await ctx.send("An error occurred while adding the ingredient. Please try again.", ephemeral=True)
 
 
@@ -609,7 +610,7 @@ class CauldronModule(Extension):
             await ctx.send(content="Select a recipe:", components=[dropdown], ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in select_recipe_handler: {e}")
+            logger.error(f"Error in select_recipe_handler: {e}")
             await ctx.send("An error occurred while selecting a recipe. selectrecipehandler", ephemeral=True)
             
     @component_callback(re.compile(r"^select_recipe_\d+_\d+$"))
@@ -674,7 +675,7 @@ class CauldronModule(Extension):
             await ctx.send(f"Selected recipe: {recipe_name}. You can now add ingredients.", ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in store_selected_recipe: {e}")
+            logger.error(f"Error in store_selected_recipe: {e}")
             await ctx.send("An error occurred while selecting the recipe. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^light_flame_\d+$"))
@@ -683,133 +684,77 @@ class CauldronModule(Extension):
         Handle the 'Light Flame' button to complete the cooking process.
         """
         try:
-            player_id = await self.get_player_id(ctx.author.id)
-            
-            # Fetch the current location of the player
-            player_location = await self.db.fetchval("""
-                SELECT current_location FROM player_data WHERE playerid = $1
-            """, player_id)
+            # Player and location in one query
+            snapshot = await self.bot.player_snapshots.load(ctx)
+            if not snapshot:
+                await ctx.send("Unable to retrieve player data. Please try again.", ephemeral=True)
+                return
+            player_id = snapshot.player_id
+            location_id = snapshot.current_location
             
             # Verify that the player's current location has the cauldron command available
-            has_cauldron_command = await self.db.fetchval("""
-                SELECT COUNT(*) FROM location_commands 
-                WHERE locationid = $1 AND custom_id = 'cauldron_view'
-            """, player_location)
+            has_cauldron_command = any(
+                command['custom_id'] == 'cauldron_view'
+                for command in self.bot.game_data.get_location_commands(location_id)
+            )
             
             if not has_cauldron_command:
-                player_location_name = await self.db.fetchval("""
-                    SELECT name FROM locations WHERE locationid = $1
-                """, player_location) or "your current location"
+                player_location_name = snapshot.location_name or "your current location"
                 await ctx.send(
                     f"You cannot use the cauldron at **{player_location_name}**! The cauldron is only available at specific locations.",
                     ephemeral=True
                 )
                 return
-            
-            location_id = player_location
-            
-            # Verify player is at the correct location
-            player_location = await self.db.fetchval("""
-                SELECT current_location FROM player_data WHERE playerid = $1
-            """, player_id)
-            
-            if player_location != location_id:
-                location_name = await self.db.fetchval("""
-                    SELECT name FROM locations WHERE locationid = $1
-                """, location_id) or "Unknown Location"
-                player_location_name = await self.db.fetchval("""
-                    SELECT name FROM locations WHERE locationid = $1
-                """, player_location) or "Unknown Location"
-                await ctx.send(
-                    f"You must be at **{location_name}** to use the cauldron! You are currently at **{player_location_name}**.",
-                    ephemeral=True
-                )
-                return
 
-            # Fetch the selected recipe_id
-            recipe_id = await self.db.fetchval("""
-                SELECT recipe_id
-                FROM campfire_cauldron
-                WHERE player_id = $1 AND location_id = $2
+            # Cauldron contents with fish names, aggregated, in one query
+            cauldron_contents = await self.db.fetch("""
+                SELECT cc.recipe_id, cc.ingredient_id, cf.fish_name, SUM(cc.quantity) AS total_quantity
+                FROM campfire_cauldron cc
+                LEFT JOIN caught_fish cf ON cc.caught_fish_id = cf.id
+                WHERE cc.player_id = $1 AND cc.location_id = $2
+                GROUP BY cc.recipe_id, cc.ingredient_id, cf.fish_name
             """, player_id, location_id)
 
+            # The selected recipe_id
+            recipe_id = next((row['recipe_id'] for row in cauldron_contents if row['recipe_id']), None)
+
             if not recipe_id:
                 await ctx.send("No recipe selected. Please select a recipe first.", ephemeral=True)
                 return
 
-            # Fetch the recipe details
-            recipe = await self.db.fetchrow("""
-                SELECT ingredient1_itemid, ingredient2_itemid, ingredient3_itemid,
-                       ingredient4_itemid, ingredient5_itemid, ingredient6_itemid,
-                       quantity1_required, quantity2_required, quantity3_required,
-                       quantity4_required, quantity5_required, quantity6_required,
-                       caught_fish_name1, caught_fish_name2, caught_fish_name3,
-                       caught_fish_1_quantity, caught_fish_2_quantity, caught_fish_3_quantity
-                FROM recipes
-                WHERE recipeid = $1
-            """, recipe_id)
+            # The recipe, normalized by the crafting engine
+            recipe = self.bot.game_data.crafting.get_dish(recipe_id)
 
             if not recipe:
                 await ctx.send("Invalid recipe. Please select a valid recipe.", ephemeral=True)
                 return
 
-            # Fetch and aggregate the current cauldron contents
-            cauldron_contents = await self.db.fetch("""
-                SELECT ingredient_id, caught_fish_id, SUM(quantity) AS total_quantity
-                FROM campfire_cauldron
-                WHERE player_id = $1 AND location_id = $2
-                GROUP BY ingredient_id, caught_fish_id
-            """, player_id, location_id)
-
-            # Validate required ingredients
-            for i in range(1, 7):
-                ingredient_id = recipe[f'ingredient{i}_itemid']
-                quantity_required = recipe[f'quantity{i}_required']
-
-                if ingredient_id and quantity_required:
-                    cauldron_item = next(
-                        (item for item in cauldron_contents if item['ingredient_id'] == ingredient_id),
-                        None
+            items, fish = {}, {}
+            for row in cauldron_contents:
+                if row['ingredient_id']:
+                    items[row['ingredient_id']] = items.get(row['ingredient_id'], 0) + row['total_quantity']
+                elif row['fish_name']:
+                    fish[row['fish_name']] = fish.get(row['fish_name'], 0) + row['total_quantity']
+
+            # Validate required ingredients and caught fish
+            missing = self.bot.game_data.crafting.shortfall(recipe, items, fish)
+            if missing:
+                kind, key, needed, have = missing
+                if kind == 'item':
+                    missing_item_name = await self.get_item_name(key)
+                    await ctx.send(
+                        f"Missing or insufficient quantity for ingredient: {missing_item_name}.",
+                        ephemeral=True
+                    )
+                else:
+                    await ctx.send(
+                        f"Missing or insufficient quantity for fish: {key}. You need {needed}, but only {have} is in the cauldron.",
+                        ephemeral=True
                     )
-                    if not cauldron_item or cauldron_item['total_quantity'] < quantity_required:
-                        missing_item_name = await self.get_item_name(ingredient_id)
-                        await ctx.send(
-                            f"Missing or insufficient quantity for ingredient: {missing_item_name}.",
-                            ephemeral=True
-                        )
-                        return
-
-            # Validate required caught fish
-            for i in range(1, 4):  # Loop through caught_fish_name1, caught_fish_name2, caught_fish_name3
-                fish_name = recipe.get(f'caught_fish_name{i}')
-                fish_quantity_required = recipe.get(f'caught_fish_{i}_quantity')
-
-                if fish_name and fish_quantity_required:
-                    # Match any fish or specific fish name
-                    matching_fish = [
-                        item for item in cauldron_contents if item['caught_fish_id']
-                        and (fish_name.lower() == "any" or await self.db.fetchval(
-                            "SELECT fish_name FROM caught_fish WHERE id = $1", item['caught_fish_id']
-                        ) == fish_name)
-                    ]
-
-                    # Sum the total quantity of matching fish
-                    total_matching_quantity = sum(item['total_quantity'] for item in matching_fish)
-
-                    # Check if the total quantity meets the requirement
-                    if total_matching_quantity < fish_quantity_required:
-                        await ctx.send(
-                            f"Missing or insufficient quantity for fish: {fish_name}. You need {fish_quantity_required}, but only {total_matching_quantity} is in the cauldron.",
-                            ephemeral=True
-                        )
-                        return
+                return
 
             # If validation succeeds, cook the dish
-            dish_itemid = await self.db.fetchval("""
-                SELECT dish_itemid
-                FROM recipes
-                WHERE recipeid = $1
-            """, recipe_id)
+            dish_itemid = recipe.output_id
 
             # Add the dish to the player's inventory
             await self.db.execute("""
@@ -829,7 +774,7 @@ class CauldronModule(Extension):
             await ctx.send(f"You successfully cooked {await self.get_item_name(dish_itemid)}!", ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in light_flame_handler: {e}")
+            logger.error(f"Error in light_flame_handler: {e}")
             await ctx.send("An error occurred while lighting the flame. Please try again.", ephemeral=True)
 
 
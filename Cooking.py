@@ -2,82 +2,43 @@ from interactions import SlashContext, Extension, component_callback, ComponentC
 import logging
 import asyncio
 import re
+from crafting import DISH
+
+logger = logging.getLogger(__name__)
 
 class CookingModule(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
+        self.crafting = bot.game_data.crafting
 
-    async def get_recipes_from_ingredients(self, player_id):
-        # Get all items in player's inventory
-        inventory_items = await self.db.fetch("""
-            SELECT itemid, quantity FROM inventory
-            WHERE playerid = $1
-        """, player_id)
-
-        # Get all caught fish for the player
-        caught_fish = await self.db.fetch("""
-            SELECT id FROM caught_fish
-            WHERE player_id = $1
-        """, player_id)
-
-        total_fish_count = len(caught_fish)
-
-        if not inventory_items and total_fish_count == 0:
-            return []
-
-        # Fetch all recipes
-        recipes = await self.db.fetch("""
-            SELECT * FROM recipes
-        """)
-
-        compatible_recipes = []
-
-        # Check if player's inventory has ingredients for each recipe
-        for recipe in recipes:
-            all_ingredients_available = True
-
-            # Check standard ingredients
-            for i in range(1, 7):
-                ingredient_id = recipe[f'ingredient{i}_itemid']
-                quantity_required = recipe[f'quantity{i}_required']
-                is_any = recipe.get(f'ingredient{i}_is_any', False)  # Assuming this field indicates if "any fish" is allowed
-
-                if ingredient_id is not None and quantity_required is not None:
-                    # Check in inventory for standard items
-                    player_quantity = next((item['quantity'] for item in inventory_items if item['itemid'] == ingredient_id), 0)
-                    if player_quantity < quantity_required:
-                        all_ingredients_available = False
-                        break
-
-                elif is_any and quantity_required is not None:
-                    # Check if the total number of caught fish is enough
-                    if total_fish_count < quantity_required:
-                        all_ingredients_available = False
-                        break
-
-            if all_ingredients_available:
-                compatible_recipes.append(recipe)
-
-        return compatible_recipes
-
-
+    def get_recipes_from_ingredients(self, snapshot):
+        """Recipe rows the player has the ingredients (and caught fish) for, with how many times."""
+        return [
+            (self.game_data.get_recipe(recipe.recipe_id), times)
+            for recipe, times in self.crafting.available(snapshot, DISH)
+        ]
 
     async def get_item_name(self, itemid):
-        # Fetch the name of an item based on itemid from items table
-        return await self.db.fetchval("""
-            SELECT name FROM items
-            WHERE itemid = $1
-        """, itemid)
+        # Look up the name of an item in the cached items table
+        return self.game_data.get_item_name(itemid)
 
     @component_callback(re.compile(r"^cook_\d+$"))
     async def cook_button_handler(self, ctx: ComponentContext):
-        logging.info("Cook button pressed.")
+        logger.debug("Cook button pressed.")
         await ctx.defer(ephemeral=True)
-        player_id = await self.db.get_or_create_player(ctx.author.id)
+
+        # Player id, ingredients and caught fish in one query
+        snapshot = await self.crafting.load_snapshot(self.db, DISH, discord_id=ctx.author.id)
+        if not snapshot:
+            await self.db.get_or_create_player(ctx.author.id)
+            await ctx.send("You do not have enough ingredients to cook any recipes.", ephemeral=True)
+            return
+        player_id = snapshot.player_id
 
         # Get compatible recipes based on player's inventory
-        compatible_recipes = await self.get_recipes_from_ingredients(player_id)
+        compatible_recipes = self.get_recipes_from_ingredients(snapshot)
 
         if not compatible_recipes:
             await ctx.send("You do not have enough ingredients to cook any recipes.", ephemeral=True)
@@ -85,10 +46,10 @@ class CookingModule(Extension):
 
         # Create options for the select menu with item names
         options = []
-        for recipe in compatible_recipes:
+        for recipe, times in compatible_recipes:
             dish_itemid = recipe['dish_itemid']
             dish_name = await self.get_item_name(dish_itemid)  # Get the name of the dish
-            options.append(StringSelectOption(label=dish_name, value=str(dish_itemid)))
+            options.append(StringSelectOption(label=f"{dish_name} (x{times})", value=str(dish_itemid)))
 
         # Create a string select menu to choose a recipe to cook
         select_menu = StringSelectMenu(
@@ -107,15 +68,13 @@ class CookingModule(Extension):
             player_id = await self.db.get_or_create_player(ctx.author.id)
 
             # Fetch recipe details
-            recipe = await self.db.fetchrow("""
-                SELECT * FROM recipes WHERE dish_itemid = $1
-            """, selected_recipe_id)
+            recipe = self.game_data.get_recipe_for_dish(selected_recipe_id)
 
             if not recipe:
                 await ctx.send("Recipe not found for this dish.", ephemeral=True)
                 return
 
-            logging.info(f"Recipe details: {recipe}")  # Debug log to check the recipe data
+            logger.debug("Recipe details: %s", recipe)  # Debug log to check the recipe data
 
             # Gather information about ingredients that need to be selected
             ingredients_to_select = []
@@ -149,7 +108,7 @@ class CookingModule(Extension):
                         ingredients_to_select.append(("any", caught_fish_items, 1))  # Quantity is always 1 for each caught fish
 
             # Debug log to check ingredients to select
-            logging.info(f"Ingredients to select for recipe {selected_recipe_id}: {ingredients_to_select}")
+            logger.debug("Ingredients to select for recipe %s: %s", selected_recipe_id, ingredients_to_select)
 
             # Always prompt for ingredient selection, even if there is only one option available
             if ingredients_to_select:
@@ -160,7 +119,7 @@ class CookingModule(Extension):
                 await ctx.send(result, ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in cook_select_menu_handler: {e}")
+            logger.error(f"Error in cook_select_menu_handler: {e}")
             await ctx.send("An error occurred while processing your request. Please try again.", ephemeral=True)
 
 
@@ -189,7 +148,7 @@ class CookingModule(Extension):
                 ]
                 ingredient_name = "Any Caught Fish"
                 custom_id = f"ingredient_fish_select_{dish_itemid}_any_{player_id}"
-                logging.info(f"Generated custom ID for 'any fish' selection: {custom_id}")
+                logger.debug("Generated custom ID for 'any fish' selection: %s", custom_id)
 
             else:
                 # Standard item selection
@@ -202,7 +161,7 @@ class CookingModule(Extension):
                 ]
                 ingredient_name = await self.get_item_name(ingredient)
                 custom_id = f"ingredient_select_{dish_itemid}_{ingredient}_{player_id}"
-                logging.info(f"Generated custom ID for standard selection: {custom_id}")
+                logger.debug("Generated custom ID for standard selection: %s", custom_id)
 
             # Create a string select menu for ingredient selection
             select_menu = StringSelectMenu(
@@ -210,7 +169,7 @@ class CookingModule(Extension):
                 placeholder=f"Select {quantity_required}x {ingredient_name} to use"
             )
             select_menu.options.extend(options)
-            logging.info(f"Sending selection menu with custom_id: {select_menu.custom_id}")
+            logger.debug("Sending selection menu with custom_id: %s", select_menu.custom_id)
 
             # Send the menu to the user and wait for selection
             await ctx.send(components=[select_menu], ephemeral=True)
@@ -222,7 +181,7 @@ class CookingModule(Extension):
     async def ingredient_select_handler(self, ctx: ComponentContext):
         try:
             parts = ctx.custom_id.split("_")
-            logging.info(f"Custom ID parts: {parts}")
+            logger.debug("Custom ID parts: %s", parts)
 
             if len(parts) == 6:
                 _, ingredient_type, _, dish_itemid, _, player_id = parts
@@ -233,27 +192,25 @@ class CookingModule(Extension):
                 player_id = int(player_id)
             else:
                 await ctx.send("Invalid ingredient selection.", ephemeral=True)
-                logging.error(f"Invalid custom ID format: {ctx.custom_id}")
+                logger.error(f"Invalid custom ID format: {ctx.custom_id}")
                 return
 
             selected_id = int(ctx.values[0])
-            logging.info(f"Selected ID: {selected_id}, Ingredient Type: {ingredient_type}, Player ID: {player_id}")
+            logger.debug("Selected ID: %s, Ingredient Type: %s, Player ID: %s", selected_id, ingredient_type, player_id)
 
             if ingredient_type == "fish":
-                logging.info(f"Attempting to delete caught fish with ID: {selected_id} for player ID: {player_id}")
+                logger.debug("Attempting to delete caught fish with ID: %s for player ID: %s", selected_id, player_id)
                 await self.delete_ingredient(caught_fish_id=selected_id, player_id=player_id)
             else:
-                logging.info(f"Ingredient type does not match 'fish_select'. Skipping deletion. Ingredient type: {ingredient_type}")
+                logger.debug("Ingredient type does not match 'fish_select'. Skipping deletion. Ingredient type: %s", ingredient_type)
 
-            recipe = await self.db.fetchrow("""
-                SELECT * FROM recipes WHERE dish_itemid = $1
-            """, int(dish_itemid))
+            recipe = self.game_data.get_recipe_for_dish(int(dish_itemid))
             if not recipe:
                 await ctx.send("Recipe not found for this dish.", ephemeral=True)
-                logging.error(f"Recipe with dish_itemid {dish_itemid} not found.")
+                logger.error(f"Recipe with dish_itemid {dish_itemid} not found.")
                 return
 
-            logging.info(f"Recipe details: {recipe}")
+            logger.debug("Recipe details: %s", recipe)
 
             ingredients_to_select = []
             for i in range(1, 7):
@@ -261,7 +218,7 @@ class CookingModule(Extension):
                 quantity_required = recipe[f'quantity{i}_required']
                 caught_fish_name = recipe.get(f'caught_fish_name{i}')
 
-                logging.info(f"Checking ingredient {i}: ingredient_id={ingredient_id}, quantity_required={quantity_required}, caught_fish_name={caught_fish_name}")
+                logger.debug("Checking ingredient %s: ingredient_id=%s, quantity_required=%s, caught_fish_name=%s", i, ingredient_id, quantity_required, caught_fish_name)
 
                 if ingredient_id and quantity_required:
                     inventory_items = await self.db.fetch("""
@@ -282,12 +239,12 @@ class CookingModule(Extension):
             if ingredients_to_select:
                 await self.prompt_for_ingredient_selection(ctx, player_id, dish_itemid, ingredients_to_select)
             else:
-                logging.info(f"All ingredients selected for recipe {dish_itemid}. Finalizing cooking...")
+                logger.debug("All ingredients selected for recipe %s. Finalizing cooking...", dish_itemid)
                 await self.finalize_cooking(player_id, recipe)
                 await ctx.send(f"You have successfully cooked {await self.get_item_name(recipe['dish_itemid'])}!", ephemeral=True)
 
         except Exception as e:
-            logging.error(f"Error in ingredient_select_handler: {e}")
+            logger.error(f"Error in ingredient_select_handler: {e}")
 
 
 
@@ -297,7 +254,7 @@ class CookingModule(Extension):
 
     async def delete_ingredient(self, caught_fish_id: int, player_id: int):
         try:
-            logging.info(f"Deleting inventory entry for caught_fish_id={caught_fish_id}, player_id={player_id}")
+            logger.debug("Deleting inventory entry for caught_fish_id=%s, player_id=%s", caught_fish_id, player_id)
 
             # Delete inventory entry
             inventory_entry = await self.db.fetchrow("""
@@ -312,16 +269,16 @@ class CookingModule(Extension):
                     DELETE FROM inventory
                     WHERE inventoryid = $1
                 """, inventory_id)
-                logging.info(f"Deleted inventory entry with inventoryid={inventory_id} for caught_fish_id={caught_fish_id}")
+                logger.debug("Deleted inventory entry with inventoryid=%s for caught_fish_id=%s", inventory_id, caught_fish_id)
 
             # Delete caught fish entry
             await self.db.execute("""
                 DELETE FROM caught_fish
                 WHERE id = $1
             """, caught_fish_id)
-            logging.info(f"Deleted caught fish with id={caught_fish_id}")
+            logger.debug("Deleted caught fish with id=%s", caught_fish_id)
         except Exception as e:
-            logging.error(f"Error deleting ingredient: {e}")
+            logger.error(f"Error deleting ingredient: {e}")
 
 
 
@@ -356,11 +313,11 @@ class CookingModule(Extension):
 
             # Log success and notify the user
             dish_name = await self.get_item_name(dish_itemid)
-            logging.info(f"Successfully cooked {dish_name} for player ID {player_id}.")
+            logger.info("Successfully cooked %s for player ID %s.", dish_name, player_id)
             return f"You have successfully cooked {dish_name}!"
 
         except Exception as e:
-            logging.error(f"Error in finalize_cooking: {e}")
+            logger.error(f"Error in finalize_cooking: {e}")
             return "An error occurred while finalizing the cooking process. Please try again."
 
 
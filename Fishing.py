@@ -6,10 +6,13 @@ import random
 import time
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 class FishingModule:
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db  # Access the database instance directly from the bot
+        self.drop_tables = bot.game_data.drop_tables
         
     async def calculate_catch_probability(self, fish_list):
         # Calculate probabilities based on catch_probability and drop_modifier for each fish
@@ -33,77 +36,16 @@ class FishingModule:
 
 
     async def fetch_fish_for_location(self, location, tool_type):
-        print(f"Fetching fish for location: '{location}', tool_type: '{tool_type}'")  # Debugging output
-
-        # Convert location to a string to match the expected input type
-        location = str(location)
-
-        query = """
-            SELECT * FROM fish
-            WHERE location = $1 AND rodtype = $2
-        """
-        fish_list = await self.db.fetch(query, location, tool_type)
-    
-        # Convert each fish record to a dictionary and set default drop_modifier if missing
-        fish_list = [{**dict(fish), "drop_modifier": fish.get("drop_modifier", 1.0)} for fish in fish_list]
-    
-        print(f"Fish list retrieved: {fish_list}")  # Check if any results are retrieved
-        return fish_list
+        # Fish rows come from the game data cache (location is stored as text)
+        return self.bot.game_data.get_fish_at(str(location), tool_type)
 
     def roll_for_rarity(self, player_xp):
-        # Define rarity distribution with possible multiplicative modifiers
-        base_rarity_distribution = {
-            "common": 51,
-            "uncommon": 25,
-            "rare": 15,
-            "very_rare": 8,
-            "legendary": 1  # Very low probability for legendary items
-        }
-
-        # Modify distribution based on player's fishing skill level
-        if player_xp > 300000:
-            base_rarity_distribution["rare"] += 3
-            base_rarity_distribution["uncommon"] += 2
-            base_rarity_distribution["common"] -= 2
-            base_rarity_distribution["very_rare"] += 1
-            base_rarity_distribution["legendary"] += 1  # Slight boost for high-level players
-
-        # Generate cumulative weights for rarity
-        total_weight = sum(base_rarity_distribution.values())
-        roll = random.uniform(0, total_weight)
-        
-        current_weight = 0
-        for rarity, weight in base_rarity_distribution.items():
-            current_weight += weight
-            if roll <= current_weight:
-                print(f"Rolled rarity: {rarity}")  # Debug output
-                return rarity
-
-    def roll_for_fish(self, fish_list, rarity):
-        # Filter fish by the rarity tier
-        filtered_fish = [fish for fish in fish_list if fish["qualitytier"].lower() == rarity]
-
-        if not filtered_fish:
-            return None
-
-        # Calculate relative weights with drop_modifier for fine-tuning
-        total_weight = sum(float(fish["catch_probability"]) * float(fish["drop_modifier"]) for fish in filtered_fish)
-    
-        # Normalize weights so that they sum to 1
-        normalized_weights = [
-            (fish, (float(fish["catch_probability"]) * float(fish["drop_modifier"])) / total_weight)
-            for fish in filtered_fish
-        ]
-
-        roll = random.uniform(0, 1)
-        current_weight = 0
+        # Rarity weights live in drop_tables (high level anglers get a small boost)
+        return self.drop_tables.roll_fish_rarity(player_xp)
 
-        # Roll based on normalized weights
-        for fish, weight in normalized_weights:
-            current_weight += weight
-            if roll <= current_weight:
-                print(f"Selected fish: {fish['name']} with rarity: {rarity}")  # Debug output
-                return fish
+    def roll_for_fish(self, location, tool_type, rarity):
+        # Weighted by catch_probability * drop_modifier within the rarity tier
+        return self.drop_tables.roll_fish(location, tool_type, rarity)
 
 
 
@@ -118,7 +60,7 @@ class FishingModule:
 
 
         rarity = self.roll_for_rarity(xp_level)
-        caught_fish = self.roll_for_fish(fish_list, rarity)
+        caught_fish = self.roll_for_fish(location, tool_type, rarity)
     
         if not caught_fish:
             return "No fish caught."
@@ -193,7 +135,7 @@ class FishingModule:
                 )
 
         except Exception as e:
-            logging.error(f"Error during fishing interaction: {e}", exc_info=True)
+            logger.error(f"Error during fishing interaction: {e}", exc_info=True)
             await ctx.send("An error occurred during the fishing interaction. Please try again later.")
 
     async def get_equipped_fishing_tool(self, player_id):
@@ -206,7 +148,7 @@ class FishingModule:
             WHERE inv.playerid = $1 AND inv.isequipped = TRUE AND it.fishingrod = TRUE
         """, player_id)
 
-        print(f"[Debug] Equipped tool data: {tool}")  # Debugging output
+        logger.debug("Equipped tool data for player %s: %s", player_id, tool)
     
         return tool['rodtype'] if tool else None
 
@@ -10,11 +10,15 @@ from interactions import (
 )
 import re
 from typing import Dict, List, Tuple
+from crafting import BAR, CraftingSnapshot
+
+logger = logging.getLogger(__name__)
 
 class ForgeModule(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
         # Define crafting requirements for each bar
         # Format: bar_itemid: [(ore_itemid, quantity), ...]
         self.forge_recipes = {
@@ -33,6 +37,8 @@ class ForgeModule(Extension):
             # Starmetal Bar (216) <- Starmetal Ore (233)
             216: [(233, 3)]
         }
+        self.crafting = self.game_data.crafting
+        self.crafting.register(BAR, self.forge_recipes)
 
     async def get_player_id(self, discord_id):
         """Fetch the player ID using the Discord ID."""
@@ -44,55 +50,41 @@ class ForgeModule(Extension):
         """Fetch the name of an item."""
         if item_id is None:
             return None
-        return await self.db.fetchval("""
-            SELECT name FROM items WHERE itemid = $1
-        """, item_id)
+        return self.game_data.get_item_name(item_id)
 
     async def get_item_id(self, item_name):
         """Fetch the item ID using the item name."""
-        return await self.db.fetchval("""
-            SELECT itemid FROM items WHERE name = $1
-        """, item_name)
+        item = self.game_data.get_item_by_name(item_name)
+        return item['itemid'] if item else None
 
     async def check_ingredients(self, player_id: int, recipe: List[Tuple[int, int]]) -> bool:
-        """Check if player has all required ingredients in sufficient quantities."""
-        for ore_id, required_qty in recipe:
-            if ore_id is None:  # Skip recipes with undefined ore IDs
-                return False
-            
-            quantity = await self.db.fetchval("""
-                SELECT quantity FROM inventory
-                WHERE playerid = $1 AND itemid = $2
-            """, player_id, ore_id)
-            
-            if not quantity or quantity < required_qty:
-                return False
-        return True
-
-    async def get_available_bars(self, player_id: int) -> List[Dict]:
-        """Get list of bars that can be crafted based on player's inventory."""
+        """Check if player has all required ingredients in sufficient quantities (one query)."""
+        if any(ore_id is None for ore_id, _ in recipe):  # Skip recipes with undefined ore IDs
+            return False
+        snapshot = await CraftingSnapshot.load(self.db, [ore_id for ore_id, _ in recipe], player_id=player_id)
+        return bool(snapshot) and all(snapshot.items.get(ore_id, 0) >= qty for ore_id, qty in recipe)
+
+    def get_available_bars(self, snapshot) -> List[Dict]:
+        """Get list of bars that can be crafted from the snapshot's ores."""
         available_bars = []
         
-        for bar_id, recipe in self.forge_recipes.items():
-            if bar_id is None:  # Skip recipes where we don't have the bar ID yet
-                continue
+        for recipe, times in self.crafting.available(snapshot, BAR):
+            bar_name = self.game_data.get_item_name(recipe.output_id)
+            if bar_name:
+                # Get ingredient names for display
+                ingredients = []
+                for ore_id, qty in recipe.ingredients:
+                    ore_name = self.game_data.get_item_name(ore_id)
+                    if ore_name:
+                        ingredients.append((ore_name, qty))
                 
-            if await self.check_ingredients(player_id, recipe):
-                bar_name = await self.get_item_name(bar_id)
-                if bar_name:
-                    # Get ingredient names for display
-                    ingredients = []
-                    for ore_id, qty in recipe:
-                        ore_name = await self.get_item_name(ore_id)
-                        if ore_name:
-                            ingredients.append((ore_name, qty))
-                    
-                    available_bars.append({
-                        'name': bar_name,
-                        'itemid': bar_id,
-                        'recipe': recipe,
-                        'ingredients': ingredients
-                    })
+                available_bars.append({
+                    'name': bar_name,
+                    'itemid': recipe.output_id,
+                    'recipe': list(recipe.ingredients),
+                    'ingredients': ingredients,
+                    'craftable': times
+                })
         
         return available_bars
 
@@ -126,12 +118,14 @@ class ForgeModule(Extension):
     async def smelt_ore_handler(self, ctx: ComponentContext):
         """Handle the bar forging process."""
         try:
-            player_id = await self.get_player_id(ctx.author.id)
-            if not player_id:
+            # Player id and ores in one query
+            snapshot = await self.crafting.load_snapshot(self.db, BAR, discord_id=ctx.author.id)
+            if not snapshot:
                 raise ValueError("Player ID not found for the current user.")
+            player_id = snapshot.player_id
 
             # Get available bars based on inventory
-            available_bars = await self.get_available_bars(player_id)
+            available_bars = self.get_available_bars(snapshot)
 
             if not available_bars:
                 await ctx.send("You don't have enough materials to forge any bars.", ephemeral=True)
@@ -145,7 +139,7 @@ class ForgeModule(Extension):
                     StringSelectOption(
                         label=f"{bar['name']}",
                         value=f"{bar['itemid']}",
-                        description=f"Requires: {recipe_text}"
+                        description=f"Requires: {recipe_text} | can make {bar['craftable']}"
                     )
                 )
 
@@ -163,7 +157,7 @@ class ForgeModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in smelt_ore_handler: {e}")
+            logger.error(f"Error in smelt_ore_handler: {e}")
             await ctx.send("An error occurred while accessing the forge. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^select_bar_\d+$"))
@@ -218,7 +212,7 @@ class ForgeModule(Extension):
             """)
 
         except Exception as e:
-            logging.error(f"Error in select_bar_handler: {e}")
+            logger.error(f"Error in select_bar_handler: {e}")
             await ctx.send("An error occurred while forging the bar. Please try again.", ephemeral=True)
 
 # Setup function to load this as an extension
@@ -1,125 +1,230 @@
 from interactions import Button, ButtonStyle, ComponentContext
+import logging
+from log_config import debug_checks
+
+logger = logging.getLogger(__name__)
 
 class Inventory:
     def __init__(self, db, player_id):
         self.db = db
         self.player_id = player_id
 
-    async def add_item(self, item_id, quantity=1):
-        max_slots = await self.db.get_inventory_capacity(self.player_id)
-        # Only count items in main inventory (not in bank, not equipped) - same logic as UI
-        current_item_count = await self.db.fetchval(
-            "SELECT COUNT(*) FROM inventory WHERE playerid = $1 AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)",
-            self.player_id
+    # Main inventory = not equipped and not in the bank; only these rows use up slots.
+    # Each requested (player, item) is classified, then stacked onto its inventory row,
+    # moved out of the bank onto the new quantity, or inserted, all in one statement.
+    # New rows are accepted in request order while the player's slots remain; a player
+    # without a player_data row has no slots. remaining_slots counts the rows actually written.
+    ADD_ITEMS_SQL = """
+        WITH req AS (
+            SELECT r.playerid, r.itemid, r.quantity, r.ord
+            FROM unnest($1::int[], $2::int[], $3::int[]) WITH ORDINALITY AS r(playerid, itemid, quantity, ord)
+        ),
+        slots AS (
+            SELECT players.playerid, COALESCE(pd.inventory_slots, 0) AS max_slots,
+                   (SELECT COUNT(*) FROM inventory
+                    WHERE playerid = players.playerid AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)) AS used
+            FROM (SELECT DISTINCT playerid FROM req) players
+            LEFT JOIN player_data pd ON pd.playerid = players.playerid
+        ),
+        classified AS (
+            SELECT req.*, main.inventoryid AS main_id, bank.inventoryid AS bank_id,
+                   CASE
+                       WHEN i.itemid IS NULL THEN 'invalid'
+                       WHEN COALESCE(i.max_stack, 1) <= 1 AND EXISTS (
+                           SELECT 1 FROM inventory
+                           WHERE playerid = req.playerid AND itemid = req.itemid AND (in_bank = FALSE OR in_bank IS NULL)
+                       ) THEN 'duplicate'
+                       WHEN main.inventoryid IS NOT NULL THEN 'stack'
+                       WHEN bank.inventoryid IS NOT NULL AND COALESCE(i.max_stack, 1) <= 1 THEN 'banked'
+                       WHEN bank.inventoryid IS NOT NULL THEN 'unbank'
+                       ELSE 'insert'
+                   END AS action
+            FROM req
+            LEFT JOIN items i ON i.itemid = req.itemid
+            LEFT JOIN LATERAL (
+                SELECT inventoryid FROM inventory
+                WHERE playerid = req.playerid AND itemid = req.itemid
+                  AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)
+                LIMIT 1
+            ) main ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT inventoryid FROM inventory
+                WHERE playerid = req.playerid AND itemid = req.itemid AND in_bank = TRUE
+                ORDER BY inventoryid
+                LIMIT 1
+            ) bank ON TRUE
+        ),
+        planned AS (
+            SELECT c.playerid, c.itemid, c.quantity, c.ord, c.main_id, c.bank_id, s.max_slots, s.used,
+                   CASE
+                       WHEN c.action IN ('invalid', 'duplicate', 'banked') THEN c.action
+                       WHEN s.used >= s.max_slots THEN 'full'
+                       WHEN c.action IN ('unbank', 'insert')
+                            AND s.used + SUM(CASE WHEN c.action IN ('unbank', 'insert') THEN 1 ELSE 0 END)
+                                OVER (PARTITION BY c.playerid ORDER BY c.ord) > s.max_slots THEN 'full'
+                       ELSE c.action
+                   END AS action
+            FROM classified c
+            JOIN slots s ON s.playerid = c.playerid
+        ),
+        stacked AS (
+            UPDATE inventory inv
+            SET quantity = inv.quantity + p.quantity
+            FROM planned p
+            WHERE p.action = 'stack' AND inv.inventoryid = p.main_id
+            RETURNING inv.playerid, inv.itemid
+        ),
+        unbanked AS (
+            UPDATE inventory inv
+            SET quantity = inv.quantity + p.quantity, in_bank = FALSE
+            FROM planned p
+            WHERE p.action = 'unbank' AND inv.inventoryid = p.bank_id AND inv.in_bank = TRUE
+            RETURNING inv.playerid, inv.itemid
+        ),
+        inserted AS (
+            INSERT INTO inventory (playerid, itemid, quantity, isequipped, slot, in_bank)
+            SELECT p.playerid, p.itemid, p.quantity, FALSE, NULL, FALSE
+            FROM planned p
+            WHERE p.action = 'insert'
+            ON CONFLICT (playerid, itemid) WHERE isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)
+            DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+            -- xmax = 0 only for a new row; a conflict stacked onto an existing one
+            RETURNING inventory.playerid, inventory.itemid, (inventory.xmax = 0) AS created
+        ),
+        written AS (
+            SELECT playerid, itemid FROM stacked
+            UNION ALL SELECT playerid, itemid FROM unbanked
+            UNION ALL SELECT playerid, itemid FROM inserted
+        ),
+        used_now AS (
+            -- Slots taken by this statement: rows moved out of the bank and newly inserted rows
+            SELECT playerid, COUNT(*) AS taken FROM (
+                SELECT playerid FROM unbanked
+                UNION ALL SELECT playerid FROM inserted WHERE created
+            ) t
+            GROUP BY playerid
         )
+        SELECT p.playerid, p.itemid, p.quantity, p.action,
+               (p.playerid, p.itemid) IN (SELECT playerid, itemid FROM written) AS written,
+               GREATEST(p.max_slots - p.used - COALESCE(u.taken, 0), 0) AS remaining_slots
+        FROM planned p
+        LEFT JOIN used_now u ON u.playerid = p.playerid
+        ORDER BY p.ord
+    """
+
+    ADD_ITEM_MESSAGES = {
+        'invalid': "Invalid item.",
+        'full': "Your inventory is full. You cannot add more items.",
+        'duplicate': "You already have this non-stackable item in your inventory.",
+        'banked': "This item is in your bank. Please transfer it to inventory first.",
+    }
+
+    @classmethod
+    async def add_items_for_players(cls, db, grants):
+        """
+        Add items to several players' inventories in one statement (loot settlement).
 
-        if current_item_count >= max_slots:
-            return "Your inventory is full. You cannot add more items."
-
-        item_info = await self.db.fetchrow("SELECT * FROM items WHERE itemid = $1", item_id)
-        if not item_info:
-            return "Invalid item."
-
-        is_stackable = item_info["max_stack"] > 1
+        Args:
+            grants: {player_id: iterable of (item_id, quantity)}; repeated item_ids are summed
 
-        # Check for existing item in main inventory (not bank)
-        existing_item = await self.db.fetchrow(
-            "SELECT * FROM inventory WHERE playerid = $1 AND itemid = $2 AND (in_bank = FALSE OR in_bank IS NULL)",
-            self.player_id, item_id
-        )
-
-        if existing_item:
-            if is_stackable:
-                # Update existing stackable item in inventory
-                new_quantity = existing_item["quantity"] + quantity
-                import logging
-                logging.info(f"Found existing item in inventory. Updating: inventoryid={existing_item['inventoryid']}, current_qty={existing_item['quantity']}, adding={quantity}, new_qty={new_quantity}")
-                
-                result = await self.db.execute(
-                    "UPDATE inventory SET quantity = $1 WHERE inventoryid = $2",
-                    new_quantity, existing_item["inventoryid"]
-                )
-                logging.info(f"UPDATE result: {result}")
-                
-                # Verify the update worked
-                verify = await self.db.fetchrow(
-                    "SELECT quantity FROM inventory WHERE inventoryid = $1",
-                    existing_item["inventoryid"]
-                )
-                logging.info(f"Verified quantity after update: {verify['quantity'] if verify else 'NOT FOUND'}")
-            else:
-                # Item exists but is not stackable
-                return "You already have this non-stackable item in your inventory."
-        else:
-            # Item doesn't exist in main inventory, check if it exists in bank
-            existing_in_bank = await self.db.fetchrow(
-                "SELECT * FROM inventory WHERE playerid = $1 AND itemid = $2 AND in_bank = TRUE",
-                self.player_id, item_id
+        Returns:
+            {player_id: result} with the same result shape as add_items.
+            Call inside db.transaction() to apply every grant or none.
+        """
+        requested = {}
+        for player_id, items in grants.items():
+            for item_id, quantity in items:
+                if quantity > 0:
+                    key = (int(player_id), int(item_id))
+                    requested[key] = requested.get(key, 0) + int(quantity)
+
+        results = {int(player_id): {'added': {}, 'failed': {}, 'remaining_slots': None} for player_id in grants}
+        # A stack that moved (e.g. someone banked it) between planning and writing is retried once
+        for _ in range(2):
+            if not requested:
+                break
+            keys = list(requested)
+            rows = await db.fetch(
+                cls.ADD_ITEMS_SQL, [k[0] for k in keys], [k[1] for k in keys], list(requested.values())
             )
-            
-            if existing_in_bank:
-                if is_stackable:
-                    # Move from bank to inventory and update quantity
-                    new_quantity = existing_in_bank["quantity"] + quantity
-                    import logging
-                    logging.info(f"Found item in bank. Moving to inventory and updating: {existing_in_bank['quantity']} + {quantity} = {new_quantity}")
-                    await self.db.execute(
-                        "UPDATE inventory SET quantity = $1, in_bank = FALSE WHERE inventoryid = $2",
-                        new_quantity, existing_in_bank["inventoryid"]
-                    )
+            retry = {}
+            for row in rows:
+                result = results[row['playerid']]
+                result['remaining_slots'] = row['remaining_slots']
+                if row['written']:
+                    result['added'][row['itemid']] = row['quantity']
+                elif row['action'] in ('stack', 'unbank', 'insert'):
+                    retry[(row['playerid'], row['itemid'])] = row['quantity']
                 else:
-                    return "This item is in your bank. Please transfer it to inventory first."
-            else:
-                # Item doesn't exist anywhere, insert new entry
-                if current_item_count >= max_slots:
-                    return "Your inventory is full. You cannot add more items."
-                
-                import logging
-                logging.info(f"Inserting new item: item_id={item_id}, quantity={quantity}")
-                await self.db.execute(
-                    "INSERT INTO inventory (playerid, itemid, quantity, isequipped, slot, in_bank) VALUES ($1, $2, $3, false, NULL, false)",
-                    self.player_id, item_id, quantity
-                )
+                    result['failed'][row['itemid']] = row['action']
+            requested = retry
+        for player_id, item_id in requested:
+            results[player_id]['failed'][item_id] = 'full'
+        return results
 
-        # Recalculate remaining slots after addition (only count main inventory, not bank, not equipped)
-        new_item_count = await self.db.fetchval(
-            "SELECT COUNT(*) FROM inventory WHERE playerid = $1 AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)",
-            self.player_id
-        )
-        remaining_slots = max_slots - new_item_count
-        return f"Item added to inventory. Remaining slots: {remaining_slots}."
+    async def add_items(self, items):
+        """
+        Add several items in one round trip (crafting output, rewards).
 
-    async def remove_item(self, item_id, quantity=1):
-        existing_item = await self.db.fetchrow(
-            "SELECT * FROM inventory WHERE playerid = $1 AND itemid = $2",
-            self.player_id, item_id
-        )
+        Args:
+            items: iterable of (item_id, quantity); repeated item_ids are summed
 
-        if not existing_item:
-            return "Item not found in inventory."
+        Returns:
+            {'added': {item_id: quantity}, 'failed': {item_id: reason}, 'remaining_slots': int or None}
+            where reason is 'invalid', 'full', 'duplicate' (non-stackable already held)
+            or 'banked' (non-stackable sitting in the bank).
+        """
+        result = (await self.add_items_for_players(self.db, {self.player_id: items}))[int(self.player_id)]
+
+        if debug_checks() and result['added']:
+            # Debug mode only: read back what the player now holds
+            held = await self.db.fetch("""
+                SELECT itemid, SUM(quantity) AS quantity FROM inventory
+                WHERE playerid = $1 AND itemid = ANY($2::int[]) AND isequipped = FALSE
+                  AND (in_bank = FALSE OR in_bank IS NULL)
+                GROUP BY itemid
+            """, self.player_id, list(result['added']))
+            logger.debug("add_items for player %s: %s; now holding %s", self.player_id, result,
+                         {row['itemid']: row['quantity'] for row in held})
+        return result
 
-        if existing_item["quantity"] > quantity:
-            # Reduce quantity and let the trigger handle further deletions if needed
-            new_quantity = existing_item["quantity"] - quantity
-            await self.db.execute(
-                "UPDATE inventory SET quantity = $1 WHERE inventoryid = $2",
-                new_quantity, existing_item["inventoryid"]
-            )
-        else:
-            # Set quantity to 0, triggering automatic deletion
-            await self.db.execute(
-                "UPDATE inventory SET quantity = 0 WHERE inventoryid = $1",
-                existing_item["inventoryid"]
-            )
+    async def add_item(self, item_id, quantity=1):
+        result = await self.add_items([(item_id, quantity)])
+        reason = result['failed'].get(item_id)
+        if reason:
+            return self.ADD_ITEM_MESSAGES.get(reason, "Your inventory is full. You cannot add more items.")
+        return f"Item added to inventory. Remaining slots: {result['remaining_slots']}."
 
-        max_slots = await self.db.get_inventory_capacity(self.player_id)
-        current_item_count = await self.db.fetchval(
-            "SELECT COUNT(*) FROM inventory WHERE playerid = $1",
-            self.player_id
-        )
-        remaining_slots = max_slots - current_item_count
+    async def remove_item(self, item_id, quantity=1):
+        # Unequipped main-inventory stacks go first; a quantity of 0 is deleted by trigger_drop_zero_quantity
+        row = await self.db.fetchrow("""
+            WITH target AS (
+                SELECT inventoryid FROM inventory
+                WHERE playerid = $1 AND itemid = $2
+                ORDER BY isequipped, in_bank IS TRUE, inventoryid
+                LIMIT 1
+                FOR UPDATE
+            ),
+            updated AS (
+                UPDATE inventory inv
+                SET quantity = GREATEST(inv.quantity - $3, 0)
+                FROM target
+                WHERE inv.inventoryid = target.inventoryid
+                RETURNING inv.quantity, inv.isequipped = FALSE AND (inv.in_bank = FALSE OR inv.in_bank IS NULL) AS in_main
+            )
+            SELECT (SELECT COUNT(*) FROM updated) AS removed,
+                   pd.inventory_slots
+                   - (SELECT COUNT(*) FROM inventory
+                      WHERE playerid = $1 AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL))
+                   + (SELECT COUNT(*) FROM updated WHERE quantity = 0 AND in_main) AS remaining_slots
+            FROM player_data pd
+            WHERE pd.playerid = $1
+        """, self.player_id, item_id, quantity)
+
+        if not row or not row['removed']:
+            return "Item not found in inventory."
 
-        return f"Item removed from inventory. Remaining slots: {remaining_slots}."
+        return f"Item removed from inventory. Remaining slots: {row['remaining_slots']}."
 
     
     async def remove_item_by_inventory_id(self, inventory_id):
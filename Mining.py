@@ -2,15 +2,21 @@ import random
 import asyncio
 from interactions import SlashContext, Extension, Button, ButtonStyle, ComponentContext, component_callback
 import re
+import logging
 from Inventory import Inventory
+from player_actions import player_action
+
+logger = logging.getLogger(__name__)
 
 
 class MiningModule(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
 
     @component_callback(re.compile(r"^mine_\d+$"))
+    @player_action
     async def mine_button_handler(self, ctx: ComponentContext):
         # Extract the original user's ID from the custom ID
         original_user_id = int(ctx.custom_id.split("_")[1])
@@ -29,14 +35,8 @@ class MiningModule(Extension):
         await self.start_mining_action(ctx, player_id, current_location_id)
 
     async def start_mining_action(self, ctx: ComponentContext, player_id: int, location_id: int):
-        # Fetch an ore deposit based on the current location
-        ore = await self.db.fetchrow("""
-            SELECT o.*, mt.tier_level AS ore_tier
-            FROM ores o
-            JOIN material_tiers mt ON o.oretype = mt.material_name
-            WHERE o.locationid = $1
-            ORDER BY RANDOM() LIMIT 1
-        """, location_id)
+        # Pick an ore deposit at the current location, weighted by ores.probability (only ores with a known tier can be mined)
+        ore = self.game_data.drop_tables.roll_ore(location_id)
 
         if not ore:
             await ctx.send("No ore deposits to mine here.", ephemeral=True)
@@ -54,20 +54,14 @@ class MiningModule(Extension):
             await ctx.send("You need to equip a pickaxe to mine ores.", ephemeral=True)
             return
 
-        # Fetch the pickaxe tier level from the material_tiers table using the pickaxetype
-        pickaxe_type = equipped_pickaxe['pickaxetype']
-        pickaxe_tier_info = await self.db.fetchrow("""
-            SELECT tier_level
-            FROM material_tiers
-            WHERE material_name = $1
-        """, pickaxe_type)
+        # Look up the pickaxe tier level from material_tiers using the pickaxetype
+        pickaxe_tier = self.game_data.get_tier(equipped_pickaxe['pickaxetype'])
 
-        if not pickaxe_tier_info:
+        if pickaxe_tier is None:
             await ctx.send("Error: Unable to determine the tier level of your pickaxe.", ephemeral=True)
             return
 
-        pickaxe_tier = pickaxe_tier_info['tier_level']
-        ore_tier = ore['ore_tier']
+        ore_tier = self.game_data.get_tier(ore['oretype'])
 
         # Compare the pickaxe's tier level with the ore's tier level, allowing one tier lower to mine
         if pickaxe_tier < (ore_tier - 1):
@@ -78,10 +72,8 @@ class MiningModule(Extension):
         item_id = ore['itemid']
         number_of_ores = ore['number_of_ores']
 
-        # Fetch item details from items table to get the name
-        item_details = await self.db.fetchrow("""
-            SELECT name FROM items WHERE itemid = $1
-        """, item_id)
+        # Get the item name from the cached items table
+        item_details = self.game_data.get_item(item_id)
 
         if not item_details:
             await ctx.send("Error: Unable to retrieve item details.", ephemeral=True)
@@ -92,8 +84,7 @@ class MiningModule(Extension):
         result_message = await inventory.add_item(item_id, number_of_ores)
         
         # Log the result for debugging
-        import logging
-        logging.info(f"Mining: Added {number_of_ores}x item_id {item_id} for player {player_id}. Result: {result_message}")
+        logger.info("Mining: Added %sx item_id %s for player %s. Result: %s", number_of_ores, item_id, player_id, result_message)
 
         # Update player experience points (assuming there's a column for mining XP)
         xp_gained = ore['xp_gained']
@@ -275,10 +275,11 @@ class PartySystem(Extension):
             color=0x00FF00
         )
 
+        identities = await self.bot.identities.resolve_many(m['player_id'] for m in party_info)
         for member in party_info:
             # Get Discord user to get their username
             try:
-                discord_user = await self.bot.fetch_user(int(member['discord_id']))
+                discord_user = identities[member['player_id']].user
                 # Try to get display name from guild if available, otherwise use username
                 if ctx.guild:
                     guild_member = ctx.guild.get_member(int(member['discord_id']))
@@ -546,18 +547,10 @@ class PartySystem(Extension):
         """, invite_id)
 
         # Notify party leader
-        inviter_discord_id = await self.db.fetchval("""
-            SELECT discord_id FROM players
-            WHERE playerid = $1
-        """, invite['inviter_id'])
-
-        if inviter_discord_id:
-            try:
-                inviter_user = await self.bot.fetch_user(inviter_discord_id)
-                if inviter_user:
-                    await inviter_user.send(f"🎉 {ctx.author.display_name} has accepted your party invite and joined **{party_name}**!")
-            except:
-                pass  # Silently fail if can't DM leader
+        self.bot.outbox.dm(
+            invite['inviter_id'],
+            f"🎉 {ctx.author.display_name} has accepted your party invite and joined **{party_name}**!"
+        )
 
         await ctx.send(f"✅ You have joined **{party_name}**!", ephemeral=True)
 
@@ -1,17 +1,108 @@
 import asyncpg
 import asyncio
+import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from interaction_tracing import add_db_time
+from query_stats import QueryStats
+
+# Connection bound by Database.connection()/transaction() for the current task
+_current_connection = ContextVar('current_connection', default=None)
+
+
+class PoolMetrics:
+    """Acquire latency and wait-queue counters for the connection pool."""
+
+    # Upper bounds (ms) of the acquire latency histogram buckets; the last bucket is open
+    BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+    def __init__(self):
+        self.acquires = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record(self, wait):
+        self.acquires += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        wait_ms = wait * 1000
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if wait_ms <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def snapshot(self, pool=None):
+        data = {
+            'acquires': self.acquires,
+            'timeouts': self.timeouts,
+            'waiting': self.waiting,
+            'peak_waiting': self.peak_waiting,
+            'avg_wait_ms': (self.total_wait / self.acquires * 1000) if self.acquires else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'wait_histogram_ms': dict(zip([f"<={b}" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}"], self.histogram)),
+        }
+        if pool is not None:
+            data.update(size=pool.get_size(), idle=pool.get_idle_size(),
+                        min_size=pool.get_min_size(), max_size=pool.get_max_size())
+        return data
+
 
 class Database:
-    def __init__(self, dsn):
+    """asyncpg pool wrapper.
+
+    Pool sizing and per-connection settings come from the constructor or the
+    environment (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_STATEMENT_CACHE_SIZE,
+    DB_STATEMENT_TIMEOUT_MS, DB_ACQUIRE_TIMEOUT, DB_JSON_CODECS). Queries run through
+    fetch/fetchrow/fetchval/execute are recorded in self.query_stats; DB_SLOW_QUERY_MS
+    sets the slow query log threshold.
+    """
+
+    def __init__(self, dsn, min_size=None, max_size=None, statement_cache_size=None,
+                 statement_timeout_ms=None, acquire_timeout=None, json_codecs=None):
         self.dsn = dsn
         self.pool = None
-        
-    
+        self.min_size = min_size if min_size is not None else int(os.getenv('DB_POOL_MIN_SIZE', 5))
+        self.max_size = max_size if max_size is not None else int(os.getenv('DB_POOL_MAX_SIZE', 20))
+        self.statement_cache_size = (statement_cache_size if statement_cache_size is not None
+                                     else int(os.getenv('DB_STATEMENT_CACHE_SIZE', 1024)))
+        self.statement_timeout_ms = (statement_timeout_ms if statement_timeout_ms is not None
+                                     else int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000)))
+        self.acquire_timeout = acquire_timeout if acquire_timeout is not None else float(os.getenv('DB_ACQUIRE_TIMEOUT', 10))
+        # Off by default: several modules still json.loads() json columns themselves
+        self.json_codecs = json_codecs if json_codecs is not None else os.getenv('DB_JSON_CODECS', '') == '1'
+        self.metrics = PoolMetrics()
+        self.query_stats = QueryStats(slow_ms=float(os.getenv('DB_SLOW_QUERY_MS', 200)))
+
+    def _pool_kwargs(self):
+        return dict(
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=self.statement_cache_size,
+            max_queries=50000,
+            max_inactive_connection_lifetime=300,
+            server_settings={'statement_timeout': str(self.statement_timeout_ms),
+                             'application_name': 'bemoria-bot'},
+            init=self._init_connection,
+        )
+
+    async def _init_connection(self, conn):
+        if self.json_codecs:
+            for type_name in ('json', 'jsonb'):
+                await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
 
     async def connect(self):
-        self.pool = await asyncpg.create_pool(dsn=self.dsn)
-        logging.info("Database connection pool created successfully")
+        self.pool = await asyncpg.create_pool(dsn=self.dsn, **self._pool_kwargs())
+        logging.info(f"Database connection pool created successfully (min {self.min_size}, max {self.max_size})")
         
     async def close_pool(self):
         if self.pool:
@@ -20,13 +111,66 @@ class Database:
 
     async def create_pool(self):
         if not self.pool:  # Only create the pool if it doesn't exist
-            self.pool = await asyncpg.create_pool(self.dsn, max_size=99)  # Limit max connections
+            await self.connect()
+
+    #CONNECTION HANDLING
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        """Borrow a pool connection, recording how long the wait took."""
+        if self.pool is None:
+            await self.create_pool()
+        metrics = self.metrics
+        metrics.waiting += 1
+        metrics.peak_waiting = max(metrics.peak_waiting, metrics.waiting)
+        start = time.perf_counter()
+        try:
+            conn = await self.pool.acquire(timeout=timeout or self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            logging.warning(f"Timed out waiting for a database connection: {metrics.snapshot(self.pool)}")
+            raise
+        finally:
+            metrics.waiting -= 1
+        metrics.record(time.perf_counter() - start)
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """Use one connection for every Database helper called inside the block.
+
+        Nested connection()/transaction() blocks reuse it. Do not run queries from
+        concurrent tasks (asyncio.gather) inside the block: a connection runs one query at a time.
+        """
+        conn = _current_connection.get()
+        if conn is not None:
+            yield conn
+            return
+        async with self.acquire() as conn:
+            token = _current_connection.set(conn)
+            try:
+                yield conn
+            finally:
+                _current_connection.reset(token)
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        """connection() inside a transaction; helpers called in the block join it (nested blocks use savepoints)."""
+        async with self.connection() as conn:
+            async with conn.transaction(**kwargs):
+                yield conn
+
+    def pool_stats(self):
+        return self.metrics.snapshot(self.pool)
 
     async def fetch_races(self):
         if self.pool is None:
             await self.create_pool()  # Make sure the pool is created before using it
 
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             races = await conn.fetch('SELECT raceid, name FROM races ORDER BY raceid')
             return races
 
@@ -39,13 +183,13 @@ class Database:
             raceid)
             
     async def fetch_background_titles(self):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             titles = await conn.fetch('SELECT titleid, titlename FROM titles WHERE background = true ORDER BY titleid')
             return titles
 
     async def save_player_choice(self, discord_id, raceid):
         # Acquire a connection from the pool
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             # Ensure the player exists and get the playerid
             player_id = await conn.fetchval("""
                 INSERT INTO players (discord_id)
@@ -73,7 +217,7 @@ class Database:
             if self.pool is None:
                 await self.create_pool()  # Make sure the pool is created before using it
                 
-            async with self.pool.acquire() as conn:
+            async with self.connection() as conn:
                 # Try to get the player by Discord ID
                 player = await conn.fetchrow(
                     "SELECT playerid FROM players WHERE discord_id = $1",
@@ -91,7 +235,7 @@ class Database:
                 
     async def save_player_title_choice(self, discord_id, titleid):
         # Acquire a connection from the pool
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             # Fetch the player's id from the players table using discord_id
             player_id = await conn.fetchval("""
                 SELECT playerid FROM players WHERE discord_id = $1
@@ -107,7 +251,7 @@ class Database:
 
     # Part of the Database class
     async def set_initial_location(self, player_id, location_id=2):  # Default location_id for Tradewind City
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             # Update the player_data table instead of players
             await conn.execute("""
                 UPDATE player_data
@@ -116,7 +260,7 @@ class Database:
             """, player_id, location_id)
             
     async def update_player_location(self, player_id, new_location_id):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             await conn.execute("""
                 UPDATE player_data
                 SET current_location = $2
@@ -126,7 +270,7 @@ class Database:
 
 
     async def fetch_player_details(self, player_id):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             row = await conn.fetchrow("""
                 SELECT pd.health, pd.mana, pd.stamina, l.name, pd.current_location
                 FROM player_data pd
@@ -137,7 +281,7 @@ class Database:
 
         
     async def fetch_accessible_locations(self, current_location_id, player_id=None):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             # Show all locations that have paths from the current location
             # Requirements will be checked when the player actually tries to travel
             # This allows players to see all available destinations
@@ -162,14 +306,44 @@ class Database:
         
 
     async def fetch_view_stats(self, player_id):
-        async with self.pool.acquire() as conn:
+        """Player stat totals from player_stats_cache (kept up to date by triggers on equipment/race changes)."""
+        async with self.connection() as conn:
             row = await conn.fetchrow("""
-                SELECT * FROM player_stats_view WHERE playerid = $1;
+                SELECT * FROM player_stats_cache WHERE playerid = $1;
             """, player_id)
+            if row is None:
+                # Not cached yet (new player) - compute it from player_stats_view once
+                await conn.execute("SELECT refresh_player_stats_cache($1);", player_id)
+                row = await conn.fetchrow("""
+                    SELECT * FROM player_stats_cache WHERE playerid = $1;
+                """, player_id)
             return dict(row) if row else None
+
+    async def fetch_view_stats_many(self, player_ids):
+        """player_stats_cache rows for several players in one query, keyed by playerid."""
+        player_ids = list(set(player_ids))
+        async with self.connection() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM player_stats_cache WHERE playerid = ANY($1::int[]);
+            """, player_ids)
+            stats = {row['playerid']: dict(row) for row in rows}
+            missing = [pid for pid in player_ids if pid not in stats]
+            if missing:
+                for pid in missing:
+                    await conn.execute("SELECT refresh_player_stats_cache($1);", pid)
+                rows = await conn.fetch("""
+                    SELECT * FROM player_stats_cache WHERE playerid = ANY($1::int[]);
+                """, missing)
+                stats.update({row['playerid']: dict(row) for row in rows})
+            return stats
+
+    async def refresh_player_stats(self, player_id):
+        """Recompute a player's row in player_stats_cache."""
+        async with self.connection() as conn:
+            await conn.execute("SELECT refresh_player_stats_cache($1);", player_id)
         
     async def fetch_view_skills(self, player_id):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             row = await conn.fetchrow("""
                 SELECT * FROM player_skill_levels WHERE playerid = $1;
             """, player_id)
@@ -177,7 +351,7 @@ class Database:
     
         #this one below can be simplified since i changed default values in the database table but its not broke so not fixing it yet
     async def add_player_skills_xp(self, player_id):
-        async with self.pool.acquire() as conn:
+        async with self.connection() as conn:
             await conn.execute("""
                 INSERT INTO player_skills_xp (
                     playerid, illusion_magic_xp, dark_magic_xp, light_magic_xp, 
@@ -202,26 +376,46 @@ class Database:
 
             #UTILITY FUNCTIONS
             
+    async def _run(self, method, query, args, count_rows):
+        """Run conn.<method>(query, *args), recording it in query_stats and the current interaction trace."""
+        start = time.perf_counter()
+        try:
+            async with self.connection() as conn:
+                result = await getattr(conn, method)(query, *args)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            add_db_time(elapsed)
+            self.query_stats.record(query, args, elapsed, error=e)
+            raise
+        elapsed = time.perf_counter() - start
+        add_db_time(elapsed)
+        self.query_stats.record(query, args, elapsed, count_rows(result))
+        return result
+
+    @staticmethod
+    def _status_rows(status):
+        # "UPDATE 3", "INSERT 0 1", "DELETE 0"
+        try:
+            return int(status.rsplit(' ', 1)[-1])
+        except (AttributeError, ValueError):
+            return 0
+
     async def fetch(self, query, *args):
         """Fetch multiple rows from the database."""
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(query, *args)
+        return await self._run('fetch', query, args, len)
 
     async def fetchrow(self, query, *args):
         """Fetch a single row from the database."""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+        return await self._run('fetchrow', query, args, lambda row: 0 if row is None else 1)
 
     async def execute(self, query, *args):
         """Execute a query (for inserts, updates, and deletes)."""
-        async with self.pool.acquire() as conn:
-            await conn.execute(query, *args)
+        return await self._run('execute', query, args, self._status_rows)
             
     
     
     async def fetchval(self, query, *args):
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(query, *args)
+        return await self._run('fetchval', query, args, lambda value: 0 if value is None else 1)
 
     async def get_discord_id(self, player_id):
         """Get the Discord ID for a given player ID."""
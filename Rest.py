@@ -17,46 +17,34 @@ class RestModule(Extension):
         try:
             logging.info(f"Rest button clicked by {ctx.author.id} with custom_id: {ctx.custom_id}")
 
-            # Get player ID
-            player_id = await self.db.get_or_create_player(ctx.author.id)
-            
-            # Fetch the current location of the player
-            player_location = await self.db.fetchval("""
-                SELECT current_location FROM player_data WHERE playerid = $1
-            """, player_id)
+            # Player, location and max stats in one query
+            snapshot = await self.bot.player_snapshots.load(ctx)
+            if not snapshot or snapshot.max_health is None:
+                await ctx.send("Unable to retrieve player data. Please try again.", ephemeral=True)
+                return
+            player_id = snapshot.player_id
             
             # Verify that the player's current location has the rest command available
             # Check by custom_id since that's what the button uses
-            has_rest_command = await self.db.fetchval("""
-                SELECT COUNT(*) FROM location_commands 
-                WHERE locationid = $1 AND custom_id = 'rest'
-            """, player_location)
+            has_rest_command = any(
+                command['custom_id'] == 'rest'
+                for command in self.bot.game_data.get_location_commands(snapshot.current_location)
+            )
             
             if not has_rest_command:
-                player_location_name = await self.db.fetchval("""
-                    SELECT name FROM locations WHERE locationid = $1
-                """, player_location) or "your current location"
+                player_location_name = snapshot.location_name or "your current location"
                 await ctx.send(
                     f"You cannot rest at **{player_location_name}**! Rest is only available at specific locations.",
                     ephemeral=True
                 )
                 return
 
-            # Fetch and update player's stats
-            max_stats = await self.db.fetchrow("""
-                SELECT max_health, max_mana, max_stamina
-                FROM player_data
-                WHERE playerid = $1
-            """, player_id)
-            if not max_stats:
-                await ctx.send("Unable to retrieve player data. Please try again.", ephemeral=True)
-                return
-
+            # Restore player's stats
             await self.db.execute("""
                 UPDATE player_data
                 SET health = $1, mana = $2, stamina = $3
                 WHERE playerid = $4
-            """, max_stats['max_health'], max_stats['max_mana'], max_stats['max_stamina'], player_id)
+            """, snapshot.max_health, snapshot.max_mana, snapshot.max_stamina, player_id)
             logging.info(f"Player {player_id}'s stats updated successfully.")
 
             await ctx.send(
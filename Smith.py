@@ -10,11 +10,16 @@ from interactions import (
 )
 import re
 from typing import Dict, List, Tuple
+from dice import average
+from crafting import ARMOR, TOOL, WEAPON
+
+logger = logging.getLogger(__name__)
 
 class SmithModule(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
         # Define crafting requirements for armor
         # Format: armor_itemid: (bar_itemid, quantity)
         self.smith_recipes = {
@@ -47,7 +52,6 @@ class SmithModule(Extension):
             # Tool name: (bar_itemid, bar_amount)
             'Iron Hatchet': {'bar_id': 230, 'bar_amount': 3},  # 3 Iron Bars
         }
-        self.tool_recipes = {}  # Will be populated with item IDs
         
         # Define crafting requirements for weapons
         # Format: weapon_itemid: {'bar_id': bar_itemid, 'bar_amount': quantity, 'smithing_level': level}
@@ -94,6 +98,12 @@ class SmithModule(Extension):
             102: {'bar_id': 232, 'bar_amount': 2, 'smithing_level': 28}, # Necrosteel Spear
         }
 
+        # Availability is computed by the shared crafting engine from one inventory snapshot
+        self.crafting = self.game_data.crafting
+        self.crafting.register(ARMOR, self.smith_recipes)
+        self.crafting.register(TOOL, self.tool_recipe_definitions, by_name=True)
+        self.crafting.register(WEAPON, self.weapon_recipes)
+
     async def get_player_id(self, discord_id):
         """Fetch the player ID using the Discord ID."""
         return await self.db.fetchval("""
@@ -104,9 +114,7 @@ class SmithModule(Extension):
         """Fetch the name of an item."""
         if item_id is None:
             return None
-        return await self.db.fetchval("""
-            SELECT name FROM items WHERE itemid = $1
-        """, item_id)
+        return self.game_data.get_item_name(item_id)
 
     async def check_materials(self, player_id: int, bar_id: int, required_qty: int) -> bool:
         """Check if player has enough metal bars."""
@@ -116,12 +124,11 @@ class SmithModule(Extension):
                 WHERE playerid = $1 AND itemid = $2
             """, player_id, bar_id)
             
-            logging.info(f"Checking materials for player {player_id}: itemid {bar_id}, required {required_qty}, has {quantity}")
             has_enough = quantity is not None and quantity >= required_qty
-            logging.info(f"Has enough materials: {has_enough}")
+            logger.debug("Materials for player %s: itemid %s, required %s, has %s", player_id, bar_id, required_qty, quantity)
             return has_enough
         except Exception as e:
-            logging.error(f"Error in check_materials: {e}")
+            logger.error(f"Error in check_materials: {e}")
             return False
 
     async def get_smithing_level(self, player_id: int) -> int:
@@ -132,173 +139,76 @@ class SmithModule(Extension):
             """, player_id)
             return level if level is not None else 1
         except Exception as e:
-            logging.error(f"Error in get_smithing_level: {e}")
+            logger.error(f"Error in get_smithing_level: {e}")
             return 1
 
-    async def get_available_armor(self, player_id: int) -> List[Dict]:
-        """Get list of armor that can be crafted based on player's inventory."""
-        available_armor = []
-        
-        # First, let's check what bars the player has
-        bars = await self.db.fetch("""
-            SELECT i.itemid, i.quantity, items.name, items.description, items.type, items.rarity
-            FROM inventory i 
-            JOIN items ON i.itemid = items.itemid 
-            WHERE i.playerid = $1 
-            AND i.in_bank = FALSE
-            AND items.type = 'bar'
-            AND i.quantity > 0
-        """, player_id)
-        
-        if not bars:
-            logging.info(f"Player {player_id} has no bars in inventory")
-            return []
-            
-        # Log each bar found
-        for bar in bars:
-            logging.info(f"Found bar in inventory: ID={bar['itemid']}, Name={bar['name']}, Quantity={bar['quantity']}, Type={bar['type']}")
-        
-        # Create a dict of bar quantities for easy lookup
-        bar_quantities = {bar['itemid']: bar['quantity'] for bar in bars}
-        logging.info(f"Bar quantities dictionary: {bar_quantities}")
-        
-        # For each recipe, check if we have enough materials
-        for armor_id, recipe in self.smith_recipes.items():
-            logging.info(f"\nChecking recipe for armor_id {armor_id}:")
-            logging.info(f"- Requires {recipe['bar_amount']}x bar_id {recipe['bar_id']}")
-            
-            # Check if we have enough of the required bar
-            available_qty = bar_quantities.get(recipe['bar_id'], 0)
-            has_materials = available_qty >= recipe['bar_amount']
-            logging.info(f"- Have {available_qty} bars, need {recipe['bar_amount']}, has_enough: {has_materials}")
-            
-            if not has_materials:
-                logging.info(f"- Skipping armor {armor_id}: insufficient materials")
-                continue
-                
-            # Get complete item data for both armor and bar
-            armor_data = await self.db.fetchrow("""
-                SELECT itemid, name, description, type, rarity
-                FROM items 
-                WHERE itemid = $1
-            """, armor_id)
-            
-            if not armor_data:
-                logging.info(f"- Skipping armor {armor_id}: armor data not found")
+    # Armor and shield slots a smithed item may go in
+    VALID_ARMOR_TYPES = (
+        'Helmet', 'Chest', 'Hands', 'Legs', 'Feet',  # Base armor slots
+        'Back', 'Neck', 'Finger', 'Shield', 'Weapon'  # Additional equipment slots
+    )
+
+    async def load_crafting_snapshot(self, ctx, player_id: int, kind: str):
+        """Bars and smithing level for the player in one query; None if ctx.author is not that player."""
+        snapshot = await self.crafting.load_snapshot(self.db, kind, player_id=player_id)
+        if not snapshot or snapshot.discord_id != str(ctx.author.id):
+            return None
+        return snapshot
+
+    def _available(self, snapshot, kind: str):
+        """(recipe, times craftable, item data, bar data) for every recipe of kind the snapshot covers."""
+        available = []
+        for recipe, times in self.crafting.available(snapshot, kind):
+            item_data = self.game_data.get_item(recipe.output_id)
+            bar_id = recipe.ingredients[0][0]
+            bar_data = self.game_data.get_item(bar_id)
+            if not item_data:
+                logger.debug("Skipping %s %s: item data not found", kind, recipe.output_id)
                 continue
-                
-            logging.info(f"- Found armor data: {armor_data}")
-            logging.info(f"- Armor type: {armor_data['type']}")
-            
-            # Check if the type is valid
-            valid_types = [
-                'Helmet', 'Chest', 'Hands', 'Legs', 'Feet',  # Base armor slots
-                'Back', 'Neck', 'Finger', 'Shield', 'Weapon'  # Additional equipment slots
-            ]
-            if armor_data['type'] not in valid_types:
-                logging.info(f"- Skipping armor {armor_id}: invalid type '{armor_data['type']}'. Valid types are: {valid_types}")
+            if not bar_data or bar_data['type'] != 'bar':
+                logger.debug("Skipping %s %s: bar %s not found or not of type 'bar'", kind, recipe.output_id, bar_id)
                 continue
-                
-            bar_data = await self.db.fetchrow("""
-                SELECT name, description, type, rarity
-                FROM items 
-                WHERE itemid = $1 AND type = 'bar'
-            """, recipe['bar_id'])
-            
-            if not bar_data:
-                logging.info(f"- Skipping armor {armor_id}: bar data not found or not of type 'bar'")
+            available.append((recipe, times, item_data, bar_data))
+        return available
+
+    def get_available_armor(self, snapshot) -> List[Dict]:
+        """Armor the snapshot's bars cover."""
+        available_armor = []
+        for recipe, times, armor_data, bar_data in self._available(snapshot, ARMOR):
+            if armor_data['type'] not in self.VALID_ARMOR_TYPES:
+                logger.debug("Skipping armor %s: invalid type %r", recipe.output_id, armor_data['type'])
                 continue
-            
-            armor_info = {
+            available_armor.append({
                 'name': armor_data['name'],
-                'itemid': armor_id,
-                'bar_id': recipe['bar_id'],
+                'itemid': recipe.output_id,
+                'bar_id': bar_data['itemid'],
                 'bar_name': bar_data['name'],
-                'required_qty': recipe['bar_amount'],
+                'required_qty': recipe.ingredients[0][1],
+                'craftable': times,
                 'description': armor_data['description'],
                 'armor': 0,  # Temporary placeholder until we add armor column
                 'rarity': armor_data['rarity']
-            }
-            available_armor.append(armor_info)
-            logging.info(f"- Added to available armor: {armor_info['name']} (requires {recipe['bar_amount']}x {bar_data['name']})")
-        
-        logging.info(f"\nFinal available armor list ({len(available_armor)} items):")
-        for armor in available_armor:
-            logging.info(f"- {armor['name']} (Armor: {armor['armor']}) - Requires: {armor['required_qty']}x {armor['bar_name']}")
-        
+            })
+
+        logger.debug("Player %s can smith %d armor pieces: %s", snapshot.player_id, len(available_armor),
+                     [armor['name'] for armor in available_armor])
         return available_armor
 
-    async def get_available_tools(self, player_id: int) -> List[Dict]:
-        """Get list of tools that can be crafted based on player's inventory."""
-        available_tools = []
-        
-        # First, check what bars the player has
-        bars = await self.db.fetch("""
-            SELECT i.itemid, i.quantity, items.name, items.description, items.type, items.rarity
-            FROM inventory i 
-            JOIN items ON i.itemid = items.itemid 
-            WHERE i.playerid = $1 
-            AND i.in_bank = FALSE
-            AND items.type = 'bar'
-            AND i.quantity > 0
-        """, player_id)
-        
-        if not bars:
-            logging.info(f"Player {player_id} has no bars in inventory for tool crafting")
-            return []
-        
-        # Create a dict of bar quantities for easy lookup
-        bar_quantities = {bar['itemid']: bar['quantity'] for bar in bars}
-        
-        # Load tool recipes by looking up item IDs by name
-        if not self.tool_recipes:
-            for tool_name, recipe in self.tool_recipe_definitions.items():
-                tool_id = await self.db.fetchval("""
-                    SELECT itemid FROM items WHERE LOWER(name) = LOWER($1)
-                """, tool_name)
-                if tool_id:
-                    self.tool_recipes[tool_id] = recipe
-                    logging.info(f"Loaded tool recipe: {tool_name} (ID: {tool_id}) requires {recipe['bar_amount']}x bar_id {recipe['bar_id']}")
-        
-        # For each tool recipe, check if we have enough materials
-        for tool_id, recipe in self.tool_recipes.items():
-            available_qty = bar_quantities.get(recipe['bar_id'], 0)
-            has_materials = available_qty >= recipe['bar_amount']
-            
-            if not has_materials:
-                continue
-            
-            # Get tool data
-            tool_data = await self.db.fetchrow("""
-                SELECT itemid, name, description, type, rarity
-                FROM items 
-                WHERE itemid = $1
-            """, tool_id)
-            
-            if not tool_data:
-                continue
-            
-            # Get bar data
-            bar_data = await self.db.fetchrow("""
-                SELECT name FROM items 
-                WHERE itemid = $1 AND type = 'bar'
-            """, recipe['bar_id'])
-            
-            if not bar_data:
-                continue
-            
-            tool_info = {
+    def get_available_tools(self, snapshot) -> List[Dict]:
+        """Tools the snapshot's bars cover."""
+        return [
+            {
                 'name': tool_data['name'],
-                'itemid': tool_id,
-                'bar_id': recipe['bar_id'],
+                'itemid': recipe.output_id,
+                'bar_id': bar_data['itemid'],
                 'bar_name': bar_data['name'],
-                'required_qty': recipe['bar_amount'],
+                'required_qty': recipe.ingredients[0][1],
+                'craftable': times,
                 'description': tool_data['description'],
                 'rarity': tool_data['rarity']
             }
-            available_tools.append(tool_info)
-        
-        return available_tools
+            for recipe, times, tool_data, bar_data in self._available(snapshot, TOOL)
+        ]
 
     @component_callback(re.compile(r"^smith_\d+$"))
     async def smith_button_handler(self, ctx: ComponentContext):
@@ -317,7 +227,7 @@ class SmithModule(Extension):
             await ctx.defer(ephemeral=True)
             await self.display_smith_interface(ctx, player_id)
         except Exception as e:
-            logging.error(f"Error in smith_button_handler: {e}")
+            logger.error(f"Error in smith_button_handler: {e}")
             await ctx.send("An error occurred. Please try again.", ephemeral=True)
 
     async def display_smith_interface(self, ctx, player_id):
@@ -352,21 +262,17 @@ class SmithModule(Extension):
         try:
             # Get player ID from the button's custom_id
             player_id = int(ctx.custom_id.split("_")[2])
-            logging.info(f"Smith craft handler called for player_id: {player_id}")
+            logger.debug("Smith craft handler called for player_id: %s", player_id)
             
-            # Verify this player is the one who clicked
-            authorized_discord_id = await self.db.fetchval("""
-                SELECT discord_id::text FROM players 
-                WHERE playerid = $1
-            """, player_id)
-            
-            if str(ctx.author.id) != authorized_discord_id:
+            # Verify this player is the one who clicked and load their bars in the same query
+            snapshot = await self.load_crafting_snapshot(ctx, player_id, ARMOR)
+            if not snapshot:
                 await ctx.send("You are not authorized to use this button.", ephemeral=True)
                 return
 
             # Get available armor based on inventory
-            available_armor = await self.get_available_armor(player_id)
-            logging.info(f"Available armor for player {player_id}: {available_armor}")
+            available_armor = self.get_available_armor(snapshot)
+            logger.debug("Available armor for player %s: %s", player_id, available_armor)
 
             if not available_armor:
                 await ctx.send("You don't have enough materials to craft any armor.", ephemeral=True)
@@ -378,10 +284,10 @@ class SmithModule(Extension):
                 option = StringSelectOption(
                     label=f"{armor['name']} (Armor: {armor['armor']})",
                     value=str(armor['itemid']),
-                    description=f"Requires: {armor['required_qty']}x {armor['bar_name']} | {armor['rarity']}"
+                    description=f"Requires: {armor['required_qty']}x {armor['bar_name']} | {armor['rarity']} | can make {armor['craftable']}"
                 )
                 options.append(option)
-                logging.info(f"Added dropdown option: {armor['name']}")
+                logger.debug("Added dropdown option: %s", armor['name'])
 
             # Create dropdown menu
             dropdown = StringSelectMenu(
@@ -398,7 +304,7 @@ class SmithModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in smith_craft_handler: {e}")
+            logger.error(f"Error in smith_craft_handler: {e}")
             await ctx.send("An error occurred while accessing the smithy. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^select_armor_\d+$"))
@@ -463,7 +369,7 @@ class SmithModule(Extension):
             """)
 
         except Exception as e:
-            logging.error(f"Error in select_armor_handler: {e}")
+            logger.error(f"Error in select_armor_handler: {e}")
             await ctx.send("An error occurred while crafting the armor. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^smith_craft_tool_\d+$"))
@@ -472,21 +378,17 @@ class SmithModule(Extension):
         try:
             # Get player ID from the button's custom_id
             player_id = int(ctx.custom_id.split("_")[3])
-            logging.info(f"Smith craft tool handler called for player_id: {player_id}")
-            
-            # Verify this player is the one who clicked
-            authorized_discord_id = await self.db.fetchval("""
-                SELECT discord_id::text FROM players 
-                WHERE playerid = $1
-            """, player_id)
+            logger.debug("Smith craft tool handler called for player_id: %s", player_id)
             
-            if str(ctx.author.id) != authorized_discord_id:
+            # Verify this player is the one who clicked and load their bars in the same query
+            snapshot = await self.load_crafting_snapshot(ctx, player_id, TOOL)
+            if not snapshot:
                 await ctx.send("You are not authorized to use this button.", ephemeral=True)
                 return
 
             # Get available tools based on inventory
-            available_tools = await self.get_available_tools(player_id)
-            logging.info(f"Available tools for player {player_id}: {available_tools}")
+            available_tools = self.get_available_tools(snapshot)
+            logger.debug("Available tools for player %s: %s", player_id, available_tools)
 
             if not available_tools:
                 await ctx.send("You don't have enough materials to craft any tools.", ephemeral=True)
@@ -498,10 +400,10 @@ class SmithModule(Extension):
                 option = StringSelectOption(
                     label=f"{tool['name']}",
                     value=str(tool['itemid']),
-                    description=f"Requires: {tool['required_qty']}x {tool['bar_name']} | {tool['rarity']}"
+                    description=f"Requires: {tool['required_qty']}x {tool['bar_name']} | {tool['rarity']} | can make {tool['craftable']}"
                 )
                 options.append(option)
-                logging.info(f"Added dropdown option: {tool['name']}")
+                logger.debug("Added dropdown option: %s", tool['name'])
 
             # Create dropdown menu
             dropdown = StringSelectMenu(
@@ -518,7 +420,7 @@ class SmithModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in smith_craft_tool_handler: {e}")
+            logger.error(f"Error in smith_craft_tool_handler: {e}")
             await ctx.send("An error occurred while accessing the smithy. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^select_tool_\d+$"))
@@ -540,12 +442,12 @@ class SmithModule(Extension):
 
             selected_tool_id = int(ctx.values[0])
             
-            recipe = self.tool_recipes.get(selected_tool_id)
+            recipe = self.crafting.get(TOOL, selected_tool_id)
             if not recipe:
                 await ctx.send("Invalid tool selection.", ephemeral=True)
                 return
 
-            bar_id, required_qty = recipe['bar_id'], recipe['bar_amount']
+            bar_id, required_qty = recipe.ingredients[0]
             
             # Verify materials again
             if not await self.check_materials(player_id, bar_id, required_qty):
@@ -583,90 +485,35 @@ class SmithModule(Extension):
             """)
 
         except Exception as e:
-            logging.error(f"Error in select_tool_handler: {e}")
+            logger.error(f"Error in select_tool_handler: {e}")
             await ctx.send("An error occurred while crafting the tool. Please try again.", ephemeral=True)
 
-    async def get_available_weapons(self, player_id: int) -> List[Dict]:
-        """Get list of weapons that can be crafted based on player's inventory and smithing level."""
+    def get_available_weapons(self, snapshot) -> List[Dict]:
+        """Weapons the snapshot's bars and smithing level cover."""
         available_weapons = []
-        
-        # Get player's smithing level
-        player_level = await self.get_smithing_level(player_id)
-        
-        # First, check what bars the player has
-        bars = await self.db.fetch("""
-            SELECT i.itemid, i.quantity, items.name, items.description, items.type, items.rarity
-            FROM inventory i 
-            JOIN items ON i.itemid = items.itemid 
-            WHERE i.playerid = $1 
-            AND i.in_bank = FALSE
-            AND items.type = 'bar'
-            AND i.quantity > 0
-        """, player_id)
-        
-        if not bars:
-            logging.info(f"Player {player_id} has no bars in inventory for weapon crafting")
-            return []
-        
-        # Create a dict of bar quantities for easy lookup
-        bar_quantities = {bar['itemid']: bar['quantity'] for bar in bars}
-        
-        # For each weapon recipe, check if we have enough materials and level
-        for weapon_id, recipe in self.weapon_recipes.items():
-            # Check smithing level requirement
-            if player_level < recipe['smithing_level']:
-                continue
-            
-            # Check if we have enough of the required bar
-            available_qty = bar_quantities.get(recipe['bar_id'], 0)
-            has_materials = available_qty >= recipe['bar_amount']
-            
-            if not has_materials:
-                continue
-            
-            # Get weapon data
-            weapon_data = await self.db.fetchrow("""
-                SELECT itemid, name, description, type, rarity,
-                       slashing_damage, piercing_damage, crushing_damage, dark_damage
-                FROM items 
-                WHERE itemid = $1
-            """, weapon_id)
-            
-            if not weapon_data:
-                continue
-            
-            # Get bar data
-            bar_data = await self.db.fetchrow("""
-                SELECT name FROM items 
-                WHERE itemid = $1 AND type = 'bar'
-            """, recipe['bar_id'])
-            
-            if not bar_data:
-                continue
-            
-            # Calculate total damage
-            total_damage = (
-                (weapon_data['slashing_damage'] or 0) +
-                 (weapon_data['piercing_damage'] or 0) +
-                 (weapon_data['crushing_damage'] or 0) +
-                 (weapon_data['dark_damage'] or 0))
-            
-            weapon_info = {
+        for recipe, times, weapon_data, bar_data in self._available(snapshot, WEAPON):
+            # Damage columns hold dice notation; show the average total
+            total_damage = round(sum(
+                average(weapon_data[f'{damage_type}_damage'])
+                for damage_type in ('slashing', 'piercing', 'crushing', 'dark')
+            ), 1)
+            
+            available_weapons.append({
                 'name': weapon_data['name'],
-                'itemid': weapon_id,
-                'bar_id': recipe['bar_id'],
+                'itemid': recipe.output_id,
+                'bar_id': bar_data['itemid'],
                 'bar_name': bar_data['name'],
-                'required_qty': recipe['bar_amount'],
-                'smithing_level': recipe['smithing_level'],
+                'required_qty': recipe.ingredients[0][1],
+                'craftable': times,
+                'smithing_level': recipe.level,
                 'description': weapon_data['description'],
                 'rarity': weapon_data['rarity'],
                 'total_damage': total_damage,
-                'slashing': weapon_data['slashing_damage'] or 0,
-                'piercing': weapon_data['piercing_damage'] or 0,
-                'crushing': weapon_data['crushing_damage'] or 0,
-                'dark': weapon_data['dark_damage'] or 0
-            }
-            available_weapons.append(weapon_info)
+                'slashing': weapon_data['slashing_damage'] or '',
+                'piercing': weapon_data['piercing_damage'] or '',
+                'crushing': weapon_data['crushing_damage'] or '',
+                'dark': weapon_data['dark_damage'] or ''
+            })
         
         return available_weapons
 
@@ -676,21 +523,17 @@ class SmithModule(Extension):
         try:
             # Get player ID from the button's custom_id
             player_id = int(ctx.custom_id.split("_")[3])
-            logging.info(f"Smith craft weapon handler called for player_id: {player_id}")
-            
-            # Verify this player is the one who clicked
-            authorized_discord_id = await self.db.fetchval("""
-                SELECT discord_id::text FROM players 
-                WHERE playerid = $1
-            """, player_id)
+            logger.debug("Smith craft weapon handler called for player_id: %s", player_id)
             
-            if str(ctx.author.id) != authorized_discord_id:
+            # Verify this player is the one who clicked and load their bars in the same query
+            snapshot = await self.load_crafting_snapshot(ctx, player_id, WEAPON)
+            if not snapshot:
                 await ctx.send("You are not authorized to use this button.", ephemeral=True)
                 return
 
             # Get available weapons based on inventory and level
-            available_weapons = await self.get_available_weapons(player_id)
-            logging.info(f"Available weapons for player {player_id}: {available_weapons}")
+            available_weapons = self.get_available_weapons(snapshot)
+            logger.debug("Available weapons for player %s: %s", player_id, available_weapons)
 
             if not available_weapons:
                 await ctx.send("You don't have enough materials or smithing level to craft any weapons.", ephemeral=True)
@@ -699,16 +542,18 @@ class SmithModule(Extension):
             # Create dropdown options for available weapons
             options = []
             for weapon in available_weapons:
-                damage_str = f"S:{weapon['slashing']}/P:{weapon['piercing']}/C:{weapon['crushing']}"
-                if weapon['dark'] > 0:
-                    damage_str += f"/D:{weapon['dark']}"
+                damage_str = "/".join(
+                    f"{label}:{weapon[damage_type]}"
+                    for label, damage_type in (('S', 'slashing'), ('P', 'piercing'), ('C', 'crushing'), ('D', 'dark'))
+                    if weapon[damage_type]
+                )
                 option = StringSelectOption(
-                    label=f"{weapon['name']} (Total: {weapon['total_damage']})",
+                    label=f"{weapon['name']} (Avg: {weapon['total_damage']:g}) x{weapon['craftable']}",
                     value=str(weapon['itemid']),
                     description=f"Req: {weapon['required_qty']}x {weapon['bar_name']} | Lvl: {weapon['smithing_level']} | {damage_str}"
                 )
                 options.append(option)
-                logging.info(f"Added dropdown option: {weapon['name']}")
+                logger.debug("Added dropdown option: %s", weapon['name'])
 
             # Create dropdown menu
             dropdown = StringSelectMenu(
@@ -725,7 +570,7 @@ class SmithModule(Extension):
             )
 
         except Exception as e:
-            logging.error(f"Error in smith_craft_weapon_handler: {e}")
+            logger.error(f"Error in smith_craft_weapon_handler: {e}")
             await ctx.send("An error occurred while accessing the smithy. Please try again.", ephemeral=True)
 
     @component_callback(re.compile(r"^select_weapon_\d+$"))
@@ -796,7 +641,7 @@ class SmithModule(Extension):
             """)
 
         except Exception as e:
-            logging.error(f"Error in select_weapon_handler: {e}")
+            logger.error(f"Error in select_weapon_handler: {e}")
             await ctx.send("An error occurred while crafting the weapon. Please try again.", ephemeral=True)
 
 # Setup function to load this as an extension
@@ -1,6 +1,7 @@
 from interactions import Extension, ComponentContext, component_callback, Button, ButtonStyle, Embed, StringSelectMenu, StringSelectOption
 import logging
 import re
+from dice import describe
 
 class WaltsWeapons(Extension):
     def __init__(self, bot):
@@ -56,14 +57,10 @@ class WaltsWeapons(Extension):
             # Add items to embed with damage info
             for item in items:
                 damage_parts = []
-                if item['slashing_damage'] and item['slashing_damage'] > 0:
-                    damage_parts.append(f"S:{item['slashing_damage']}")
-                if item['piercing_damage'] and item['piercing_damage'] > 0:
-                    damage_parts.append(f"P:{item['piercing_damage']}")
-                if item['crushing_damage'] and item['crushing_damage'] > 0:
-                    damage_parts.append(f"C:{item['crushing_damage']}")
-                if item['dark_damage'] and item['dark_damage'] > 0:
-                    damage_parts.append(f"D:{item['dark_damage']}")
+                for label, damage_type in (('S', 'slashing'), ('P', 'piercing'), ('C', 'crushing'), ('D', 'dark')):
+                    dice = item[f'{damage_type}_damage']
+                    if dice and str(dice).strip():
+                        damage_parts.append(f"{label}: {describe(dice)}")
                 
                 damage_str = " / ".join(damage_parts) if damage_parts else "No damage"
                 
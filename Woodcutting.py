@@ -4,14 +4,17 @@ import asyncio
 from interactions import SlashContext, Extension, Button, ButtonStyle, ComponentContext, component_callback
 import re
 from Inventory import Inventory
+from player_actions import player_action
 
 
 class WoodcuttingModule(Extension):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.game_data = bot.game_data
 
     @component_callback(re.compile(r"^chop_\d+$"))
+    @player_action
     async def chop_button_handler(self, ctx: ComponentContext):
         # Extract the original user's ID from the custom ID
         original_user_id = int(ctx.custom_id.split("_")[1])
@@ -82,10 +85,8 @@ class WoodcuttingModule(Extension):
         """, xp_gained, player_id)
         
     async def start_chop_action(self, ctx: ComponentContext, player_id: int, location_id: int):
-        # Fetch a tree based on the current location
-        tree = await self.db.fetchrow("""
-            SELECT * FROM trees WHERE locationid = $1 ORDER BY RANDOM() LIMIT 1
-        """, location_id)
+        # Pick a tree at the current location, weighted by trees.probability
+        tree = self.game_data.drop_tables.roll_tree(location_id)
 
         if not tree:
             await ctx.send("No trees to chop here.", ephemeral=True)
@@ -112,10 +113,8 @@ class WoodcuttingModule(Extension):
         item_id = tree['itemid']
         number_of_logs = tree['number_of_logs']
 
-        # Fetch item details from items table to get the name
-        item_details = await self.db.fetchrow("""
-            SELECT name FROM items WHERE itemid = $1
-        """, item_id)
+        # Get the item name from the cached items table
+        item_details = self.game_data.get_item(item_id)
 
         if not item_details:
             await ctx.send("Error: Unable to retrieve item details.", ephemeral=True)
@@ -0,0 +1,149 @@
+"""
+Background maintenance of the battle tables.
+
+Battles used to be marked is_active = false and kept forever, so battle_instances,
+battle_participants, battle_enemies, battle_effects and battle_logs grew with
+every hunt. BattleMaintenance runs every ``interval`` seconds and:
+
+1. closes abandoned battles: active battles with no activity (state flushes touch
+   battle_instances.last_activity_at) for ``stale_after`` seconds,
+2. archives battles that ended more than ``archive_after`` seconds ago into one
+   battle_archive row each and deletes their detail rows, ``batch_size`` battles
+   per statement so no run holds long locks.
+
+Needs migrations/add_battle_maintenance.sql.
+"""
+import asyncio
+import logging
+
+CLOSE_STALE_SQL = """
+    UPDATE battle_instances
+    SET is_active = false, ended_at = NOW(), end_reason = 'abandoned'
+    WHERE is_active = true
+      AND COALESCE(last_activity_at, created_at) < NOW() - $1::float8 * interval '1 second'
+    RETURNING instance_id
+"""
+
+# Archive and delete one batch of ended battles in a single statement. Foreign key
+# checks run at the end of the statement, after the child rows are gone.
+ARCHIVE_BATCH_SQL = """
+    WITH batch AS (
+        SELECT instance_id FROM battle_instances
+        WHERE is_active = false
+          AND COALESCE(ended_at, last_activity_at, created_at) < NOW() - $1::float8 * interval '1 second'
+        ORDER BY instance_id
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    ), archived AS (
+        INSERT INTO battle_archive
+            (instance_id, instance_type, location_id, created_at, ended_at, outcome,
+             turns, player_ids, survivors, enemy_ids, enemies_defeated)
+        SELECT bi.instance_id, bi.instance_type, bi.location_id, bi.created_at,
+               COALESCE(bi.ended_at, bi.last_activity_at, bi.created_at),
+               COALESCE(bi.end_reason, CASE
+                   WHEN e.enemies > 0 AND e.defeated = e.enemies THEN 'victory'
+                   WHEN p.player_ids IS NOT NULL AND p.survivors = 0 THEN 'defeat'
+                   ELSE 'ended' END),
+               COALESCE(bi.turn_number, 0),
+               COALESCE(p.player_ids, '{}'), COALESCE(p.survivors, 0),
+               COALESCE(e.enemy_ids, '{}'), COALESCE(e.defeated, 0)
+        FROM battle_instances bi
+        JOIN batch USING (instance_id)
+        CROSS JOIN LATERAL (
+            SELECT array_agg(player_id ORDER BY player_id) AS player_ids,
+                   COUNT(*) FILTER (WHERE current_health > 0) AS survivors
+            FROM battle_participants WHERE instance_id = bi.instance_id
+        ) p
+        CROSS JOIN LATERAL (
+            SELECT array_agg(enemy_id ORDER BY battle_enemy_id) AS enemy_ids,
+                   COUNT(*) AS enemies,
+                   COUNT(*) FILTER (WHERE current_health <= 0) AS defeated
+            FROM battle_enemies WHERE instance_id = bi.instance_id
+        ) e
+        ON CONFLICT (instance_id) DO NOTHING
+    ), effects AS (
+        DELETE FROM battle_effects WHERE instance_id IN (SELECT instance_id FROM batch)
+    ), enemies AS (
+        DELETE FROM battle_enemies WHERE instance_id IN (SELECT instance_id FROM batch)
+    ), participants AS (
+        DELETE FROM battle_participants WHERE instance_id IN (SELECT instance_id FROM batch)
+    ), logs AS (
+        DELETE FROM battle_logs WHERE instance_id IN (SELECT instance_id FROM batch)
+    )
+    DELETE FROM battle_instances WHERE instance_id IN (SELECT instance_id FROM batch)
+"""
+
+
+class BattleMaintenance:
+    """Closes abandoned battles and compacts finished ones into battle_archive."""
+
+    def __init__(self, db, states, turns=None, effects=None, interval: float = 300, stale_after: float = 1800,
+                 archive_after: float = 3600, batch_size: int = 500, max_batches: int = 20):
+        self.db = db
+        self.states = states
+        self.turns = turns
+        self.effects = effects
+        self.interval = interval
+        self.stale_after = stale_after
+        self.archive_after = archive_after
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.closed = 0
+        self.archived = 0
+        self._task = None
+
+    def start(self):
+        """Start the background loop (interval 0 disables it)."""
+        if self.interval and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"Error in battle maintenance: {e}")
+
+    async def run_once(self):
+        """One maintenance pass; returns (battles closed, battles archived)."""
+        closed = await self.close_stale()
+        archived = await self.compact()
+        if closed or archived:
+            logging.info(f"Battle maintenance: closed {closed} abandoned, archived {archived} finished battle(s)")
+        return closed, archived
+
+    async def close_stale(self):
+        # Write pending in-memory changes first so recent activity is visible
+        await self.states.flush()
+        rows = await self.db.fetch(CLOSE_STALE_SQL, self.stale_after)
+        for row in rows:
+            if self.turns is not None:
+                self.turns.discard(row['instance_id'])
+            if self.effects is not None:
+                self.effects.forget_battle(row['instance_id'])
+            self.states.discard(row['instance_id'])
+        self.closed += len(rows)
+        return len(rows)
+
+    async def compact(self):
+        archived = 0
+        for _ in range(self.max_batches):
+            status = await self.db.execute(ARCHIVE_BATCH_SQL, self.archive_after, self.batch_size)
+            deleted = int(status.split()[-1]) if status else 0
+            archived += deleted
+            if deleted < self.batch_size:
+                break
+            # Let interactions use the pool between batches
+            await asyncio.sleep(0)
+        self.archived += archived
+        return archived
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+
+class BattleInstance:
+    """In-memory copy of one battle instance (instance row, participants, enemies and effects)."""
+
+    # battle_instances columns that are held in memory and written back on flush
+    INSTANCE_COLUMNS = ('current_turn_player_id', 'turn_order', 'turn_number', 'phase', 'channel_id', 'message_id')
+
+    def __init__(self, instance, participants, enemies, effects, enemy_rows):
+        self.instance_id = instance['instance_id']
+        self.instance = dict(instance)
+        self.participants = {p['player_id']: dict(p) for p in participants}
+        self.enemies = {e['battle_enemy_id']: dict(e) for e in enemies}
+        self.effects = [dict(e) for e in effects]
+        # enemies table rows keyed by enemyid, loaded once for the whole battle
+        self.enemy_rows = {r['enemyid']: dict(r) for r in enemy_rows}
+
+        self.instance_dirty = False
+        self.dirty_participants = set()
+        self.dirty_enemies = set()
+
+    @property
+    def is_party(self):
+        return self.instance.get('instance_type') == 'party'
+
+    @property
+    def is_dirty(self):
+        return self.instance_dirty or bool(self.dirty_participants) or bool(self.dirty_enemies)
+
+    def to_state(self):
+        """Return the battle in the same shape get_instance_state has always returned."""
+        return {
+            **self.instance,
+            'participants': list(self.participants.values()),
+            'enemies': list(self.enemies.values()),
+            'effects': list(self.effects)
+        }
+
+    def get_participant(self, player_id):
+        return self.participants.get(player_id)
+
+    def get_enemy_row(self, enemy_id):
+        return self.enemy_rows.get(enemy_id)
+
+    def find_enemy(self, enemy_id):
+        """Find a battle enemy by enemies.enemyid, preferring one that is still alive.
+
+        Returns:
+            (battle_enemy, enemy_row) or (None, None)
+        """
+        fallback = None
+        for battle_enemy in self.enemies.values():
+            if battle_enemy['enemy_id'] != enemy_id:
+                continue
+            if battle_enemy['current_health'] > 0:
+                return battle_enemy, self.enemy_rows.get(enemy_id)
+            if fallback is None:
+                fallback = battle_enemy
+        if fallback is not None:
+            return fallback, self.enemy_rows.get(enemy_id)
+        return None, None
+
+    def living_enemies(self):
+        return [e for e in self.enemies.values() if e['current_health'] > 0]
+
+    def living_participants(self):
+        return [p for p in self.participants.values() if p['current_health'] > 0]
+
+    def set_health(self, target_type, target_id, new_health, new_mana=None):
+        if target_type == 'player':
+            participant = self.participants.get(target_id)
+            if not participant:
+                return
+            participant['current_health'] = new_health
+            if new_mana is not None:
+                participant['current_mana'] = new_mana
+            self.dirty_participants.add(target_id)
+        else:
+            enemy = self.enemies.get(target_id)
+            if not enemy:
+                return
+            enemy['current_health'] = new_health
+            self.dirty_enemies.add(target_id)
+
+    def set_fields(self, **fields):
+        """Update battle_instances columns in memory; they are written on the next flush."""
+        for key, value in fields.items():
+            if key not in self.INSTANCE_COLUMNS:
+                raise KeyError(f"{key} is not a tracked battle_instances column")
+            self.instance[key] = value
+        self.instance_dirty = True
+
+    def remove_participant(self, player_id):
+        self.participants.pop(player_id, None)
+        self.dirty_participants.discard(player_id)
+
+    def add_effect(self, effect):
+        self.effects.append(dict(effect))
+
+
+class BattleStateManager:
+    """Keeps active battles in memory and writes changed rows back to Postgres in batches."""
+
+    def __init__(self, db, flush_interval: float = 2.0, ended_cache_size: int = 256):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.ended_cache_size = ended_cache_size
+        self.instances = {}
+        self._ended = OrderedDict()  # instance_id -> BattleInstance of a recently ended battle (read-only)
+        self._loading = {}           # instance_id -> Task of the load in flight
+        self._flush_task = None
+
+    def start(self):
+        """Start the background write-behind loop (needs a running event loop)."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing battle state: {e}")
+
+    async def get(self, instance_id: int):
+        """Return the BattleInstance for instance_id, loading it from the database on first use."""
+        battle = self.instances.get(instance_id) or self._ended.get(instance_id)
+        if battle:
+            return battle
+
+        # Every caller waits on the same load until it has finished
+        task = self._loading.get(instance_id)
+        if task is None:
+            task = self._loading[instance_id] = asyncio.ensure_future(self._load_and_cache(instance_id))
+            task.add_done_callback(lambda _: self._loading.pop(instance_id, None))
+        # A cancelled caller must not cancel the load the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load_and_cache(self, instance_id: int):
+        battle = await self._load(instance_id)
+        if battle is None:
+            return None
+        if battle.instance.get('is_active'):
+            self.instances[instance_id] = battle
+            self.start()
+        else:
+            self._remember_ended(battle)
+        return battle
+
+    def _remember_ended(self, battle):
+        """Keep an ended battle for repeated reads; it is never flushed."""
+        self._ended[battle.instance_id] = battle
+        self._ended.move_to_end(battle.instance_id)
+        while len(self._ended) > self.ended_cache_size:
+            self._ended.popitem(last=False)
+
+    async def _load(self, instance_id: int):
+        async with self.db.pool.acquire() as conn:
+            instance = await conn.fetchrow("""
+                SELECT * FROM battle_instances WHERE instance_id = $1
+            """, instance_id)
+
+            if not instance:
+                return None
+
+            participants = await conn.fetch("""
+                SELECT * FROM battle_participants WHERE instance_id = $1
+                ORDER BY join_time, player_id
+            """, instance_id)
+
+            enemies = await conn.fetch("""
+                SELECT * FROM battle_enemies WHERE instance_id = $1
+                ORDER BY battle_enemy_id
+            """, instance_id)
+
+            effects = await conn.fetch("""
+                SELECT * FROM battle_effects WHERE instance_id = $1
+            """, instance_id)
+
+            enemy_ids = list({e['enemy_id'] for e in enemies})
+            enemy_rows = []
+            if enemy_ids:
+                enemy_rows = await conn.fetch("""
+                    SELECT * FROM enemies WHERE enemyid = ANY($1::int[])
+                """, enemy_ids)
+
+        return BattleInstance(instance, participants, enemies, effects, enemy_rows)
+
+    def get_cached(self, instance_id: int):
+        return self.instances.get(instance_id)
+
+    def find_instance_for_player(self, player_id: int):
+        """Return the id of a cached active battle the player is in, or None."""
+        for instance_id, battle in self.instances.items():
+            if player_id in battle.participants:
+                return instance_id
+        return None
+
+    async def flush(self, instance_id: int = None):
+        """Write every dirty row (or only those of one instance) in a single transaction."""
+        if instance_id is not None:
+            battle = self.instances.get(instance_id)
+            battles = [battle] if battle else []
+        else:
+            battles = list(self.instances.values())
+
+        instance_rows = []
+        participant_rows = []
+        enemy_rows = []
+        touched = []
+        # Snapshot and clear the dirty sets before awaiting so that changes made
+        # while the write is in flight are picked up by the next flush
+        for battle in battles:
+            if not battle.is_dirty:
+                continue
+            touched.append(battle.instance_id)
+            if battle.instance_dirty:
+                instance_rows.append((
+                    battle.instance.get('current_turn_player_id'),
+                    battle.instance.get('turn_order'),
+                    battle.instance.get('turn_number'),
+                    battle.instance.get('phase'),
+                    battle.instance.get('channel_id'),
+                    battle.instance.get('message_id'),
+                    battle.instance_id
+                ))
+            for player_id in battle.dirty_participants:
+                p = battle.participants[player_id]
+                participant_rows.append((p['current_health'], p['current_mana'], battle.instance_id, player_id))
+            for battle_enemy_id in battle.dirty_enemies:
+                enemy_rows.append((battle.enemies[battle_enemy_id]['current_health'], battle.instance_id, battle_enemy_id))
+            battle.instance_dirty = False
+            battle.dirty_participants.clear()
+            battle.dirty_enemies.clear()
+
+        if not (instance_rows or participant_rows or enemy_rows):
+            return
+
+        try:
+            async with self.db.pool.acquire() as conn:
+                async with conn.transaction():
+                    # Activity timestamp for the stale battle reaper (battle_maintenance.py)
+                    await conn.execute("""
+                        UPDATE battle_instances SET last_activity_at = NOW()
+                        WHERE instance_id = ANY($1::int[])
+                    """, touched)
+                    if instance_rows:
+                        await conn.executemany("""
+                            UPDATE battle_instances
+                            SET current_turn_player_id = $1, turn_order = $2::int[], turn_number = $3,
+                                phase = $4, channel_id = $5, message_id = $6
+                            WHERE instance_id = $7
+                        """, instance_rows)
+                    if participant_rows:
+                        await conn.executemany("""
+                            UPDATE battle_participants
+                            SET current_health = $1, current_mana = $2
+                            WHERE instance_id = $3 AND player_id = $4
+                        """, participant_rows)
+                    if enemy_rows:
+                        await conn.executemany("""
+                            UPDATE battle_enemies
+                            SET current_health = $1
+                            WHERE instance_id = $2 AND battle_enemy_id = $3
+                        """, enemy_rows)
+        except Exception:
+            # Put the rows back so the next flush retries them
+            for row in instance_rows:
+                battle = self.instances.get(row[-1])
+                if battle:
+                    battle.instance_dirty = True
+            for row in participant_rows:
+                battle = self.instances.get(row[2])
+                if battle and row[3] in battle.participants:
+                    battle.dirty_participants.add(row[3])
+            for row in enemy_rows:
+                battle = self.instances.get(row[1])
+                if battle:
+                    battle.dirty_enemies.add(row[2])
+            raise
+
+    async def end(self, instance_id: int):
+        """Flush and forget a battle; the caller marks it inactive in the database."""
+        await self.flush(instance_id)
+        battle = self.instances.pop(instance_id, None)
+        if battle:
+            battle.instance['is_active'] = False
+            self._remember_ended(battle)
+
+    def discard(self, instance_id: int):
+        """Drop a cached battle without writing it (next access reloads from the database)."""
+        self.instances.pop(instance_id, None)
+        self._ended.pop(instance_id, None)
@@ -11,8 +11,6 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
-
 class CharacterCreation(Extension):
     def __init__(self, bot):
         self.bot = bot
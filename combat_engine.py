@@ -0,0 +1,263 @@
+"""
+Combat math shared by the battle system and the offline simulator.
+
+Everything here is plain synchronous Python with no database or Discord access.
+Functions that roll take an optional ``rng`` (anything with ``randint``,
+``uniform`` and ``choices``, e.g. ``random.Random(seed)``) so results can be reproduced.
+"""
+import random
+
+from dice import compile_dice
+
+# Damage columns on items and abilities (<type>_damage, holding dice notation)
+DAMAGE_TYPES = ('piercing', 'crushing', 'slashing', 'fire', 'ice', 'lightning',
+                'water', 'earth', 'air', 'light', 'dark', 'magic', 'poison')
+
+# Damage types that scale with Intelligence
+ELEMENTAL_TYPES = ('fire', 'ice', 'lightning', 'water', 'earth', 'air', 'light', 'dark', 'magic', 'poison')
+
+# Ability types that roll Intelligence vs Willpower instead of Dexterity vs Agility
+MAGIC_ABILITY_TYPES = ('fire', 'ice', 'lightning', 'water', 'earth', 'air', 'light', 'dark', 'magic')
+
+RESISTANCE_FIELDS = (
+    'fire_resistance', 'ice_resistance', 'lightning_resistance',
+    'poison_resistance', 'magic_resistance', 'physical_resistance',
+    'crushing_resistance', 'piercing_resistance', 'water_resistance',
+    'earth_resistance', 'light_resistance', 'dark_resistance',
+    'air_resistance', 'sleep_resistance'
+)
+
+ATTRIBUTE_FIELDS = (
+    'strength', 'dexterity', 'intelligence', 'wisdom',
+    'agility', 'endurance', 'charisma', 'willpower', 'luck'
+)
+
+
+def get_stat(stats: dict, name: str, default=0):
+    """Read a stat from a player (total_<name>) or enemy (<name>) row."""
+    return stats.get(f'total_{name}', stats.get(name, default))
+
+
+def get_resistance(stats: dict, damage_type: str):
+    return get_stat(stats, f'{damage_type}_resistance')
+
+
+# ---- dice -----------------------------------------------------------------
+
+def parse_dice(dice_string):
+    """
+    Parse single-term dice notation like "1d6", "2d4+2", "1d8-1"
+    Returns: (num_dice, sides, modifier)
+    Kept for callers that need the raw tuple; rolling goes through dice.compile_dice.
+    """
+    if not dice_string:
+        return (0, 0, 0)
+
+    dice_string = dice_string.strip()
+
+    modifier = 0
+    if '+' in dice_string:
+        parts = dice_string.split('+')
+        dice_string = parts[0]
+        modifier = int(parts[1])
+    elif '-' in dice_string:
+        parts = dice_string.split('-')
+        dice_string = parts[0]
+        modifier = -int(parts[1])
+
+    if 'd' in dice_string:
+        num_dice, sides = map(int, dice_string.split('d'))
+    else:
+        # Just a number (e.g., "5" = 5 damage, no roll)
+        return (0, 0, int(dice_string))
+
+    return (num_dice, sides, modifier)
+
+
+def roll_dice(sides=20, start=0, rng=random):
+    """
+    Simulates a dice roll with given sides.
+    Default: d20 (0-20) for attack rolls
+    For damage: start=0 for 0-X rolls
+    """
+    return rng.randint(start, sides)
+
+
+def roll_dice_notation(dice_string, rng=random):
+    """
+    Roll dice based on notation (see dice.py for the supported syntax).
+    Returns total rolled value (0-X for damage dice).
+    """
+    return compile_dice(dice_string).roll(rng)
+
+
+def format_damage_message(damage_by_type, total_damage):
+    """
+    Format damage breakdown for display.
+    Returns string like "15 damage (8 slashing, 4 crushing, 3 piercing)"
+    """
+    if not damage_by_type or len(damage_by_type) == 1:
+        return f"{total_damage} damage"
+
+    damage_parts = [f"{amount} {damage_type}" for damage_type, amount in damage_by_type.items() if amount > 0]
+
+    if damage_parts:
+        return f"{total_damage} damage ({', '.join(damage_parts)})"
+    return f"{total_damage} damage"
+
+
+# ---- modifiers ------------------------------------------------------------
+
+def get_damage_type_multiplier(damage_type, attacker_stats):
+    """
+    Get multiplier for a specific damage type based on attacker stats.
+    Formula: 1.0 + (stat / 100) - scales per stat point
+    At 100 stat = 2.0x, at 50 stat = 1.5x, at -10 stat = 0.9x
+    """
+    if damage_type == 'piercing':
+        return 1.0 + (get_stat(attacker_stats, 'dexterity') / 100.0)
+
+    elif damage_type == 'crushing':
+        return 1.0 + (get_stat(attacker_stats, 'strength') / 100.0)
+
+    elif damage_type == 'slashing':
+        avg_stat = (get_stat(attacker_stats, 'strength') + get_stat(attacker_stats, 'dexterity')) / 2.0
+        return 1.0 + (avg_stat / 100.0)
+
+    elif damage_type in ELEMENTAL_TYPES:
+        return 1.0 + (get_stat(attacker_stats, 'intelligence') / 100.0)
+
+    return 1.0
+
+
+def critical_multiplier(attacker_stats):
+    return 1.5 + (get_stat(attacker_stats, 'luck') * 0.01)
+
+
+def effects_multiplier(effects):
+    """Combined damage_bonus_/damage_reduction_ multiplier from active status effects."""
+    multiplier = 1.0
+    for effect in effects or ():
+        if effect['attribute'].startswith('damage_bonus_'):
+            multiplier *= (1 + effect['modifier_value'] / 100)
+        elif effect['attribute'].startswith('damage_reduction_'):
+            multiplier *= (1 - effect['modifier_value'] / 100)
+    return multiplier
+
+
+def extract_resistances(entity):
+    """Extract resistances from an entity (player or enemy)."""
+    return {field: get_stat(entity, field) for field in RESISTANCE_FIELDS}
+
+
+def extract_attributes(entity):
+    """Extract attributes from an entity (player or enemy)."""
+    return {field: get_stat(entity, field) for field in ATTRIBUTE_FIELDS}
+
+
+# ---- rolls ----------------------------------------------------------------
+
+def attack_roll(attacker_stats: dict, defender_stats: dict, rng=random) -> tuple[bool, bool, bool]:
+    """
+    Calculate attack roll results.
+    Returns: (hit_success, is_critical, is_blocked)
+    """
+    attacker_dex = get_stat(attacker_stats, 'dexterity')
+    attacker_luck = get_stat(attacker_stats, 'luck')
+    defender_dex = get_stat(defender_stats, 'dexterity')
+    defender_agi = get_stat(defender_stats, 'agility')
+
+    # Base attack roll (d20) + attacker's dexterity
+    roll = roll_dice(rng=rng) + attacker_dex
+
+    # Critical chance (base 5% + luck bonus)
+    is_critical = rng.uniform(0, 100) <= 5 + (attacker_luck * 0.5)
+
+    # Dodge chance (base 5% + defender's agility)
+    if rng.uniform(0, 100) <= 5 + (defender_agi * 0.5):
+        return False, False, False
+
+    # Block chance (base 10% + defender's dexterity)
+    is_blocked = rng.uniform(0, 100) <= 10 + (defender_dex * 0.5)
+
+    hit_success = roll > 10 + defender_agi
+
+    return hit_success, is_critical, is_blocked
+
+
+def ability_hit(attacker_stats: dict, defender_stats: dict, ability_type: str, rng=random) -> tuple[bool, bool]:
+    """
+    Calculate if an ability hits and if it crits.
+    Returns: (hit_success, is_critical)
+    """
+    if ability_type in MAGIC_ABILITY_TYPES:
+        attacker_stat = get_stat(attacker_stats, 'intelligence')
+        defender_stat = get_stat(defender_stats, 'willpower')
+    else:
+        attacker_stat = get_stat(attacker_stats, 'dexterity')
+        defender_stat = get_stat(defender_stats, 'agility')
+
+    roll = roll_dice(rng=rng) + attacker_stat
+
+    is_critical = rng.uniform(0, 100) <= 5 + (attacker_stat * 0.5)
+
+    # Abilities are easier to land than physical attacks
+    hit_success = roll > 8 + defender_stat
+
+    return hit_success, is_critical
+
+
+# ---- damage ---------------------------------------------------------------
+
+def damage_with_dice(attacker_stats: dict, defender_stats: dict, weapon_dice: dict,
+                     is_critical: bool, effects=None, rng=random) -> dict:
+    """
+    Roll dice damage per type and apply stat, critical, resistance and status effect modifiers.
+
+    Args:
+        weapon_dice: Dict of {damage_type: dice_string}
+        effects: the attacker's active status effects (damage_bonus_/damage_reduction_)
+
+    Returns:
+        Dict of {damage_type: final_damage}
+    """
+    effect_mult = effects_multiplier(effects)
+    damage_by_type = {}
+
+    for damage_type, dice_string in weapon_dice.items():
+        if not dice_string or not dice_string.strip():
+            continue
+
+        damage = roll_dice_notation(dice_string, rng=rng) * get_damage_type_multiplier(damage_type, attacker_stats)
+
+        if is_critical:
+            damage *= critical_multiplier(attacker_stats)
+
+        resistance = get_resistance(defender_stats, damage_type)
+        damage *= 1 - (resistance / 100)
+
+        damage *= effect_mult
+
+        # Round down, minimum 0
+        damage_by_type[damage_type] = max(0, int(damage)) if resistance < 100 else 0
+
+    return damage_by_type
+
+
+def flat_damage(attacker_stats: dict, defender_stats: dict, damage_type: str,
+                base_damage: int, is_critical: bool, effects=None) -> int:
+    """
+    Legacy damage calculation for attacks without dice (enemy attacks, dice-less weapons).
+    Minimum 1 damage unless the defender is immune (100%+ resistance).
+    """
+    resistance = get_resistance(defender_stats, damage_type)
+
+    # Negative resistance increases damage, positive reduces it
+    damage = base_damage * (1 - (resistance / 100))
+
+    if is_critical:
+        damage *= critical_multiplier(attacker_stats)
+
+    damage *= effects_multiplier(effects)
+
+    return 0 if resistance >= 100 else max(1, int(damage))
@@ -0,0 +1,271 @@
+"""
+Offline Monte-Carlo combat simulator for balance tuning.
+
+Runs thousands of fights between an attacker loadout and a defender (usually an
+``enemies`` row) using the same formulas as combat_engine, vectorized with NumPy.
+NumPy is only needed here, not by the bot (see requirements-dev.txt).
+
+Usage:
+    python combat_simulator.py --enemy 12 --player 3
+    python combat_simulator.py --enemy 12 --dice slashing=1d6 --dice crushing=1d4 --str 8 --dex 6
+    python combat_simulator.py --enemy-stats health=40,agility=3,dexterity=2 --dice piercing=2d4+1
+
+Benchmarks and the check against combat_engine live in tests/test_combat_simulator.py.
+"""
+import argparse
+import asyncio
+import os
+
+import numpy as np
+
+import combat_engine
+from dice import compile_dice
+from combat_engine import get_stat, get_resistance, get_damage_type_multiplier, critical_multiplier, effects_multiplier
+
+
+def _roll_dice_array(rng, dice_string, n):
+    """Vectorized roll_dice_notation: n draws from the compiled dice distribution."""
+    distribution = compile_dice(dice_string).distribution
+    values = np.fromiter(distribution.keys(), dtype=np.int64)
+    probs = np.fromiter(distribution.values(), dtype=np.float64)
+    return rng.choice(values, size=n, p=probs / probs.sum())
+
+
+def simulate_attacks(attacker: dict, defender: dict, weapon_dice: dict = None, base_damage: int = None,
+                     n: int = 10000, effects=None, rng=None):
+    """
+    Resolve n independent attacks of attacker against defender.
+
+    With weapon_dice this matches BattleSystem.calculate_damage_with_dice; without it the
+    legacy flat 'physical' damage is used (base_damage, defaulting to attacker strength),
+    which is how enemies attack.
+
+    Returns:
+        (damage, hit, crit, blocked) arrays of length n
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+
+    # attack_roll: d20 + dex, crit, dodge, block, hit threshold
+    roll = rng.integers(0, 21, size=n) + get_stat(attacker, 'dexterity')
+    crit = rng.uniform(0, 100, size=n) <= 5 + get_stat(attacker, 'luck') * 0.5
+    dodged = rng.uniform(0, 100, size=n) <= 5 + get_stat(defender, 'agility') * 0.5
+    blocked = ~dodged & (rng.uniform(0, 100, size=n) <= 10 + get_stat(defender, 'dexterity') * 0.5)
+    hit = ~dodged & ~blocked & (roll > 10 + get_stat(defender, 'agility'))
+    crit &= ~dodged
+
+    crit_mult = np.where(crit, critical_multiplier(attacker), 1.0)
+    effect_mult = effects_multiplier(effects)
+    damage = np.zeros(n, dtype=np.int64)
+
+    if weapon_dice:
+        for damage_type, dice_string in weapon_dice.items():
+            if not dice_string or not dice_string.strip():
+                continue
+            resistance = get_resistance(defender, damage_type)
+            if resistance >= 100:
+                continue
+            raw = _roll_dice_array(rng, dice_string, n) * get_damage_type_multiplier(damage_type, attacker)
+            raw = raw * crit_mult * (1 - resistance / 100) * effect_mult
+            damage += np.maximum(0, np.trunc(raw)).astype(np.int64)
+    else:
+        if base_damage is None:
+            base_damage = get_stat(attacker, 'strength')
+        resistance = get_resistance(defender, 'physical')
+        if resistance < 100:
+            raw = base_damage * (1 - resistance / 100) * crit_mult * effect_mult
+            damage = np.maximum(1, np.trunc(raw)).astype(np.int64)
+
+    damage = np.where(hit, damage, 0)
+    return damage, hit, crit & hit, blocked
+
+
+def simulate_fights(attacker: dict, defender: dict, weapon_dice: dict = None, base_damage: int = None,
+                    fights: int = 10000, max_turns: int = 100, defender_health: int = None,
+                    effects=None, seed=None, chunk_size: int = 20000):
+    """
+    Run `fights` fights of repeated attacks until the defender drops or max_turns is reached.
+
+    Returns a dict with per-turn damage (DPS) stats, hit/crit/block rates and time-to-kill
+    percentiles (in attacker turns; fights that never finish are excluded from ttk).
+    """
+    rng = np.random.default_rng(seed)
+    health = defender_health if defender_health is not None else defender.get('health', 0)
+
+    damage_chunks = []
+    ttk_chunks = []
+    hits = crits = blocks = 0
+    remaining = fights
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        remaining -= n
+        damage, hit, crit, blocked = simulate_attacks(
+            attacker, defender, weapon_dice, base_damage, n * max_turns, effects, rng
+        )
+        hits += int(hit.sum())
+        crits += int(crit.sum())
+        blocks += int(blocked.sum())
+
+        per_turn = damage.reshape(n, max_turns)
+        damage_chunks.append(per_turn.ravel())
+
+        dealt = np.cumsum(per_turn, axis=1)
+        killed = dealt >= health
+        finished = killed.any(axis=1)
+        # First turn (1-based) at which the cumulative damage reaches the defender's health
+        ttk_chunks.append(np.where(finished, killed.argmax(axis=1) + 1, -1))
+
+    per_turn = np.concatenate(damage_chunks)
+    ttk = np.concatenate(ttk_chunks)
+    finished_ttk = ttk[ttk > 0]
+    attacks = per_turn.size
+
+    result = {
+        'fights': fights,
+        'attacks': attacks,
+        'defender_health': health,
+        'hit_rate': hits / attacks,
+        'crit_rate': crits / attacks,
+        'block_rate': blocks / attacks,
+        'dps_mean': float(per_turn.mean()),
+        'dps_std': float(per_turn.std()),
+        'dps_percentiles': {p: float(v) for p, v in zip((5, 25, 50, 75, 95), np.percentile(per_turn, (5, 25, 50, 75, 95)))},
+        'kill_rate': finished_ttk.size / fights,
+        'ttk_mean': float(finished_ttk.mean()) if finished_ttk.size else None,
+        'ttk_percentiles': (
+            {p: float(v) for p, v in zip((5, 50, 95, 99), np.percentile(finished_ttk, (5, 50, 95, 99)))}
+            if finished_ttk.size else {}
+        ),
+    }
+    return result
+
+
+def format_report(result):
+    lines = [
+        f"Fights: {result['fights']:,}  Attacks: {result['attacks']:,}  Defender HP: {result['defender_health']}",
+        f"Hit rate: {result['hit_rate']:.1%}  Crit rate: {result['crit_rate']:.1%}  Block rate: {result['block_rate']:.1%}",
+        f"Damage per turn: mean {result['dps_mean']:.2f}  std {result['dps_std']:.2f}  "
+        + "  ".join(f"p{p} {v:.0f}" for p, v in result['dps_percentiles'].items()),
+        f"Kill rate: {result['kill_rate']:.1%}",
+    ]
+    if result['ttk_mean'] is not None:
+        lines.append(
+            f"Turns to kill: mean {result['ttk_mean']:.2f}  "
+            + "  ".join(f"p{p} {v:.0f}" for p, v in result['ttk_percentiles'].items())
+        )
+    return "\n".join(lines)
+
+
+# Equipped weapons in combat slots, as BattleSystem.get_equipped_weapon_dice reads them
+WEAPON_DICE_SQL = """
+    SELECT {columns}
+    FROM inventory inv
+    JOIN items i ON inv.itemid = i.itemid
+    WHERE inv.playerid = $1
+    AND inv.isequipped = true
+    AND inv.slot IN ('1H_weapon', '2H_weapon', 'left_hand')
+    AND i.type = 'Weapon'
+""".format(columns=", ".join(f"i.{t}_damage" for t in combat_engine.DAMAGE_TYPES))
+
+
+async def _connect():
+    import asyncpg
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return await asyncpg.connect(dsn=os.getenv('DATABASE_DSN'))
+
+
+async def load_enemy(enemy_id: int):
+    conn = await _connect()
+    try:
+        row = await conn.fetchrow("SELECT * FROM enemies WHERE enemyid = $1", enemy_id)
+    finally:
+        await conn.close()
+    if not row:
+        raise SystemExit(f"Enemy {enemy_id} not found")
+    return dict(row)
+
+
+async def load_player(player_id: int):
+    """
+    A player's loadout: their player_stats_cache row and the dice of their equipped weapons.
+
+    Returns:
+        (stats, weapon_dice)
+    """
+    conn = await _connect()
+    try:
+        stats = await conn.fetchrow("SELECT * FROM player_stats_cache WHERE playerid = $1", player_id)
+        weapons = await conn.fetch(WEAPON_DICE_SQL, player_id)
+    finally:
+        await conn.close()
+    if not stats:
+        raise SystemExit(f"Player {player_id} has no player_stats_cache row")
+
+    # First weapon with a die of each type wins, as in the battle system
+    weapon_dice = {}
+    for weapon in weapons:
+        for damage_type in combat_engine.DAMAGE_TYPES:
+            dice = weapon[f'{damage_type}_damage']
+            if dice and dice.strip() and damage_type not in weapon_dice:
+                weapon_dice[damage_type] = dice
+    return dict(stats), weapon_dice
+
+
+def _parse_pairs(text):
+    pairs = {}
+    for part in text.split(','):
+        key, _, value = part.partition('=')
+        pairs[key.strip()] = float(value) if '.' in value else int(value)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo combat simulator")
+    parser.add_argument('--enemy', type=int, help="enemies.enemyid to load from DATABASE_DSN")
+    parser.add_argument('--enemy-stats', help="defender stats, e.g. health=40,agility=3,slashing_resistance=10")
+    parser.add_argument('--player', type=int,
+                        help="player_data.playerid whose stats (player_stats_cache) and equipped weapons attack")
+    parser.add_argument('--dice', action='append', default=[], help="weapon dice, e.g. slashing=1d6 (repeatable)")
+    parser.add_argument('--base-damage', type=int, help="flat damage when no dice are given")
+    parser.add_argument('--str', dest='strength', type=int, default=0)
+    parser.add_argument('--dex', dest='dexterity', type=int, default=0)
+    parser.add_argument('--int', dest='intelligence', type=int, default=0)
+    parser.add_argument('--luck', type=int, default=0)
+    parser.add_argument('--fights', type=int, default=10000)
+    parser.add_argument('--max-turns', type=int, default=100)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.enemy is not None:
+        defender = asyncio.run(load_enemy(args.enemy))
+        print(f"Enemy: {defender.get('name')} (id {args.enemy})")
+    elif args.enemy_stats:
+        defender = _parse_pairs(args.enemy_stats)
+    else:
+        parser.error("give --enemy or --enemy-stats")
+
+    weapon_dice = dict(d.split('=', 1) for d in args.dice)
+    if args.player is not None:
+        attacker, equipped_dice = asyncio.run(load_player(args.player))
+        # --dice overrides the equipped weapons
+        weapon_dice = weapon_dice or equipped_dice
+        print(f"Player: {args.player}  Weapon dice: "
+              + (", ".join(f"{t} {d}" for t, d in weapon_dice.items()) or "none"))
+    else:
+        attacker = {
+            'total_strength': args.strength,
+            'total_dexterity': args.dexterity,
+            'total_intelligence': args.intelligence,
+            'total_luck': args.luck,
+        }
+
+    result = simulate_fights(
+        attacker, defender, weapon_dice, args.base_damage,
+        fights=args.fights, max_turns=args.max_turns, seed=args.seed
+    )
+    print(format_report(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Crafting availability for the forge, smithy, cooking pot and cauldron.
+
+Every recipe (bars, armor, weapons, tools and dishes) is normalized into a Recipe:
+the item it makes, the items and caught fish it consumes, and the smithing level it
+needs. Forge and Smith register their recipe tables; dishes come from the cached
+``recipes`` table. Recipes are indexed by ingredient, so "what can this player make"
+only looks at recipes that use something the player holds, against a
+CraftingSnapshot loaded in one query.
+"""
+
+# Recipe kinds
+BAR, ARMOR, TOOL, WEAPON, DISH = 'bar', 'armor', 'tool', 'weapon', 'dish'
+
+ANY_FISH = 'any'
+
+
+class Recipe:
+    __slots__ = ('kind', 'output_id', 'ingredients', 'fish', 'level', 'recipe_id')
+
+    def __init__(self, kind, output_id, ingredients=(), fish=(), level=None, recipe_id=None):
+        self.kind = kind
+        self.output_id = output_id
+        self.ingredients = tuple(ingredients)  # ((item_id, quantity), ...)
+        self.fish = tuple(fish)                # ((fish name or 'any', quantity), ...)
+        self.level = level                     # smithing level, if any
+        self.recipe_id = recipe_id             # recipes.recipeid for dishes
+
+
+class CraftingSnapshot:
+    """A player's crafting ingredients (main inventory), caught fish and smithing level."""
+
+    __slots__ = ('player_id', 'discord_id', 'smithing_level', 'items', 'fish')
+
+    # Only the given ingredient ids are summed; fish are counted by name when asked for
+    LOAD_SQL = """
+        SELECT p.playerid, p.discord_id::text AS discord_id, p.smithing_level,
+               held.item_ids, held.quantities, fish.names AS fish_names, fish.counts AS fish_counts
+        FROM players p
+        CROSS JOIN LATERAL (
+            SELECT array_agg(itemid) AS item_ids, array_agg(quantity) AS quantities
+            FROM (
+                SELECT itemid, SUM(quantity)::int AS quantity
+                FROM inventory
+                WHERE playerid = p.playerid AND itemid = ANY($2::int[])
+                  AND isequipped = FALSE AND (in_bank = FALSE OR in_bank IS NULL)
+                GROUP BY itemid
+            ) s
+        ) held
+        CROSS JOIN LATERAL (
+            SELECT array_agg(fish_name) AS names, array_agg(n) AS counts
+            FROM (
+                SELECT fish_name, COUNT(*)::int AS n
+                FROM caught_fish
+                WHERE player_id = p.playerid AND $3
+                GROUP BY fish_name
+            ) f
+        ) fish
+        WHERE {where}
+    """
+
+    def __init__(self, player_id, discord_id=None, smithing_level=None, items=None, fish=None):
+        self.player_id = player_id
+        self.discord_id = discord_id
+        self.smithing_level = smithing_level if smithing_level is not None else 1
+        self.items = items or {}
+        self.fish = fish or {}
+
+    @property
+    def fish_total(self):
+        return sum(self.fish.values())
+
+    @classmethod
+    async def load(cls, db, item_ids, include_fish=False, player_id=None, discord_id=None):
+        """Snapshot by player_id or discord_id, or None if there is no such player."""
+        if player_id is not None:
+            query, key = cls.LOAD_SQL.format(where="p.playerid = $1"), int(player_id)
+        else:
+            query, key = cls.LOAD_SQL.format(where="p.discord_id = $1"), int(discord_id)
+        row = await db.fetchrow(query, key, list(item_ids), include_fish)
+        if not row:
+            return None
+        return cls(
+            row['playerid'],
+            row['discord_id'],
+            row['smithing_level'],
+            dict(zip(row['item_ids'] or (), row['quantities'] or ())),
+            dict(zip(row['fish_names'] or (), row['fish_counts'] or ())),
+        )
+
+
+class CraftingEngine:
+    """Normalized recipes per kind, an ingredient index and availability checks."""
+
+    SOURCES = ('recipes', 'items')
+
+    def __init__(self, game_data):
+        self.game_data = game_data
+        self._definitions = {}  # kind -> (definitions, keyed_by_name)
+        self._recipes = None    # kind -> {output_id: Recipe}, in definition order
+        self._by_ingredient = None  # kind -> {item_id: set(output_id)}
+        self._dishes_by_recipe = None  # recipes.recipeid -> Recipe
+
+    def register(self, kind, definitions, by_name=False):
+        """Register a module's recipe table.
+
+        definitions maps the output item (id, or name with by_name=True) to either a
+        list of (item_id, quantity) or {'bar_id', 'bar_amount'[, 'smithing_level']}.
+        """
+        self._definitions[kind] = (definitions, by_name)
+        self._recipes = None
+
+    def invalidate(self, tables=None):
+        if tables is None or any(t in self.SOURCES for t in tables):
+            self._recipes = None
+
+    # ---- building -------------------------------------------------------
+
+    def _build(self):
+        recipes = {}
+        for kind, (definitions, by_name) in self._definitions.items():
+            compiled = recipes[kind] = {}
+            for output, definition in definitions.items():
+                if by_name:
+                    item = self.game_data.get_item_by_name(output)
+                    if not item:
+                        continue
+                    output = item['itemid']
+                if output is None:
+                    continue
+                if isinstance(definition, dict):
+                    compiled[output] = Recipe(kind, output, [(definition['bar_id'], definition['bar_amount'])],
+                                              level=definition.get('smithing_level'))
+                else:
+                    compiled[output] = Recipe(kind, output, definition)
+
+        dishes = recipes[DISH] = {}
+        dishes_by_recipe = {}
+        for row in self.game_data.get_all_recipes():
+            recipe = dishes_by_recipe[row['recipeid']] = self._dish_recipe(row)
+            # get_recipe_for_dish uses the first recipe per dish
+            dishes.setdefault(row['dish_itemid'], recipe)
+
+        by_ingredient = {}
+        for kind, compiled in recipes.items():
+            index = by_ingredient[kind] = {}
+            for recipe in compiled.values():
+                for item_id, _ in recipe.ingredients:
+                    index.setdefault(item_id, set()).add(recipe.output_id)
+
+        self._recipes = recipes
+        self._by_ingredient = by_ingredient
+        self._dishes_by_recipe = dishes_by_recipe
+
+    @staticmethod
+    def _dish_recipe(row):
+        ingredients, fish = [], []
+        for i in range(1, 7):
+            item_id, quantity = row.get(f'ingredient{i}_itemid'), row.get(f'quantity{i}_required')
+            if item_id is not None and quantity:
+                ingredients.append((item_id, quantity))
+
+        # Cauldron recipes name their fish; older cooking recipes flag an ingredient slot as "any fish"
+        for i in range(1, 4):
+            name, quantity = row.get(f'caught_fish_name{i}'), row.get(f'caught_fish_{i}_quantity')
+            if name and quantity:
+                fish.append((ANY_FISH if name.lower() == ANY_FISH else name, quantity))
+        if not fish:
+            for i in range(1, 7):
+                quantity = row.get(f'quantity{i}_required')
+                if row.get(f'ingredient{i}_itemid') is None and row.get(f'ingredient{i}_is_any') and quantity:
+                    fish.append((ANY_FISH, quantity))
+        return Recipe(DISH, row['dish_itemid'], ingredients, fish, recipe_id=row['recipeid'])
+
+    def _ensure_built(self):
+        if self._recipes is None:
+            self._build()
+
+    # ---- lookups --------------------------------------------------------
+
+    def recipes(self, kind):
+        self._ensure_built()
+        return list(self._recipes.get(kind, {}).values())
+
+    def get(self, kind, output_id):
+        self._ensure_built()
+        return self._recipes.get(kind, {}).get(output_id)
+
+    def get_dish(self, recipe_id):
+        """Recipe for a recipes.recipeid (cauldron recipes are selected by id)."""
+        self._ensure_built()
+        return self._dishes_by_recipe.get(recipe_id)
+
+    def ingredient_ids(self, *kinds):
+        """Every item id used by recipes of the given kinds (for CraftingSnapshot.load)."""
+        self._ensure_built()
+        return sorted({item_id for kind in kinds for item_id in self._by_ingredient.get(kind, ())})
+
+    async def load_snapshot(self, db, *kinds, player_id=None, discord_id=None):
+        """One query: the player's holdings of every ingredient the given kinds use."""
+        self._ensure_built()
+        include_fish = any(r.fish for kind in kinds for r in self._recipes.get(kind, {}).values())
+        return await CraftingSnapshot.load(db, self.ingredient_ids(*kinds), include_fish,
+                                           player_id=player_id, discord_id=discord_id)
+
+    # ---- availability ---------------------------------------------------
+
+    @staticmethod
+    def shortfall(recipe, items, fish=None):
+        """First unmet requirement as (kind, id or fish name, needed, have), or None.
+
+        items: {item_id: quantity}; fish: {fish name: count}.
+        """
+        for item_id, quantity in recipe.ingredients:
+            have = items.get(item_id, 0)
+            if have < quantity:
+                return ('item', item_id, quantity, have)
+        fish = fish or {}
+        for name, quantity in recipe.fish:
+            have = sum(fish.values()) if name == ANY_FISH else fish.get(name, 0)
+            if have < quantity:
+                return ('fish', name, quantity, have)
+        return None
+
+    @staticmethod
+    def times_craftable(recipe, snapshot):
+        """How many times the snapshot's holdings cover the recipe (0 if level too low)."""
+        if recipe.level is not None and snapshot.smithing_level < recipe.level:
+            return 0
+        counts = [snapshot.items.get(item_id, 0) // quantity for item_id, quantity in recipe.ingredients]
+        for name, quantity in recipe.fish:
+            have = snapshot.fish_total if name == ANY_FISH else snapshot.fish.get(name, 0)
+            counts.append(have // quantity)
+        return min(counts) if counts else 0
+
+    def available(self, snapshot, kind):
+        """[(Recipe, times craftable)] the player can make now, in recipe order."""
+        self._ensure_built()
+        compiled = self._recipes.get(kind, {})
+        index = self._by_ingredient.get(kind, {})
+        candidates = set()
+        for item_id in snapshot.items:
+            candidates |= index.get(item_id, set())
+        # Fish-only recipes are not in the ingredient index
+        candidates |= {r.output_id for r in compiled.values() if not r.ingredients and r.fish}
+
+        result = []
+        for output_id, recipe in compiled.items():
+            if output_id in candidates:
+                times = self.times_craftable(recipe, snapshot)
+                if times > 0:
+                    result.append((recipe, times))
+        return result
@@ -0,0 +1,238 @@
+"""
+Dice notation compiler.
+
+compile_dice("1d6+1d4+2") parses a notation once and returns a cached DiceExpression
+that can be rolled in one call and reports its min/max/mean/distribution for display.
+Weapons, abilities and consumables all go through here.
+
+Supported terms (joined with + or -):
+    NdS       N dice with S sides (N defaults to 1)
+    NdSkhK    roll N, keep the highest K (k is short for kh)
+    NdSklK    roll N, keep the lowest K
+    NdSadv    roll the term twice, keep the higher total (advantage)
+    NdSdis    roll the term twice, keep the lower total (disadvantage)
+    C         flat number
+
+Dice follow the game's 0-X convention: a dS rolls 0..S inclusive.
+"""
+import random
+import re
+from functools import lru_cache, cached_property
+from math import comb
+
+DIE_LOW = 0
+
+_TERM_RE = re.compile(
+    r"([+-])?\s*(?:(\d*)d(\d+)(?:(kh|kl|k)(\d+)|(adv|dis))?|(\d+))",
+    re.IGNORECASE
+)
+
+
+def _convolve(a: dict, b: dict) -> dict:
+    result = {}
+    for x, px in a.items():
+        for y, py in b.items():
+            result[x + y] = result.get(x + y, 0) + px * py
+    return result
+
+
+def _best_of_two(dist: dict, highest: bool) -> dict:
+    """Distribution of max (or min) of two independent rolls with distribution dist."""
+    values = sorted(dist, reverse=not highest)
+    result = {}
+    below = 0.0
+    for v in values:
+        p = dist[v]
+        # P(best == v) = P(best <= v) - P(best < v), ordered in the "worse first" direction
+        result[v] = (below + p) ** 2 - below ** 2
+        below += p
+    return result
+
+
+class DiceTerm:
+    """One NdS group, optionally keeping the highest/lowest `keep` dice or rolled with advantage."""
+
+    def __init__(self, count: int, sides: int, sign: int = 1, keep: int = None,
+                 keep_highest: bool = True, advantage: str = None):
+        if count < 1 or sides < 1:
+            raise ValueError("Dice need at least one die and one side")
+        self.count = count
+        self.sides = sides
+        self.sign = sign
+        self.keep = min(keep, count) if keep is not None else None
+        self.keep_highest = keep_highest
+        self.advantage = advantage
+        self.faces = tuple(range(DIE_LOW, sides + 1))
+
+    def roll_once(self, rng=random):
+        rolls = rng.choices(self.faces, k=self.count)
+        if self.keep is not None:
+            rolls.sort(reverse=self.keep_highest)
+            rolls = rolls[:self.keep]
+        return sum(rolls)
+
+    def roll(self, rng=random):
+        total = self.roll_once(rng)
+        if self.advantage:
+            other = self.roll_once(rng)
+            total = max(total, other) if self.advantage == 'adv' else min(total, other)
+        return self.sign * total
+
+    @property
+    def min(self):
+        kept = self.keep if self.keep is not None else self.count
+        low, high = kept * DIE_LOW, kept * self.sides
+        return self.sign * (low if self.sign > 0 else high)
+
+    @property
+    def max(self):
+        kept = self.keep if self.keep is not None else self.count
+        low, high = kept * DIE_LOW, kept * self.sides
+        return self.sign * (high if self.sign > 0 else low)
+
+    def distribution(self) -> dict:
+        faces = len(self.faces)
+        if self.keep is None:
+            die = {f: 1.0 / faces for f in self.faces}
+            dist = {0: 1.0}
+            for _ in range(self.count):
+                dist = _convolve(dist, die)
+        else:
+            dist = self._keep_distribution()
+        if self.advantage:
+            dist = _best_of_two(dist, self.advantage == 'adv')
+        return {self.sign * v: p for v, p in dist.items()}
+
+    def _keep_distribution(self) -> dict:
+        # Walk the faces from best to worst; the first `keep` dice placed are the kept ones.
+        # State is (dice placed so far, kept total); counts are ordered outcomes.
+        order = reversed(self.faces) if self.keep_highest else self.faces
+        states = {(0, 0): 1}
+        for face in order:
+            next_states = {}
+            for (placed, total), ways in states.items():
+                left = self.count - placed
+                for c in range(left + 1):
+                    kept = min(c, max(0, self.keep - placed))
+                    key = (placed + c, total + kept * face)
+                    next_states[key] = next_states.get(key, 0) + ways * comb(left, c)
+            states = next_states
+        outcomes = len(self.faces) ** self.count
+        return {total: ways / outcomes for (placed, total), ways in states.items() if placed == self.count}
+
+    def __str__(self):
+        text = f"{self.count}d{self.sides}"
+        if self.keep is not None:
+            text += f"{'kh' if self.keep_highest else 'kl'}{self.keep}"
+        if self.advantage:
+            text += self.advantage
+        return text
+
+
+class DiceExpression:
+    """A compiled dice notation: a list of dice terms plus a flat modifier."""
+
+    def __init__(self, notation: str, terms, modifier: int = 0):
+        self.notation = notation
+        self.terms = tuple(terms)
+        self.modifier = modifier
+
+    @property
+    def is_flat(self):
+        return not self.terms
+
+    def roll(self, rng=random) -> int:
+        total = self.modifier
+        for term in self.terms:
+            total += term.roll(rng)
+        return total
+
+    @property
+    def min(self) -> int:
+        return self.modifier + sum(t.min for t in self.terms)
+
+    @property
+    def max(self) -> int:
+        return self.modifier + sum(t.max for t in self.terms)
+
+    @cached_property
+    def distribution(self) -> dict:
+        """{total: probability}, sorted by total."""
+        dist = {self.modifier: 1.0}
+        for term in self.terms:
+            dist = _convolve(dist, term.distribution())
+        return dict(sorted(dist.items()))
+
+    @cached_property
+    def mean(self) -> float:
+        return sum(v * p for v, p in self.distribution.items())
+
+    def describe(self) -> str:
+        """Short text for embeds, e.g. "1d6+2 (2 to 8, avg 5)"."""
+        if self.is_flat:
+            return str(self.modifier)
+        return f"{self.notation} ({self.min} to {self.max}, avg {round(self.mean, 1):g})"
+
+    def __str__(self):
+        return self.notation
+
+
+@lru_cache(maxsize=1024)
+def compile_dice(notation) -> DiceExpression:
+    """Parse a dice notation (or plain number) into a cached DiceExpression."""
+    if notation is None:
+        return DiceExpression('0', [], 0)
+    text = re.sub(r"\s*([+-])\s*", r"\1", str(notation).strip())
+    if not text:
+        return DiceExpression('0', [], 0)
+
+    terms = []
+    modifier = 0
+    pos = 0
+    while pos < len(text):
+        match = _TERM_RE.match(text, pos)
+        if not match or match.end() == pos or (pos > 0 and not match.group(1)):
+            raise ValueError(f"Invalid dice notation: {notation}")
+        sign = -1 if match.group(1) == '-' else 1
+        count, sides, keep_kind, keep, advantage, flat = match.group(2, 3, 4, 5, 6, 7)
+        if flat is not None:
+            modifier += sign * int(flat)
+        else:
+            terms.append(DiceTerm(
+                int(count) if count else 1,
+                int(sides),
+                sign=sign,
+                keep=int(keep) if keep else None,
+                keep_highest=(keep_kind or 'kh').lower() != 'kl',
+                advantage=advantage.lower() if advantage else None
+            ))
+        pos = match.end()
+
+    return DiceExpression(text, terms, modifier)
+
+
+def roll(notation, rng=random) -> int:
+    return compile_dice(notation).roll(rng)
+
+
+def roll_amount(value, rng=random) -> int:
+    """Resolve an amount that may be a plain number or a dice notation (e.g. consumable effects)."""
+    if isinstance(value, (int, float)):
+        return value
+    return compile_dice(value).roll(rng)
+
+
+def average(notation) -> float:
+    """Mean of a dice notation, 0 if it is empty or does not parse."""
+    try:
+        return compile_dice(notation).mean
+    except ValueError:
+        return 0.0
+
+
+def describe(notation) -> str:
+    """Display text for a dice notation; falls back to the raw value if it does not parse."""
+    try:
+        return compile_dice(notation).describe()
+    except ValueError:
+        return str(notation)
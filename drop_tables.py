@@ -0,0 +1,156 @@
+"""
+Weighted drop tables (fish, ore deposits, trees) sampled in O(1) with Walker/Vose alias tables.
+
+Tables are built from the GameDataCache the first time a key is rolled and kept until
+the source tables are refreshed (GameDataCache.refresh calls DropTables.invalidate).
+Every roll takes an optional ``rng`` (anything with ``random()``), and DropTables
+accepts a seed, so drop rates can be checked by sampling.
+"""
+import random
+
+
+class AliasTable:
+    """Vose's alias method over a list of entries and their (unnormalized) weights."""
+
+    __slots__ = ('entries', 'probabilities', '_prob', '_alias')
+
+    def __init__(self, entries, weights):
+        weights = [max(0.0, float(w or 0)) for w in weights]
+        if not entries:
+            raise ValueError("AliasTable needs at least one entry")
+        total = sum(weights)
+        if total <= 0:
+            # Nothing has a weight: fall back to a uniform pick
+            weights = [1.0] * len(entries)
+            total = float(len(entries))
+
+        n = len(entries)
+        self.entries = list(entries)
+        self.probabilities = [w / total for w in weights]
+        scaled = [p * n for p in self.probabilities]
+        self._prob = [0.0] * n
+        self._alias = [0] * n
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Leftovers are 1 up to floating point error
+        for i in large + small:
+            self._prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sample(self, rng=random):
+        u = rng.random() * len(self.entries)
+        i = int(u)
+        if i >= len(self.entries):  # u can round up to n
+            i = len(self.entries) - 1
+        return self.entries[i] if u - i < self._prob[i] else self.entries[self._alias[i]]
+
+
+# Fishing rarity weights; high level anglers (over 300k fishing XP) get a small boost
+FISH_RARITY_WEIGHTS = {
+    "common": 51,
+    "uncommon": 25,
+    "rare": 15,
+    "very_rare": 8,
+    "legendary": 1,
+}
+HIGH_LEVEL_FISHING_XP = 300000
+HIGH_LEVEL_RARITY_BONUS = {
+    "common": -2,
+    "uncommon": 2,
+    "rare": 3,
+    "very_rare": 1,
+    "legendary": 1,
+}
+
+
+class DropTables:
+    """Lazily built alias tables per (location, rod type, rarity), per location's ores and trees."""
+
+    # Cached game table -> the kinds of drop tables built from it
+    SOURCES = {
+        'fish': ('fish',),
+        'ores': ('ores',),
+        'material_tiers': ('ores',),
+        'trees': ('trees',),
+    }
+
+    def __init__(self, game_data, seed=None):
+        self.game_data = game_data
+        self.rng = random.Random(seed) if seed is not None else random
+        self._tables = {}  # (kind, *key) -> AliasTable or None when there is nothing to drop
+        self._rarity = {
+            high_level: AliasTable(
+                list(FISH_RARITY_WEIGHTS),
+                [w + (HIGH_LEVEL_RARITY_BONUS[r] if high_level else 0) for r, w in FISH_RARITY_WEIGHTS.items()]
+            )
+            for high_level in (False, True)
+        }
+
+    def invalidate(self, tables=None):
+        """Drop tables built from the given game tables (all of them by default)."""
+        if tables is None:
+            self._tables.clear()
+            return
+        kinds = {kind for table in tables for kind in self.SOURCES.get(table, ())}
+        for key in [k for k in self._tables if k[0] in kinds]:
+            del self._tables[key]
+
+    def _table(self, key, build):
+        try:
+            return self._tables[key]
+        except KeyError:
+            table = self._tables[key] = build()
+            return table
+
+    def _roll(self, key, build, rng):
+        table = self._table(key, build)
+        return table.sample(rng or self.rng) if table else None
+
+    # ---- fishing --------------------------------------------------------
+
+    def roll_fish_rarity(self, fishing_xp: int, rng=None):
+        return self._rarity[fishing_xp > HIGH_LEVEL_FISHING_XP].sample(rng or self.rng)
+
+    def fish_table(self, location, rod_type, rarity):
+        def build():
+            fish = [
+                f for f in self.game_data.get_fish_at(str(location), rod_type)
+                if (f.get('qualitytier') or '').lower() == rarity
+            ]
+            if not fish:
+                return None
+            return AliasTable(fish, [
+                float(f.get('catch_probability') or 0) * float(f.get('drop_modifier') if f.get('drop_modifier') is not None else 1.0)
+                for f in fish
+            ])
+        return self._table(('fish', str(location), rod_type, rarity), build)
+
+    def roll_fish(self, location, rod_type, rarity, rng=None):
+        """A fish row of the given rarity for a location and rod type, or None."""
+        table = self.fish_table(location, rod_type, rarity)
+        return table.sample(rng or self.rng) if table else None
+
+    # ---- gathering ------------------------------------------------------
+
+    def roll_ore(self, location_id: int, rng=None):
+        """An ore deposit at the location weighted by ores.probability (only ores with a known tier)."""
+        def build():
+            deposits = [o for o in self.game_data.get_ores_at(location_id) if self.game_data.get_tier(o['oretype']) is not None]
+            return AliasTable(deposits, [o.get('probability') for o in deposits]) if deposits else None
+        return self._roll(('ores', location_id), build, rng)
+
+    def roll_tree(self, location_id: int, rng=None):
+        """A tree at the location weighted by trees.probability."""
+        def build():
+            trees = self.game_data.get_trees_at(location_id)
+            return AliasTable(trees, [t.get('probability') for t in trees]) if trees else None
+        return self._roll(('trees', location_id), build, rng)
@@ -0,0 +1,243 @@
+import logging
+import random
+
+from drop_tables import DropTables
+from world_graph import WorldGraph
+from location_buttons import LocationButtonPlans
+from crafting import CraftingEngine
+
+
+class GameDataCache:
+    """In-memory copy of the static game tables (items, enemies, locations, recipes, ...).
+
+    Loaded once at startup and refreshed when Postgres sends NOTIFY game_data_changed
+    (see migrations/add_game_data_notify_triggers.sql) through the shared
+    NotificationListener. The payload is the table name; an empty payload reloads everything.
+    """
+
+    CHANNEL = 'game_data_changed'
+
+    # table name -> query used to load it
+    TABLES = {
+        'items': "SELECT * FROM items",
+        'enemies': "SELECT * FROM enemies",
+        'enemyloot': "SELECT * FROM enemyloot",
+        'locations': "SELECT * FROM locations",
+        'paths': "SELECT * FROM paths",
+        'material_tiers': "SELECT * FROM material_tiers",
+        'recipes': "SELECT * FROM recipes ORDER BY recipeid",
+        'fish': "SELECT * FROM fish",
+        'trees': "SELECT * FROM trees",
+        'ores': "SELECT * FROM ores",
+        'location_commands': "SELECT * FROM location_commands",
+        'location_skill_requirements': "SELECT * FROM location_skill_requirements",
+        'dynamic_npcs': "SELECT * FROM dynamic_npcs",
+    }
+
+    def __init__(self, db):
+        self.db = db
+        self.loaded = False
+        self._reset()
+        # Fish/ore/tree alias tables, rebuilt lazily after the tables they come from change
+        self.drop_tables = DropTables(self)
+        # Travel adjacency/requirements/routes over locations and paths
+        self.world = WorldGraph(self)
+        # Compiled location_commands buttons per location
+        self.button_plans = LocationButtonPlans(self)
+        # Normalized bar/armor/tool/weapon/dish recipes with an ingredient index
+        self.crafting = CraftingEngine(self)
+
+    def _reset(self):
+        self.items = {}
+        self.items_by_name = {}
+        self.enemies = {}
+        self.enemies_by_location = {}
+        self.enemy_loot_by_enemy = {}
+        self.locations = {}
+        self.locations_by_name = {}
+        self.paths_from = {}
+        self.material_tiers = {}
+        self.recipes = {}
+        self.recipes_by_dish = {}
+        self.fish_by_location = {}
+        self.trees_by_location = {}
+        self.ores_by_location = {}
+        self.commands_by_location = {}
+        self.skill_requirements_by_location = {}
+        self.dynamic_npcs_by_name = {}
+
+    async def load(self):
+        """Load every cached table."""
+        await self.refresh()
+        self.loaded = True
+        logging.info(f"Game data cache loaded: {len(self.items)} items, {len(self.enemies)} enemies, "
+                     f"{len(self.locations)} locations, {len(self.recipes)} recipes")
+
+    async def refresh(self, tables=None):
+        """Reload the given tables (all of them by default) from the database."""
+        tables = [t for t in (tables or self.TABLES) if t in self.TABLES]
+        async with self.db.pool.acquire() as conn:
+            for table in tables:
+                try:
+                    rows = await conn.fetch(self.TABLES[table])
+                except Exception as e:
+                    logging.error(f"Error loading {table} into game data cache: {e}")
+                    continue
+                getattr(self, f"_index_{table}")([dict(r) for r in rows])
+                self.drop_tables.invalidate([table])
+                self.world.invalidate([table])
+                self.button_plans.invalidate([table])
+                self.crafting.invalidate([table])
+
+    # ---- indexing -------------------------------------------------------
+
+    def _index_items(self, rows):
+        self.items = {r['itemid']: r for r in rows}
+        self.items_by_name = {r['name'].lower(): r for r in rows if r.get('name')}
+
+    def _index_enemies(self, rows):
+        self.enemies = {r['enemyid']: r for r in rows}
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r.get('locationid'), []).append(r)
+        self.enemies_by_location = by_location
+
+    def _index_enemyloot(self, rows):
+        by_enemy = {}
+        for r in rows:
+            by_enemy.setdefault(r['enemyid'], []).append(r)
+        self.enemy_loot_by_enemy = by_enemy
+
+    def _index_locations(self, rows):
+        self.locations = {r['locationid']: r for r in rows}
+        self.locations_by_name = {r['name'].lower(): r for r in rows if r.get('name')}
+
+    def _index_paths(self, rows):
+        paths_from = {}
+        for r in rows:
+            paths_from.setdefault(r['from_location_id'], []).append(r)
+        self.paths_from = paths_from
+
+    def _index_material_tiers(self, rows):
+        self.material_tiers = {r['material_name']: r['tier_level'] for r in rows}
+
+    def _index_recipes(self, rows):
+        self.recipes = {r['recipeid']: r for r in rows}
+        self.recipes_by_dish = {}
+        for r in rows:
+            self.recipes_by_dish.setdefault(r['dish_itemid'], r)
+
+    def _index_fish(self, rows):
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r.get('location'), []).append(r)
+        self.fish_by_location = by_location
+
+    def _index_trees(self, rows):
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r['locationid'], []).append(r)
+        self.trees_by_location = by_location
+
+    def _index_ores(self, rows):
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r['locationid'], []).append(r)
+        self.ores_by_location = by_location
+
+    def _index_location_commands(self, rows):
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r['locationid'], []).append(r)
+        self.commands_by_location = by_location
+
+    def _index_location_skill_requirements(self, rows):
+        by_location = {}
+        for r in rows:
+            by_location.setdefault(r['locationid'], []).append(r)
+        self.skill_requirements_by_location = by_location
+
+    def _index_dynamic_npcs(self, rows):
+        self.dynamic_npcs_by_name = {r['name'].lower(): r for r in rows if r.get('name')}
+
+    # ---- lookups --------------------------------------------------------
+
+    def get_item(self, item_id: int):
+        return self.items.get(item_id)
+
+    def get_item_by_name(self, name: str):
+        return self.items_by_name.get(name.lower()) if name else None
+
+    def get_item_name(self, item_id: int):
+        item = self.items.get(item_id)
+        return item['name'] if item else None
+
+    def get_enemy(self, enemy_id: int):
+        return self.enemies.get(enemy_id)
+
+    def get_enemies_at(self, location_id: int):
+        return self.enemies_by_location.get(location_id, [])
+
+    def pick_enemies(self, location_id: int, count: int):
+        """Random distinct enemies for a location (same as ORDER BY RANDOM() LIMIT count)."""
+        enemies = self.get_enemies_at(location_id)
+        return random.sample(enemies, min(count, len(enemies)))
+
+    def get_enemy_loot(self, enemy_id: int):
+        return self.enemy_loot_by_enemy.get(enemy_id, [])
+
+    def get_location(self, location_id: int):
+        return self.locations.get(location_id)
+
+    def get_location_by_name(self, name: str):
+        return self.locations_by_name.get(name.lower()) if name else None
+
+    def get_paths_from(self, location_id: int):
+        return self.paths_from.get(location_id, [])
+
+    def get_tier(self, material_name: str):
+        return self.material_tiers.get(material_name)
+
+    def get_recipe(self, recipe_id: int):
+        return self.recipes.get(recipe_id)
+
+    def get_recipe_for_dish(self, dish_itemid: int):
+        return self.recipes_by_dish.get(dish_itemid)
+
+    def get_all_recipes(self):
+        return list(self.recipes.values())
+
+    def get_fish_at(self, location: str, rod_type: str = None):
+        fish = self.fish_by_location.get(location, [])
+        if rod_type is not None:
+            fish = [f for f in fish if f.get('rodtype') == rod_type]
+        return fish
+
+    def get_trees_at(self, location_id: int):
+        return self.trees_by_location.get(location_id, [])
+
+    def get_ores_at(self, location_id: int):
+        return self.ores_by_location.get(location_id, [])
+
+    def get_location_commands(self, location_id: int):
+        return self.commands_by_location.get(location_id, [])
+
+    def get_skill_requirements(self, location_id: int):
+        return self.skill_requirements_by_location.get(location_id, [])
+
+    def get_dynamic_npc_by_name(self, name: str):
+        return self.dynamic_npcs_by_name.get(name.lower()) if name else None
+
+    # ---- change notifications -------------------------------------------
+
+    def start_listening(self, notifications):
+        """Refresh tables when game_data_changed arrives (bursts on one table reload it once)."""
+        notifications.register(self.CHANNEL, self._on_notify, key=lambda payload: payload or '*', coalesce_delay=1.0)
+
+    async def _on_notify(self, payloads):
+        tables = [payloads[0]] if payloads[0] else None
+        try:
+            await self.refresh(tables)
+            logging.info(f"Game data cache refreshed: {', '.join(tables) if tables else 'all tables'}")
+        except Exception as e:
+            logging.error(f"Error refreshing game data cache: {e}")
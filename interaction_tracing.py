@@ -0,0 +1,194 @@
+"""
+Latency tracing for component callbacks and slash commands.
+
+InteractionTracer.attach(bot) adds a pre-run and post-run hook to every loaded
+Extension. Each interaction gets a Trace (kept in a ContextVar, so it follows the
+handler through awaits) that records:
+
+- time to the first response (send / defer / edit_origin),
+- time spent in Database helper queries (add_db_time, called by Database),
+- time spent in Discord HTTP calls on the context (instrument_context_class),
+- total handler time.
+
+Discord drops interactions that are not answered within 3 seconds, so a handler
+that has not responded after ``warn_after`` seconds is logged while it is still
+running. Recent traces are kept per handler for the p50/p95/p99 table.
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from query_stats import fold_action, set_origin
+
+ACK_DEADLINE = 3.0
+
+# Context methods that answer the interaction (the first call is the acknowledgement)
+RESPONSE_METHODS = ('send', 'respond', 'defer', 'edit_origin')
+# Other context methods that talk to Discord
+HTTP_METHODS = ('edit', 'delete', 'send_modal')
+
+current_trace = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    __slots__ = ('handler', 'started', 'first_response', 'db', 'http', 'finished', '_warning')
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.started = time.perf_counter()
+        self.first_response = None  # seconds after start
+        self.db = 0.0
+        self.http = 0.0
+        self.finished = False
+        self._warning = None
+
+
+def add_db_time(elapsed):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.db += elapsed
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def instrument_context_class(cls):
+    """Time the Discord calls of a context class and mark the first response of each trace."""
+    for name in RESPONSE_METHODS + HTTP_METHODS:
+        method = cls.__dict__.get(name) or getattr(cls, name, None)
+        if method is None or getattr(method, '_traced', False):
+            continue
+        setattr(cls, name, _traced_method(method, name in RESPONSE_METHODS))
+
+
+def _traced_method(method, is_response):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        trace = current_trace.get()
+        if trace is None:
+            return await method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            trace.http += end - start
+            if is_response and trace.first_response is None:
+                trace.first_response = end - trace.started
+                if trace._warning:
+                    trace._warning.cancel()
+    wrapper._traced = True
+    return wrapper
+
+
+class InteractionTracer:
+    """Per-handler latency samples, filled by the Extension pre/post-run hooks."""
+
+    def __init__(self, warn_after: float = 2.5, window: int = 500):
+        self.warn_after = warn_after
+        self.window = window
+        self._samples = {}  # handler -> deque[(total, first_response, db, http)]
+        self.missed_acks = {}  # handler -> count of first responses after ACK_DEADLINE
+        self._report_task = None
+
+    def attach(self, bot):
+        """Trace every command and component callback of the Extensions loaded so far."""
+        for extension in list(bot.ext.values()):
+            name = type(extension).__name__
+
+            async def prerun(ctx, *args, _name=name, **kwargs):
+                self.start(_name, ctx)
+
+            async def postrun(ctx, *args, **kwargs):
+                self.finish()
+
+            extension.add_extension_prerun(prerun)
+            extension.add_extension_postrun(postrun)
+
+    # ---- traces ---------------------------------------------------------
+
+    def start(self, extension, ctx):
+        action = getattr(ctx, 'custom_id', None) or getattr(ctx, 'invoke_target', None)
+        set_origin(extension, action)
+        trace = Trace(f"{extension}/{fold_action(action) or '-'}")
+        current_trace.set(trace)
+        loop = asyncio.get_running_loop()
+        trace._warning = loop.call_later(self.warn_after, self._warn_unanswered, trace)
+        # Post-run hooks are skipped when the handler raises; finish when the task ends instead
+        task = asyncio.current_task()
+        if task is not None:
+            task.add_done_callback(lambda _task, trace=trace: self._finish(trace))
+        return trace
+
+    def finish(self):
+        trace = current_trace.get()
+        if trace is not None:
+            self._finish(trace)
+
+    def _finish(self, trace):
+        if trace.finished:
+            return
+        trace.finished = True
+        if trace._warning:
+            trace._warning.cancel()
+        total = time.perf_counter() - trace.started
+        samples = self._samples.get(trace.handler)
+        if samples is None:
+            samples = self._samples[trace.handler] = deque(maxlen=self.window)
+        samples.append((total, trace.first_response, trace.db, trace.http))
+        if trace.first_response is not None and trace.first_response > ACK_DEADLINE:
+            self.missed_acks[trace.handler] = self.missed_acks.get(trace.handler, 0) + 1
+            logging.warning(f"{trace.handler} answered after {trace.first_response:.2f}s "
+                            f"(db {trace.db:.2f}s, http {trace.http:.2f}s, total {total:.2f}s)")
+
+    def _warn_unanswered(self, trace):
+        if trace.first_response is None and not trace.finished:
+            logging.warning(f"{trace.handler} has not responded or deferred after {self.warn_after:.1f}s "
+                            f"(db {trace.db:.2f}s so far)")
+
+    # ---- reporting ------------------------------------------------------
+
+    def table(self, limit=15):
+        """Handlers by p95 total time: count, p50/p95/p99 total, p95 first response, avg db/http (ms)."""
+        rows = []
+        for handler, samples in self._samples.items():
+            totals = sorted(s[0] for s in samples)
+            firsts = sorted(s[1] for s in samples if s[1] is not None)
+            rows.append((
+                _percentile(totals, 95), handler, len(samples),
+                _percentile(totals, 50), _percentile(totals, 99), _percentile(firsts, 95),
+                sum(s[2] for s in samples) / len(samples), sum(s[3] for s in samples) / len(samples),
+            ))
+        rows.sort(reverse=True)
+        lines = ["    n    p50    p95    p99  ack95     db   http  handler"]
+        for p95, handler, n, p50, p99, ack95, db, http in rows[:limit]:
+            missed = self.missed_acks.get(handler)
+            lines.append(f"{n:>5} {p50 * 1000:>6.0f} {p95 * 1000:>6.0f} {p99 * 1000:>6.0f} {ack95 * 1000:>6.0f} "
+                         f"{db * 1000:>6.0f} {http * 1000:>6.0f}  {handler}" + (f" ({missed} late)" if missed else ""))
+        return "\n".join(lines)
+
+    def start_reporting(self, interval: float):
+        """Log table() every interval seconds (0 disables)."""
+        if interval and self._report_task is None:
+            self._report_task = asyncio.create_task(self._report_loop(interval))
+
+    async def stop_reporting(self):
+        if self._report_task:
+            self._report_task.cancel()
+            try:
+                await self._report_task
+            except asyncio.CancelledError:
+                pass
+            self._report_task = None
+
+    async def _report_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if self._samples:
+                logging.info(f"Handler latency (ms):\n{self.table()}")
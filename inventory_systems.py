@@ -1,4 +1,5 @@
 from Inventory import Inventory
+from dice import roll_amount
 from interactions import Extension, component_callback, Button, ButtonStyle, ComponentContext, StringSelectMenu, StringSelectOption
 import re
 
@@ -11,15 +12,9 @@ class InventorySystem(Extension):
         return Inventory(self.db, player_id)
 
     async def display_inventory(self, ctx, player_id):
-        # Get the player's current location and check if it's a bank
-        player_data = await self.db.fetchrow("""
-            SELECT l.type AS location_type, pd.current_location
-            FROM player_data pd
-            JOIN locations l ON l.locationid = pd.current_location
-            WHERE pd.playerid = $1
-        """, player_id)
-
-        is_at_bank = player_data and player_data['location_type'].lower() == "bank"
+        # Check if the player's current location is a bank (snapshot is shared with the rest of this interaction)
+        snapshot = await self.bot.player_snapshots.load(ctx)
+        is_at_bank = snapshot is not None and snapshot.player_id == player_id and snapshot.at_bank
 
         # Only show unequipped items in main inventory
         inventory_items = await self.db.fetch("""
@@ -265,7 +260,7 @@ class InventorySystem(Extension):
     async def consume_food(self, ctx, player_id, item_id, item_name):
         """Handle food consumption with healing and other effects."""
         # Get food effects based on item name
-        food_effects = self.get_food_effects(item_name)
+        food_effects = self.roll_food_effects(item_name)
         
         if not food_effects:
             await ctx.send(f"{item_name} cannot be consumed.", ephemeral=True)
@@ -345,7 +340,8 @@ class InventorySystem(Extension):
         await ctx.send(message, ephemeral=True)
     
     def get_food_effects(self, item_name):
-        """Get the effects of a food item. Returns dict with health, mana, stamina, and future modifiers."""
+        """Get the effects of a food item. Returns dict with health, mana, stamina, and future modifiers.
+        Values are flat numbers or dice notation."""
         # Food healing values
         food_effects_map = {
             'Chips': {'health': 10},
@@ -356,6 +352,13 @@ class InventorySystem(Extension):
         
         # Return effects for this food item, or None if not found
         return food_effects_map.get(item_name)
+
+    def roll_food_effects(self, item_name):
+        """Food effects with any dice notation (e.g. 'health': '2d6+4') rolled to numbers."""
+        food_effects = self.get_food_effects(item_name)
+        if not food_effects:
+            return None
+        return {effect: roll_amount(value) for effect, value in food_effects.items()}
     
     async def show_player_locator(self, ctx, player_id):
         """Display all players with their location, HP, mana, and stamina."""
@@ -395,15 +398,14 @@ class InventorySystem(Extension):
                 players_by_location[location] = []
             players_by_location[location].append(player)
         
+        # Resolve every player's name at once instead of one fetch per row
+        identities = await self.bot.identities.resolve_many(p['playerid'] for p in all_players)
+
         # Add fields for each location
         for location, players in sorted(players_by_location.items()):
             player_list = []
             for p in players:
-                try:
-                    user = await self.bot.fetch_user(p['discord_id'])
-                    player_name = user.display_name if user else f"Player {p['playerid']}"
-                except:
-                    player_name = f"Player {p['playerid']}"
+                player_name = identities[p['playerid']].name
                 
                 player_list.append(
                     f"**{player_name}** - HP: {p['health']}, Mana: {p['mana']}, Stamina: {p['stamina']}"
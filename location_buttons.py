@@ -0,0 +1,97 @@
+"""
+Precompiled location UI buttons.
+
+Each location's ``location_commands`` rows are turned into a ButtonPlan once (styles
+mapped, talk_to_ buttons resolved to their dynamic NPC) and kept until
+location_commands or dynamic_npcs are refreshed. Rendering a plan for a player takes
+at most one query, and none when no button has a quest or item condition.
+"""
+from interactions import Button, ButtonStyle
+
+BUTTON_STYLES = {
+    'PRIMARY': ButtonStyle.PRIMARY,
+    'SUCCESS': ButtonStyle.SUCCESS,
+    'DANGER': ButtonStyle.DANGER,
+    'SECONDARY': ButtonStyle.SECONDARY,
+}
+
+
+class ButtonPlan:
+    """The buttons of one location and the quest/item conditions they depend on."""
+
+    __slots__ = ('entries', 'quest_ids', 'item_ids')
+
+    # The player's status for the plan's quests and which of its items they hold
+    CONDITIONS_SQL = """
+        SELECT 'quest' AS kind, quest_id AS id, status
+        FROM player_quests
+        WHERE player_id = $1 AND quest_id = ANY($2::int[])
+        UNION ALL
+        SELECT DISTINCT 'item', itemid, NULL
+        FROM inventory
+        WHERE playerid = $1 AND itemid = ANY($3::int[])
+    """
+
+    def __init__(self, entries):
+        # entries: [(style, label, custom_id, required_quest_id, required_quest_status, required_item_id)]
+        self.entries = entries
+        self.quest_ids = sorted({e[3] for e in entries if e[3] is not None})
+        self.item_ids = sorted({e[5] for e in entries if e[5] is not None})
+
+    async def render(self, db, player_id):
+        """Buttons whose conditions the player meets, in location_commands order."""
+        quest_status, held_items = {}, set()
+        if self.quest_ids or self.item_ids:
+            for row in await db.fetch(self.CONDITIONS_SQL, player_id, self.quest_ids, self.item_ids):
+                if row['kind'] == 'quest':
+                    quest_status[row['id']] = row['status']
+                else:
+                    held_items.add(row['id'])
+
+        buttons = []
+        for style, label, custom_id, quest_id, quest_status_required, item_id in self.entries:
+            if quest_id is not None and quest_status.get(quest_id) != quest_status_required:
+                continue
+            if item_id is not None and item_id not in held_items:
+                continue
+            buttons.append(Button(style=style, label=label, custom_id=custom_id))
+        return buttons
+
+
+class LocationButtonPlans:
+    """ButtonPlan per location, compiled on first use from the game data cache."""
+
+    SOURCES = ('location_commands', 'dynamic_npcs')
+
+    def __init__(self, game_data):
+        self.game_data = game_data
+        self._plans = {}
+
+    def invalidate(self, tables=None):
+        if tables is None or any(t in self.SOURCES for t in tables):
+            self._plans.clear()
+
+    def get(self, location_id):
+        plan = self._plans.get(location_id)
+        if plan is None:
+            plan = self._plans[location_id] = self._compile(location_id)
+        return plan
+
+    def _compile(self, location_id):
+        entries = []
+        for command in self.game_data.get_location_commands(location_id):
+            custom_id = command['custom_id']
+            # talk_to_<name> buttons open the dynamic NPC's dialog
+            if "talk_to_" in command['command_name']:
+                npc = self.game_data.get_dynamic_npc_by_name(command['command_name'].split("talk_to_")[1])
+                if npc:
+                    custom_id = f"npc_dialog_{npc['dynamic_npc_id']}"
+            entries.append((
+                BUTTON_STYLES.get(command.get('button_color') or 'PRIMARY', ButtonStyle.PRIMARY),
+                command['button_label'],
+                custom_id,
+                command.get('required_quest_id'),
+                command.get('required_quest_status'),
+                command.get('required_item_id'),
+            ))
+        return ButtonPlan(entries)
@@ -0,0 +1,80 @@
+"""
+Logging setup shared by every module.
+
+Modules log through ``logging.getLogger(__name__)`` so levels can be set per module.
+Hot paths use %-style arguments (formatted only when the record is emitted) and
+debug level for per-item detail.
+
+Environment:
+    LOG_LEVEL    root level (default INFO)
+    LOG_LEVELS   per-module levels, e.g. "Smith=WARNING,Cooking=DEBUG"
+    LOG_SAMPLE   fraction of below-WARNING records kept per module, e.g. "Mining=0.1,Fishing=0.25"
+    BOT_DEBUG    1 turns on debug mode: DEBUG level for every module and the
+                 verification queries guarded by debug_checks()
+"""
+import logging
+import os
+import random
+
+_debug_mode = False
+
+
+def debug_checks():
+    """True in debug mode; guards extra verification queries that production should not pay for."""
+    return _debug_mode
+
+
+class SampleFilter(logging.Filter):
+    """Keeps a random `rate` fraction of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def _parse_pairs(value):
+    pairs = {}
+    for part in (value or '').split(','):
+        name, sep, setting = part.partition('=')
+        if sep and name.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def configure_logging():
+    """Configure the root logger and per-module levels/sampling from the environment."""
+    global _debug_mode
+    _debug_mode = os.getenv('BOT_DEBUG', '') == '1'
+
+    root_level = 'DEBUG' if _debug_mode else os.getenv('LOG_LEVEL', 'INFO').upper()
+    # An unknown name would make basicConfig raise and stop the bot at import time
+    bad_root_level = not isinstance(logging.getLevelName(root_level), int)
+    logging.basicConfig(
+        level='INFO' if bad_root_level else root_level,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+        force=True,
+    )
+    if bad_root_level:
+        logging.warning(f"Ignoring LOG_LEVEL {root_level}, using INFO")
+    # Library chatter stays at INFO even in debug mode
+    for name in ('asyncio', 'interactions'):
+        logging.getLogger(name).setLevel(max(logging.INFO, logging.getLogger().level))
+
+    for name, level in _parse_pairs(os.getenv('LOG_LEVELS')).items():
+        if not _debug_mode:
+            try:
+                logging.getLogger(name).setLevel(level.upper())
+            except ValueError:
+                logging.warning(f"Ignoring LOG_LEVELS entry {name}={level}")
+
+    for name, rate in _parse_pairs(os.getenv('LOG_SAMPLE')).items():
+        try:
+            logging.getLogger(name).addFilter(SampleFilter(float(rate)))
+        except ValueError:
+            logging.warning(f"Ignoring LOG_SAMPLE entry {name}={rate}")
+
+    if _debug_mode:
+        logging.info("Debug mode: DEBUG logging and verification queries are on")
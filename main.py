@@ -21,6 +21,16 @@ import os
 from dotenv import load_dotenv
 from Mining import setup as mining_setup
 from Battle_System import setup as battle_system_setup
+from battle_state import BattleStateManager
+from turn_scheduler import TurnSchedulers
+from battle_maintenance import BattleMaintenance
+from status_effects import EffectEngine
+from game_data_cache import GameDataCache
+from player_identity import PlayerIdentityCache
+from outbox import Outbox
+from notifications import NotificationListener
+from player_actions import PlayerActionGuard
+from player_snapshot import PlayerSnapshotLoader
 from DynamicNPCModule import setup as setup_dynamic_npc
 from Cooking import setup as cooking_setup
 from Cauldron import setup as cauldron_setup
@@ -29,16 +39,20 @@ from Party_System import setup as party_system_setup, PartySystem
 from Forge import setup as forge_setup
 from Smith import setup as smith_setup
 from general_store import setup as general_store_setup  # Update this import
+from Admin import setup as admin_setup
+from log_config import configure_logging
+from interaction_tracing import InteractionTracer, instrument_context_class
 
 
 
 
 
-logging.basicConfig(level=logging.INFO)
-
 # Load environment variables from .env file
 load_dotenv()
 
+# LOG_LEVEL / LOG_LEVELS / LOG_SAMPLE / BOT_DEBUG, see log_config.py
+configure_logging()
+
 # Load Discord bot token from environment variable
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 if not TOKEN:
@@ -64,6 +78,25 @@ if not DATABASE_DSN:
 db = Database(dsn=DATABASE_DSN)
 bot.db = db  # Attach the database instance to the bot object
 
+# Static game tables (items, enemies, locations, recipes, ...) are loaded once in on_ready
+bot.game_data = GameDataCache(bot.db)
+
+# playerid <-> discord_id <-> Discord user lookups, prewarmed in on_ready
+bot.identities = PlayerIdentityCache(bot, bot.db)
+
+# Background delivery for battle channel posts and DMs: merged per destination, rate limited per route
+bot.outbox = Outbox(bot)
+
+# LISTEN/NOTIFY handlers (quest updates, game data changes) share one pooled connection
+bot.notifications = NotificationListener(bot.db)
+bot.game_data.start_listening(bot.notifications)
+
+# Drops double-clicked mine_/chop_/fish_/hunt_/attack_ buttons and serializes each player's actions
+bot.player_actions = PlayerActionGuard()
+
+# One-query player UI snapshots (vitals, location, inventory usage, active battle), memoized per interaction
+bot.player_snapshots = PlayerSnapshotLoader(bot.db)
+
 logging.info("Loading extensions...")
 
 # Initialize DynamicNPCModule early in the setup process
@@ -104,7 +137,19 @@ walts_setup(bot)
 
 mining_setup(bot)
 
+# Active battles are kept in memory and flushed to the battle_* tables in batches
+bot.battle_states = BattleStateManager(bot.db)
+# Party battle turns: in-memory turn order with a per-turn deadline (TURN_TIMEOUT_SECONDS, 0 disables)
+bot.battle_turns = TurnSchedulers(bot.battle_states, timeout=float(os.getenv('TURN_TIMEOUT_SECONDS', 90)))
+# Active status effects kept in memory; expired rows are purged in batches every EFFECT_PURGE_SECONDS
+bot.effects = EffectEngine(bot.db, purge_interval=float(os.getenv('EFFECT_PURGE_SECONDS', 60)))
 battle_system_setup(bot)
+# Closes abandoned battles and archives finished ones into battle_archive (BATTLE_MAINTENANCE_SECONDS, 0 disables)
+bot.battle_maintenance = BattleMaintenance(
+    bot.db, bot.battle_states, bot.battle_turns, bot.effects,
+    interval=float(os.getenv('BATTLE_MAINTENANCE_SECONDS', 300)),
+    stale_after=float(os.getenv('BATTLE_STALE_SECONDS', 1800)),
+)
 
 cooking_setup(bot)
 
@@ -121,6 +166,9 @@ smith_setup(bot)
 # Setup the GeneralStore extension
 bot.load_extension("general_store")
 
+# /admin perf
+admin_setup(bot)
+
 
 
 
@@ -169,6 +217,10 @@ ComponentContext._original_send = ComponentContext.send
 SlashContext.send = patched_send
 ComponentContext.send = patched_send
 
+# Time Discord calls (send/defer/edit_origin/...) for the interaction tracer
+instrument_context_class(SlashContext)
+instrument_context_class(ComponentContext)
+
 
 
 
@@ -188,18 +240,41 @@ async def talk_to_npc_command(ctx: SlashContext, npc_name: str):
 # Load extensions (including NPCManager)
 bot.load_extension("NPC_Manager")  # This will load the NPC_Manager extension correctly
 
+# Trace every Extension's commands and component callbacks (latency percentiles, late acks)
+# and tag database query stats with the Extension and custom_id/command that issued them
+bot.tracer = InteractionTracer()
+bot.tracer.attach(bot)
+
 
 
 
 # Event listener for when the bot has switched from offline to online.
 @bot.event
 async def on_ready():
-    print(f"Logged in as {bot.me.name}")
+    logging.info(f"Logged in as {bot.me.name}")
     await bot.db.connect()
+    await bot.game_data.load()
+    await bot.identities.prewarm()
+    await bot.notifications.start()
+    bot.battle_states.start()
+    await bot.battle_turns.recover(bot.db)
+    bot.battle_maintenance.start()
+    bot.effects.start()
+    # Log the query stats report periodically (DB_PERF_DUMP_SECONDS=0 turns it off)
+    bot.db.query_stats.start_reporting(float(os.getenv('DB_PERF_DUMP_SECONDS', 900)))
+    bot.tracer.start_reporting(float(os.getenv('DB_PERF_DUMP_SECONDS', 900)))
     await bot.sync_interactions()
 
 
 async def on_shutdown():
+    bot.battle_turns.stop()
+    await bot.battle_maintenance.close()
+    await bot.effects.close()
+    await bot.battle_states.close()
+    await bot.notifications.stop()
+    await bot.db.query_stats.stop_reporting()
+    await bot.tracer.stop_reporting()
+    await bot.outbox.close()
     await bot.db.pool.close()
 
 
@@ -0,0 +1,59 @@
+-- Battle table maintenance: activity/end timestamps, a compact archive of finished battles
+-- and indexes for the active-battle lookups. Used by BattleMaintenance (battle_maintenance.py).
+
+-- last_activity_at is touched on every battle state flush; ended_at/end_reason are set when a battle ends
+ALTER TABLE battle_instances
+ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMP DEFAULT NOW(),
+ADD COLUMN IF NOT EXISTS ended_at TIMESTAMP,
+ADD COLUMN IF NOT EXISTS end_reason VARCHAR(20);
+
+-- One row per finished battle; the detail rows (participants, enemies, effects, logs) are deleted
+CREATE TABLE IF NOT EXISTS battle_archive (
+    instance_id INTEGER PRIMARY KEY,
+    instance_type VARCHAR(50) NOT NULL,
+    location_id INTEGER,
+    created_at TIMESTAMP,
+    ended_at TIMESTAMP,
+    outcome VARCHAR(20) NOT NULL,
+    turns INTEGER DEFAULT 0,
+    player_ids INTEGER[] DEFAULT '{}',
+    survivors INTEGER DEFAULT 0,
+    enemy_ids INTEGER[] DEFAULT '{}',
+    enemies_defeated INTEGER DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_battle_archive_ended_at ON battle_archive(ended_at);
+CREATE INDEX IF NOT EXISTS idx_battle_archive_player_ids ON battle_archive USING GIN (player_ids);
+
+-- ============================================
+-- ACTIVE BATTLE INDEXES
+-- ============================================
+
+-- get_player_battle_instance / player snapshot: newest active battle of a player
+CREATE INDEX IF NOT EXISTS idx_battle_instances_active_created
+    ON battle_instances(created_at DESC)
+    WHERE is_active = true;
+
+-- Stale battle reaper
+CREATE INDEX IF NOT EXISTS idx_battle_instances_active_activity
+    ON battle_instances(last_activity_at)
+    WHERE is_active = true;
+
+-- Compaction: finished battles waiting to be archived
+CREATE INDEX IF NOT EXISTS idx_battle_instances_ended
+    ON battle_instances(instance_id)
+    WHERE is_active = false;
+
+-- Detail rows by battle (loading and batched deletes) and by player
+CREATE INDEX IF NOT EXISTS idx_battle_participants_player
+    ON battle_participants(player_id, instance_id);
+CREATE INDEX IF NOT EXISTS idx_battle_participants_instance
+    ON battle_participants(instance_id);
+CREATE INDEX IF NOT EXISTS idx_battle_enemies_instance
+    ON battle_enemies(instance_id);
+CREATE INDEX IF NOT EXISTS idx_battle_effects_instance_target
+    ON battle_effects(instance_id, target_type, target_id);
+CREATE INDEX IF NOT EXISTS idx_battle_logs_instance
+    ON battle_logs(instance_id);
+
+UPDATE battle_instances SET last_activity_at = created_at WHERE last_activity_at IS NULL;
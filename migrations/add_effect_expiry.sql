@@ -0,0 +1,43 @@
+-- Absolute expiry for status effects (used by EffectEngine in status_effects.py)
+-- Replaces filtering on start_time + (duration * interval '1 second') > NOW(), which no index can serve
+
+ALTER TABLE temporary_effects ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;
+ALTER TABLE battle_effects ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;
+
+UPDATE temporary_effects
+SET expires_at = COALESCE(start_time, NOW()) + COALESCE(duration, 0) * interval '1 second'
+WHERE expires_at IS NULL;
+
+UPDATE battle_effects
+SET expires_at = COALESCE(start_time, NOW()) + COALESCE(duration, 0) * interval '1 second'
+WHERE expires_at IS NULL;
+
+-- Rows inserted without expires_at (manual SQL, older tools) get it from start_time + duration
+CREATE OR REPLACE FUNCTION set_effect_expires_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW.expires_at IS NULL THEN
+        NEW.expires_at := COALESCE(NEW.start_time, NOW()) + COALESCE(NEW.duration, 0) * interval '1 second';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_temporary_effects_expires_at ON temporary_effects;
+CREATE TRIGGER trg_temporary_effects_expires_at
+    BEFORE INSERT ON temporary_effects
+    FOR EACH ROW EXECUTE FUNCTION set_effect_expires_at();
+
+DROP TRIGGER IF EXISTS trg_battle_effects_expires_at ON battle_effects;
+CREATE TRIGGER trg_battle_effects_expires_at
+    BEFORE INSERT ON battle_effects
+    FOR EACH ROW EXECUTE FUNCTION set_effect_expires_at();
+
+-- Active effects of a player / of a battle
+CREATE INDEX IF NOT EXISTS idx_temporary_effects_player_expires
+    ON temporary_effects(player_id, expires_at);
+CREATE INDEX IF NOT EXISTS idx_battle_effects_instance_expires
+    ON battle_effects(instance_id, expires_at);
+
+-- Batched purge of expired rows
+CREATE INDEX IF NOT EXISTS idx_temporary_effects_expires ON temporary_effects(expires_at);
+CREATE INDEX IF NOT EXISTS idx_battle_effects_expires ON battle_effects(expires_at);
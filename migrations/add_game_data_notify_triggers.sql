@@ -0,0 +1,31 @@
+-- Notify the bot when static game data changes so GameDataCache can reload it
+-- Payload is the name of the table that changed
+
+CREATE OR REPLACE FUNCTION notify_game_data_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('game_data_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'items', 'enemies', 'enemyloot', 'locations', 'paths', 'material_tiers',
+        'recipes', 'fish', 'trees', 'ores', 'location_commands', 'location_skill_requirements',
+        'dynamic_npcs'
+    ]
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_game_data_changed ON %I', tbl);
+        -- Statement-level so a bulk UPDATE only sends one notification
+        EXECUTE format(
+            'CREATE TRIGGER trg_game_data_changed
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_game_data_changed()',
+            tbl
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,106 @@
+-- Precomputed player stats
+-- player_stats_view joins eleven equipment slots plus race for every read.
+-- player_stats_cache holds the same columns, one row per player, and is only
+-- recomputed when a player's equipment or race changes (or item/race data changes).
+
+CREATE TABLE IF NOT EXISTS player_stats_cache AS
+    SELECT * FROM player_stats_view WITH NO DATA;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'player_stats_cache_pkey'
+    ) THEN
+        ALTER TABLE player_stats_cache ADD CONSTRAINT player_stats_cache_pkey PRIMARY KEY (playerid);
+    END IF;
+END;
+$$;
+
+-- Recompute one player's row from the view
+CREATE OR REPLACE FUNCTION refresh_player_stats_cache(p_playerid INTEGER) RETURNS void AS $$
+BEGIN
+    DELETE FROM player_stats_cache WHERE playerid = p_playerid;
+    INSERT INTO player_stats_cache
+        SELECT * FROM player_stats_view WHERE playerid = p_playerid;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute every player (used when items or races are edited)
+CREATE OR REPLACE FUNCTION refresh_all_player_stats_cache() RETURNS void AS $$
+BEGIN
+    DELETE FROM player_stats_cache;
+    INSERT INTO player_stats_cache SELECT * FROM player_stats_view;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGERS
+-- ============================================
+
+-- Equipment slots or race changed on player_data
+CREATE OR REPLACE FUNCTION trg_player_data_stats_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_player_stats_cache(NEW.playerid);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_player_data ON player_data;
+CREATE TRIGGER trg_player_stats_cache_player_data
+    AFTER INSERT OR UPDATE OF head, chest, hands, legs, feet, back, neck,
+                              finger1, finger2, weapon_hand1, weapon_hand2, raceid
+    ON player_data
+    FOR EACH ROW EXECUTE FUNCTION trg_player_data_stats_changed();
+
+-- Items equipped/unequipped through the inventory table
+CREATE OR REPLACE FUNCTION trg_inventory_stats_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_player_stats_cache(OLD.playerid);
+    ELSE
+        PERFORM refresh_player_stats_cache(NEW.playerid);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_inventory_insert ON inventory;
+CREATE TRIGGER trg_player_stats_cache_inventory_insert
+    AFTER INSERT ON inventory
+    FOR EACH ROW WHEN (NEW.isequipped)
+    EXECUTE FUNCTION trg_inventory_stats_changed();
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_inventory_update ON inventory;
+CREATE TRIGGER trg_player_stats_cache_inventory_update
+    AFTER UPDATE OF isequipped, slot, itemid ON inventory
+    FOR EACH ROW WHEN (OLD.isequipped OR NEW.isequipped)
+    EXECUTE FUNCTION trg_inventory_stats_changed();
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_inventory_delete ON inventory;
+CREATE TRIGGER trg_player_stats_cache_inventory_delete
+    AFTER DELETE ON inventory
+    FOR EACH ROW WHEN (OLD.isequipped)
+    EXECUTE FUNCTION trg_inventory_stats_changed();
+
+-- Item or race stats edited: recompute everyone (rare, admin-only)
+CREATE OR REPLACE FUNCTION trg_all_stats_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_all_player_stats_cache();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_items ON items;
+CREATE TRIGGER trg_player_stats_cache_items
+    AFTER INSERT OR UPDATE OR DELETE ON items
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_all_stats_changed();
+
+DROP TRIGGER IF EXISTS trg_player_stats_cache_races ON races;
+CREATE TRIGGER trg_player_stats_cache_races
+    AFTER INSERT OR UPDATE OR DELETE ON races
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_all_stats_changed();
+
+-- Initial fill
+SELECT refresh_all_player_stats_cache();
+
+ANALYZE player_stats_cache;
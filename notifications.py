@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+
+
+class NotificationListener:
+    """LISTEN/NOTIFY dispatcher on one connection borrowed from the asyncpg pool.
+
+    Handlers are registered per channel. Payloads are decoded as JSON when possible.
+    With a key function, notifications that arrive within `coalesce_delay` seconds and
+    share a key (e.g. the same player_id) are delivered to the handler together as one
+    list. Without one, each payload is delivered on its own (as a one-item list).
+
+    If the connection drops it is replaced and every channel is LISTENed again.
+    """
+
+    def __init__(self, db, reconnect_delay: float = 5.0, health_check_interval: float = 30.0):
+        self.db = db
+        self.reconnect_delay = reconnect_delay
+        self.health_check_interval = health_check_interval
+        self._handlers = {}      # channel -> [(handler, key, delay)]
+        self._pending = {}       # (channel, handler index, key) -> [payloads]
+        self._conn = None
+        self._task = None
+        self._reconnect = asyncio.Event()
+
+    def register(self, channel: str, handler, key=None, coalesce_delay: float = 0.5):
+        """Call `await handler(payloads)` for notifications on channel.
+
+        Args:
+            key: payload -> hashable; payloads with the same key are coalesced
+            coalesce_delay: how long to gather a burst before dispatching
+        """
+        first = channel not in self._handlers
+        self._handlers.setdefault(channel, []).append((handler, key, coalesce_delay))
+        if first and self._conn is not None and not self._conn.is_closed():
+            asyncio.create_task(self._listen(self._conn, channel))
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release()
+
+    # ---- connection -----------------------------------------------------
+
+    async def _run(self):
+        while True:
+            try:
+                await self._connect()
+                self._reconnect.clear()
+                # Wake up on a termination callback or periodically to check the connection
+                while not self._reconnect.is_set():
+                    try:
+                        await asyncio.wait_for(self._reconnect.wait(), self.health_check_interval)
+                    except asyncio.TimeoutError:
+                        await self._conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Notification listener connection lost: {e}")
+            await self._release()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _connect(self):
+        conn = await self.db.pool.acquire()
+        try:
+            conn.add_termination_listener(self._on_termination)
+            for channel in list(self._handlers):
+                await self._listen(conn, channel)
+        except Exception:
+            await self.db.pool.release(conn)
+            raise
+        self._conn = conn
+        logging.info(f"Listening for notifications on: {', '.join(self._handlers) or 'no channels'}")
+
+    async def _listen(self, conn, channel):
+        await conn.add_listener(channel, self._on_notify)
+
+    async def _release(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.remove_termination_listener(self._on_termination)
+            if not conn.is_closed():
+                for channel in list(self._handlers):
+                    await conn.remove_listener(channel, self._on_notify)
+            await self.db.pool.release(conn)
+        except Exception as e:
+            logging.error(f"Error releasing notification connection: {e}")
+
+    def _on_termination(self, conn):
+        self._reconnect.set()
+
+    # ---- dispatch -------------------------------------------------------
+
+    def _on_notify(self, conn, pid, channel, payload):
+        try:
+            data = json.loads(payload) if payload else payload
+        except ValueError:
+            data = payload
+
+        for index, (handler, key, delay) in enumerate(self._handlers.get(channel, ())):
+            if key is None:
+                asyncio.create_task(self._dispatch(channel, handler, [data]))
+                continue
+            try:
+                pending_key = (channel, index, key(data))
+            except Exception as e:
+                logging.error(f"Bad payload on {channel}: {payload} ({e})")
+                continue
+            batch = self._pending.get(pending_key)
+            if batch is not None:
+                batch.append(data)
+            else:
+                self._pending[pending_key] = [data]
+                asyncio.create_task(self._flush_later(pending_key, handler, delay))
+
+    async def _flush_later(self, pending_key, handler, delay):
+        await asyncio.sleep(delay)
+        payloads = self._pending.pop(pending_key, [])
+        if payloads:
+            await self._dispatch(pending_key[0], handler, payloads)
+
+    async def _dispatch(self, channel, handler, payloads):
+        try:
+            await handler(payloads)
+        except Exception as e:
+            logging.error(f"Error handling {channel} notification: {e}")
@@ -0,0 +1,203 @@
+"""
+Background delivery for channel posts and DMs that nothing waits on.
+
+Game code calls Outbox.post(channel_id, ...) or Outbox.dm(player_id, ...) and
+returns immediately. Each destination (route) gets its own worker task:
+
+- lines queued for the same route within ``merge_window`` seconds go out as one
+  message (text joined up to Discord's 2000 characters, up to 10 embeds),
+- every route has a token bucket (Discord allows about 5 messages per 5 seconds
+  per channel) so a burst waits its turn instead of tripping 429s,
+- channel objects are cached, so a post does not fetch the channel each time.
+
+Messages with components (buttons) are sent alone, since they belong to one message.
+"""
+import asyncio
+import logging
+import time
+
+MAX_CONTENT = 2000
+MAX_EMBEDS = 10
+
+
+class _Route:
+    __slots__ = ('key', 'pending', 'task', 'flushing')
+
+    def __init__(self, key):
+        self.key = key            # ('channel', channel_id) or ('dm', player_id)
+        self.pending = []         # [(content, embeds, components)]
+        self.task = None
+        self.flushing = asyncio.Event()  # set by flush(): send without waiting for the merge window
+
+
+class Outbox:
+    def __init__(self, bot, merge_window: float = 0.3, bucket_size: int = 5, bucket_period: float = 5.0,
+                 channel_ttl: float = 600):
+        self.bot = bot
+        self.merge_window = merge_window
+        self.bucket_size = bucket_size
+        self.refill_rate = bucket_size / bucket_period  # tokens per second
+        self.channel_ttl = channel_ttl
+        self._routes = {}
+        # key -> [tokens, refilled_at]; outlives the route's worker so spaced-out sends still share a bucket
+        self._buckets = {}
+        self._channels = {}  # channel_id -> (channel, cached_at)
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+
+    # ---- channels -------------------------------------------------------
+
+    async def get_channel(self, channel_id):
+        """Channel object for channel_id, cached for channel_ttl seconds (None if unavailable)."""
+        channel_id = int(channel_id)
+        entry = self._channels.get(channel_id)
+        now = time.monotonic()
+        if entry and now - entry[1] < self.channel_ttl:
+            return entry[0]
+        try:
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+        except Exception as e:
+            logging.error(f"Error fetching channel {channel_id}: {e}")
+            return None
+        if channel:
+            self._channels[channel_id] = (channel, now)
+        return channel
+
+    def forget_channel(self, channel_id):
+        self._channels.pop(int(channel_id), None)
+
+    # ---- queueing -------------------------------------------------------
+
+    def post(self, channel_id, content=None, embeds=None, components=None):
+        """Queue a message for a channel."""
+        self._enqueue(('channel', int(channel_id)), content, embeds, components)
+
+    def dm(self, player_id, content=None, embeds=None, components=None):
+        """Queue a DM for a player."""
+        self._enqueue(('dm', int(player_id)), content, embeds, components)
+
+    def dm_many(self, player_ids, content=None, embeds=None):
+        """Queue the same DM for several players."""
+        for player_id in dict.fromkeys(player_ids):
+            self.dm(player_id, content, embeds)
+
+    def _enqueue(self, key, content, embeds, components):
+        if not content and not embeds:
+            return
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = _Route(key)
+        route.pending.append((content, list(embeds or ()), components))
+        self.queued += 1
+        if route.task is None or route.task.done():
+            route.task = asyncio.create_task(self._drain(route))
+
+    async def flush(self, channel_id):
+        """Wait until everything queued for a channel has been sent (skips the merge window).
+
+        Call before sending a message inline that must appear after the queued lines.
+        """
+        route = self._routes.get(('channel', int(channel_id)))
+        if route is None or route.task is None or route.task.done():
+            return
+        route.flushing.set()
+        await asyncio.shield(route.task)
+
+    # ---- delivery -------------------------------------------------------
+
+    async def _drain(self, route):
+        try:
+            while route.pending:
+                # Give the handler that queued this a moment to add more lines
+                if not route.flushing.is_set():
+                    try:
+                        await asyncio.wait_for(route.flushing.wait(), self.merge_window)
+                    except asyncio.TimeoutError:
+                        pass
+                content, embeds, components = self._take_batch(route)
+                await self._take_token(route.key)
+                try:
+                    await self._deliver(route.key, content, embeds, components)
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.error(f"Error delivering message to {route.key[0]} {route.key[1]}: {e}")
+                    if route.key[0] == 'channel':
+                        self.forget_channel(route.key[1])
+        finally:
+            if not route.pending and self._routes.get(route.key) is route:
+                del self._routes[route.key]
+
+    @staticmethod
+    def _take_batch(route):
+        """Pop the next message, merged with as many following text/embed lines as fit."""
+        content, embeds, components = route.pending.pop(0)
+        if components:
+            return content, embeds, components
+        lines = [content] if content else []
+        length = len(content or '')
+        while route.pending:
+            next_content, next_embeds, next_components = route.pending[0]
+            extra = len(next_content or '') + (1 if lines and next_content else 0)
+            if next_components or length + extra > MAX_CONTENT or len(embeds) + len(next_embeds) > MAX_EMBEDS:
+                break
+            route.pending.pop(0)
+            if next_content:
+                lines.append(next_content)
+                length += extra
+            embeds = embeds + next_embeds
+        return "\n".join(lines) or None, embeds, None
+
+    async def _take_token(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._prune_buckets()
+            bucket = self._buckets[key] = [self.bucket_size, time.monotonic()]
+        while True:
+            now = time.monotonic()
+            bucket[0] = min(self.bucket_size, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return
+            await asyncio.sleep((1 - bucket[0]) / self.refill_rate)
+
+    def _prune_buckets(self):
+        """Forget buckets that have refilled completely (a new one would start full anyway)."""
+        if len(self._buckets) < 1000:
+            return
+        now = time.monotonic()
+        for key in [key for key, (tokens, refilled_at) in self._buckets.items()
+                    if key not in self._routes
+                    and tokens + (now - refilled_at) * self.refill_rate >= self.bucket_size]:
+            del self._buckets[key]
+
+    async def _deliver(self, key, content, embeds, components):
+        kind, target = key
+        if kind == 'channel':
+            destination = await self.get_channel(target)
+        else:
+            destination = await self.bot.identities.get_user(target)
+        if destination is None:
+            raise LookupError("destination not found")
+
+        # A single message carries at most MAX_EMBEDS embeds
+        chunks = [embeds[i:i + MAX_EMBEDS] for i in range(0, len(embeds), MAX_EMBEDS)] or [[]]
+        for i, chunk in enumerate(chunks):
+            kwargs = {}
+            if i == 0 and content:
+                kwargs['content'] = content
+            if chunk:
+                kwargs['embeds'] = chunk
+            if i == len(chunks) - 1 and components:
+                kwargs['components'] = components
+            await destination.send(**kwargs)
+
+    async def close(self, timeout: float = 5.0):
+        """Wait (up to timeout) for queued messages to go out."""
+        tasks = [route.task for route in self._routes.values() if route.task and not route.task.done()]
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,108 @@
+import asyncio
+import functools
+import logging
+import time
+
+
+class _PlayerSlot:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class PlayerActionGuard:
+    """Serializes button actions per player and drops duplicate clicks.
+
+    Every guarded interaction is keyed on (discord user, custom_id):
+    - a click whose key is already running is dropped,
+    - a click whose key finished less than `coalesce_window` seconds ago is dropped
+      (double-clicks and Discord retries arrive within a few hundred ms),
+    - different actions of the same player run one after another. If the previous
+      action does not finish within `wait_timeout` the click is rejected, so the
+      interaction can still be answered before Discord's 3 second limit.
+    """
+
+    def __init__(self, coalesce_window: float = 1.5, wait_timeout: float = 2.0):
+        self.coalesce_window = coalesce_window
+        self.wait_timeout = wait_timeout
+        self._slots = {}        # discord user id -> _PlayerSlot
+        self._inflight = set()  # (discord user id, custom_id)
+        self._recent = {}       # (discord user id, custom_id) -> finished_at
+        self.dropped = 0
+
+    def _is_duplicate(self, key):
+        if key in self._inflight:
+            return True
+        finished_at = self._recent.get(key)
+        return finished_at is not None and time.monotonic() - finished_at < self.coalesce_window
+
+    def _prune_recent(self, now):
+        if len(self._recent) < 1000:
+            return
+        cutoff = now - self.coalesce_window
+        for key in [k for k, finished_at in self._recent.items() if finished_at < cutoff]:
+            del self._recent[key]
+
+    def is_busy(self, user_id):
+        """True while an action of this Discord user is running."""
+        slot = self._slots.get(int(user_id))
+        return slot is not None and slot.lock.locked()
+
+    async def run(self, ctx, handler, *args, **kwargs):
+        """Run `await handler(*args, **kwargs)` for ctx's player unless it is a duplicate.
+
+        Returns True if the handler ran.
+        """
+        user_id = int(ctx.author.id)
+        key = (user_id, ctx.custom_id)
+        if self._is_duplicate(key):
+            self.dropped += 1
+            await self._reject(ctx, "⏳ That action is already being processed.")
+            return False
+
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = _PlayerSlot()
+        slot.users += 1
+        self._inflight.add(key)
+        try:
+            try:
+                await asyncio.wait_for(slot.lock.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                await self._reject(ctx, "⏳ You're still busy with another action. Please try again in a moment.")
+                return False
+            try:
+                await handler(*args, **kwargs)
+            finally:
+                slot.lock.release()
+            return True
+        finally:
+            self._inflight.discard(key)
+            now = time.monotonic()
+            self._recent[key] = now
+            self._prune_recent(now)
+            slot.users -= 1
+            if slot.users == 0 and self._slots.get(user_id) is slot:
+                del self._slots[user_id]
+
+    @staticmethod
+    async def _reject(ctx, message):
+        try:
+            await ctx.send(message, ephemeral=True)
+        except Exception as e:
+            logging.debug(f"Could not answer duplicate interaction {ctx.custom_id}: {e}")
+
+
+def player_action(func):
+    """Decorator for component callbacks on extensions that hold `self.bot`.
+
+    Routes the callback through bot.player_actions so double-clicks are dropped and
+    a player's actions do not overlap. Put it below @component_callback.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, ctx, *args, **kwargs):
+        return await self.bot.player_actions.run(ctx, func, self, ctx, *args, **kwargs)
+    return wrapper
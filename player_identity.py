@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+
+class PlayerIdentity:
+    """playerid, discord_id and the Discord user (for display name / DMs) of one player."""
+
+    __slots__ = ('player_id', 'discord_id', 'user')
+
+    def __init__(self, player_id, discord_id, user=None):
+        self.player_id = player_id
+        self.discord_id = discord_id
+        self.user = user
+
+    @property
+    def name(self):
+        return self.user.display_name if self.user else f"Player {self.player_id}"
+
+    @property
+    def mention(self):
+        return self.user.mention if self.user else self.name
+
+
+class PlayerIdentityCache:
+    """Maps playerid <-> discord_id <-> Discord user with TTL and LRU eviction.
+
+    playerid/discord_id pairs never change, so they are prewarmed from `players` and
+    kept until evicted. Discord users (display names) expire after `ttl` seconds and
+    are fetched concurrently by resolve_many.
+    """
+
+    def __init__(self, bot, db, ttl: float = 600, max_size: int = 5000, max_concurrent_fetches: int = 10,
+                 max_concurrent_dms: int = 5):
+        self.bot = bot
+        self.db = db
+        self.ttl = ttl
+        self.max_size = max_size
+        self._discord_ids = OrderedDict()   # player_id -> discord_id
+        self._player_ids = {}               # discord_id -> player_id
+        self._users = OrderedDict()         # discord_id -> (user, fetched_at)
+        self._fetch_semaphore = asyncio.Semaphore(max_concurrent_fetches)
+        # DMs share Discord's per-route rate limit; a few in flight at once avoids a burst of 429s
+        self._dm_semaphore = asyncio.Semaphore(max_concurrent_dms)
+        self._inflight = {}                 # discord_id -> Task, so concurrent callers share one fetch
+
+    async def prewarm(self):
+        """Load every playerid/discord_id pair (one query)."""
+        try:
+            rows = await self.db.fetch("SELECT playerid, discord_id FROM players")
+        except Exception as e:
+            logging.error(f"Error prewarming player identity cache: {e}")
+            return
+        for row in rows[-self.max_size:]:
+            self._remember(row['playerid'], row['discord_id'])
+        logging.info(f"Player identity cache prewarmed with {len(self._discord_ids)} players")
+
+    def _remember(self, player_id, discord_id):
+        if player_id is None or discord_id is None:
+            return
+        discord_id = int(discord_id)
+        self._discord_ids[player_id] = discord_id
+        self._discord_ids.move_to_end(player_id)
+        self._player_ids[discord_id] = player_id
+        while len(self._discord_ids) > self.max_size:
+            old_player_id, old_discord_id = self._discord_ids.popitem(last=False)
+            self._player_ids.pop(old_discord_id, None)
+            self._users.pop(old_discord_id, None)
+
+    def _cached_user(self, discord_id):
+        entry = self._users.get(discord_id)
+        if not entry:
+            return None
+        user, fetched_at = entry
+        if time.monotonic() - fetched_at > self.ttl:
+            self._users.pop(discord_id, None)
+            return None
+        self._users.move_to_end(discord_id)
+        return user
+
+    def _store_user(self, discord_id, user):
+        self._users[discord_id] = (user, time.monotonic())
+        self._users.move_to_end(discord_id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def invalidate(self, player_id=None, discord_id=None):
+        """Forget a player (e.g. after a name change or character deletion)."""
+        if player_id is not None and discord_id is None:
+            discord_id = self._discord_ids.get(player_id)
+        if discord_id is not None:
+            self._users.pop(int(discord_id), None)
+            player_id = self._player_ids.pop(int(discord_id), player_id)
+        if player_id is not None:
+            self._discord_ids.pop(player_id, None)
+
+    # ---- id lookups -----------------------------------------------------
+
+    async def get_discord_id(self, player_id: int):
+        discord_id = self._discord_ids.get(player_id)
+        if discord_id is not None:
+            self._discord_ids.move_to_end(player_id)
+            return discord_id
+        discord_id = await self.db.fetchval("""
+            SELECT discord_id FROM players WHERE playerid = $1
+        """, player_id)
+        self._remember(player_id, discord_id)
+        return int(discord_id) if discord_id is not None else None
+
+    async def get_player_id(self, discord_id: int):
+        discord_id = int(discord_id)
+        player_id = self._player_ids.get(discord_id)
+        if player_id is not None:
+            return player_id
+        player_id = await self.db.fetchval("""
+            SELECT playerid FROM players WHERE discord_id = $1
+        """, discord_id)
+        self._remember(player_id, discord_id)
+        return player_id
+
+    async def _load_discord_ids(self, player_ids):
+        """{player_id: discord_id} for player_ids, querying only the ones not cached."""
+        found = {pid: self._discord_ids[pid] for pid in player_ids if pid in self._discord_ids}
+        missing = [pid for pid in player_ids if pid not in found]
+        if missing:
+            rows = await self.db.fetch("""
+                SELECT playerid, discord_id FROM players WHERE playerid = ANY($1::int[])
+            """, missing)
+            for row in rows:
+                self._remember(row['playerid'], row['discord_id'])
+                found[row['playerid']] = int(row['discord_id']) if row['discord_id'] is not None else None
+        return found
+
+    # ---- Discord users --------------------------------------------------
+
+    async def _fetch_user(self, discord_id):
+        try:
+            async with self._fetch_semaphore:
+                user = await self.bot.fetch_user(discord_id)
+        except Exception as e:
+            logging.error(f"Error fetching Discord user {discord_id}: {e}")
+            user = None
+        if user:
+            self._store_user(discord_id, user)
+        return user
+
+    async def _get_user_by_discord_id(self, discord_id):
+        user = self._cached_user(discord_id)
+        if user:
+            return user
+        # Users already in the client's cache need no HTTP call
+        user = self.bot.get_user(discord_id)
+        if user:
+            self._store_user(discord_id, user)
+            return user
+        task = self._inflight.get(discord_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_user(discord_id))
+            self._inflight[discord_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(discord_id, None))
+        return await task
+
+    async def get_user(self, player_id: int):
+        """Discord user for a player (for DMs and mentions), or None."""
+        discord_id = await self.get_discord_id(player_id)
+        if discord_id is None:
+            return None
+        return await self._get_user_by_discord_id(discord_id)
+
+    async def get_name(self, player_id: int):
+        """Display name for a player, falling back to "Player <id>"."""
+        user = await self.get_user(player_id)
+        return user.display_name if user else f"Player {player_id}"
+
+    async def resolve(self, player_id: int) -> PlayerIdentity:
+        discord_id = await self.get_discord_id(player_id)
+        user = await self._get_user_by_discord_id(discord_id) if discord_id is not None else None
+        return PlayerIdentity(player_id, discord_id, user)
+
+    async def resolve_many(self, player_ids) -> dict:
+        """{player_id: PlayerIdentity} for several players: one query for unknown ids, user fetches run concurrently."""
+        player_ids = list(dict.fromkeys(player_ids))
+        found = await self._load_discord_ids(player_ids)
+
+        discord_ids = {pid: found.get(pid) for pid in player_ids}
+        users = await asyncio.gather(*(
+            self._get_user_by_discord_id(discord_id) if discord_id is not None else asyncio.sleep(0)
+            for discord_id in discord_ids.values()
+        ))
+        return {
+            pid: PlayerIdentity(pid, discord_id, user)
+            for (pid, discord_id), user in zip(discord_ids.items(), users)
+        }
+
+    async def send_dm(self, player_id: int, *args, **kwargs):
+        """DM a player; returns False if they could not be reached."""
+        try:
+            user = await self.get_user(player_id)
+            if user:
+                async with self._dm_semaphore:
+                    await user.send(*args, **kwargs)
+                return True
+        except Exception as e:
+            logging.error(f"Error sending DM to player {player_id}: {e}")
+        return False
+
+    async def send_dm_many(self, player_ids, *args, **kwargs):
+        """Send the same DM to several players concurrently; returns {player_id: delivered}."""
+        player_ids = list(dict.fromkeys(player_ids))
+        if not player_ids:
+            return {}
+        await self.resolve_many(player_ids)
+        results = await asyncio.gather(*(self.send_dm(pid, *args, **kwargs) for pid in player_ids))
+        return dict(zip(player_ids, results))
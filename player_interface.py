@@ -5,7 +5,12 @@ import logging
 import math
 import json
 from inventory_systems import InventorySystem  # Import the InventorySystem
+from player_actions import player_action
+from world_graph import ITEM, EQUIPPED_ITEM, XP, SKILL, QUEST
 import random
+
+logger = logging.getLogger(__name__)
+
 #from Shop_Manager import ShopManager
 
 class playerinterface(Extension):
@@ -13,46 +18,26 @@ class playerinterface(Extension):
         self.bot = bot
         
 
-    async def send_player_ui(self, ctx, location_name, health, mana, stamina, current_location_id, gold_balance):
-        db = self.bot.db
-        player_id = await db.get_or_create_player(ctx.author.id)
-        
-        # Check if player is in combat - get the most recent active battle
-        battle_instance = await db.fetchrow("""
-            SELECT bi.instance_id 
-            FROM battle_instances bi
-            JOIN battle_participants bp ON bi.instance_id = bp.instance_id
-            WHERE bp.player_id = $1 
-            AND bi.is_active = true
-            ORDER BY bi.created_at DESC
-            LIMIT 1
-        """, player_id)
+    async def send_player_ui(self, ctx, snapshot):
+        """Main player UI from a PlayerSnapshot (see bot.player_snapshots); the buttons add at most one query."""
+        player_id = snapshot.player_id
         
-        if battle_instance:
+        # Check if player is in combat - the snapshot has the most recent active battle
+        if snapshot.in_battle:
             # Player is in combat - show combat UI
-            await self.send_combat_ui(ctx, player_id, battle_instance['instance_id'])
+            await self.send_combat_ui(ctx, player_id, snapshot.battle_instance_id)
             return
-    
-        current_inventory_count = await db.get_current_inventory_count(player_id)
-        max_inventory_capacity = await db.get_inventory_capacity(player_id)
-
-        # Fetch max_health, max_mana, and max_stamina from the database
-        max_stats = await db.fetchrow("""
-            SELECT max_health, max_mana, max_stamina
-            FROM player_data
-            WHERE playerid = $1
-        """, player_id)
 
         embed = Embed(
             title="Player Information",
-            description=f"You are currently in {location_name}",
+            description=f"You are currently in {snapshot.location_name}",
             color=0x00FF00
         )
-        embed.add_field(name="Health", value=f"{health}/{max_stats['max_health']}", inline=True)
-        embed.add_field(name="Mana", value=f"{mana}/{max_stats['max_mana']}", inline=True)
-        embed.add_field(name="Stamina", value=f"{stamina}/{max_stats['max_stamina']}", inline=True)
-        embed.add_field(name="Inventory Capacity", value=f"{current_inventory_count}/{max_inventory_capacity}", inline=True)
-        embed.add_field(name="Gold", value=f"{gold_balance} gold", inline=True)  # Add gold information here
+        embed.add_field(name="Health", value=f"{snapshot.health}/{snapshot.max_health}", inline=True)
+        embed.add_field(name="Mana", value=f"{snapshot.mana}/{snapshot.max_mana}", inline=True)
+        embed.add_field(name="Stamina", value=f"{snapshot.stamina}/{snapshot.max_stamina}", inline=True)
+        embed.add_field(name="Inventory Capacity", value=f"{snapshot.inventory_used}/{snapshot.inventory_slots}", inline=True)
+        embed.add_field(name="Gold", value=f"{snapshot.gold_balance} gold", inline=True)  # Add gold information here
     
         user_id = ctx.author.id  # This is the Discord User ID
 
@@ -67,7 +52,7 @@ class playerinterface(Extension):
         ]
 
         # Get dynamic buttons based on the current location
-        dynamic_buttons = await self.get_location_based_buttons(current_location_id, player_id)
+        dynamic_buttons = await self.get_location_based_buttons(snapshot.current_location, player_id)
 
         # Update dynamic buttons to include user ID in their custom_id as well
         # Exclude party button from modification
@@ -134,18 +119,9 @@ class playerinterface(Extension):
         )
         
         # Add all party members' status
+        identities = await self.bot.identities.resolve_many(p['player_id'] for p in battle_state['participants'])
         for p in battle_state['participants']:
-            try:
-                p_discord_id = await self.bot.db.fetchval("""
-                    SELECT discord_id FROM players WHERE playerid = $1
-                """, p['player_id'])
-                if p_discord_id:
-                    p_user = await self.bot.fetch_user(p_discord_id)
-                    p_name = p_user.display_name if p_user else f"Player {p['player_id']}"
-                else:
-                    p_name = f"Player {p['player_id']}"
-            except:
-                p_name = f"Player {p['player_id']}"
+            p_name = identities[p['player_id']].name
             
             is_current_turn = " 👈" if p['player_id'] == current_turn_player else ""
             status_icon = "💀" if p['current_health'] <= 0 else "❤️"
@@ -212,80 +188,10 @@ class playerinterface(Extension):
     import logging
 
     async def get_location_based_buttons(self, location_id, player_id):
-        db = self.bot.db
-        logging.info(f"Fetching location-based buttons for location_id: {location_id}, player_id: {player_id}")
-
-        # Get location-based commands
-        commands = await db.fetch("""
-            SELECT command_name, button_label, custom_id, button_color, condition, required_quest_id, required_quest_status, required_item_id
-            FROM location_commands
-            WHERE locationid = $1
-        """, location_id)
-
-        buttons = []
-        logging.info(f"Fetched {len(commands)} commands for location_id {location_id}")
-
-        # Process each command and create buttons
-        for command in commands:
-            logging.info(f"Processing command: {command}")
-            button_color = command.get('button_color') or 'PRIMARY'
-
-            # Check if the command has quest requirements and evaluate them
-            if command['required_quest_id'] is not None:
-                quest_status = await db.fetchval("""
-                    SELECT status FROM player_quests WHERE player_id = $1 AND quest_id = $2
-                """, player_id, command['required_quest_id'])
-
-                if quest_status != command['required_quest_status']:
-                    # Skip this button if quest condition is not met
-                    continue
-
-            # Check if the command has item requirements and evaluate them
-            if command['required_item_id'] is not None:
-                has_required_item = await db.fetchval("""
-                    SELECT COUNT(*) FROM inventory WHERE playerid = $1 AND itemid = $2
-                """, player_id, command['required_item_id'])
-
-                if has_required_item == 0:
-                    # Skip this button if the required item is not in the player's inventory
-                    continue
-
-            # Determine button style based on button_color field
-            button_style = ButtonStyle.PRIMARY
-            if button_color == 'SUCCESS':
-                button_style = ButtonStyle.SUCCESS
-            elif button_color == 'DANGER':
-                button_style = ButtonStyle.DANGER
-            elif button_color == 'SECONDARY':
-                button_style = ButtonStyle.SECONDARY
-
-            # Adjust custom_id generation for dynamic NPC buttons
-            if "talk_to_" in command['command_name']:
-                npc_name = command['command_name'].split("talk_to_")[1]
-                npc_id = await db.fetchval("SELECT dynamic_npc_id FROM dynamic_npcs WHERE LOWER(name) = LOWER($1)", npc_name)
-
-                if npc_id:
-                    # Update custom_id to match expected pattern for DynamicNPCModule
-                    custom_id = f"npc_dialog_{npc_id}"  # Use npc_id to ensure the custom_id is uniquely linked to the NPC
-                else:
-                    custom_id = command['custom_id']
-            else:
-                custom_id = command['custom_id']
-
-            logging.info(f"Final custom_id for button: {custom_id}")
-
-            # Add the button if all conditions are met or if no conditions exist
-            buttons.append(Button(style=button_style, label=command['button_label'], custom_id=custom_id))
-
-        logging.info(f"Returning {len(buttons)} buttons for location_id {location_id}")
-        return buttons
-
-
-
-           
-
-
-
+        # Buttons come from a plan compiled once per location; checking the player's
+        # quest/item conditions for all of them takes at most one query
+        plan = self.bot.game_data.button_plans.get(location_id)
+        return await plan.render(self.bot.db, player_id)
 
 
     async def send_player_stats(self, ctx, player_id):
@@ -350,27 +256,11 @@ class playerinterface(Extension):
 
     @slash_command(name="playerui", description="Reload the player UI menu")
     async def reload_ui_command(self, ctx):
-        db = self.bot.db
-        player_id = await db.get_or_create_player(ctx.author.id)
-
         # Get player data - send_player_ui will check for combat and show appropriate UI
-        player_data = await db.fetchrow("""
-            SELECT pd.health, pd.mana, pd.stamina, l.name, pd.current_location, pd.gold_balance
-            FROM player_data pd
-            JOIN locations l ON l.locationid = pd.current_location
-            WHERE pd.playerid = $1
-        """, player_id)
+        snapshot = await self.bot.player_snapshots.load(ctx)
 
-        if player_data:
-            await self.send_player_ui(
-                ctx,
-                player_data['name'],
-                player_data['health'],
-                player_data['mana'],
-                player_data['stamina'],
-                player_data['current_location'],
-                player_data['gold_balance']  # Access gold_balance from player_data
-            )
+        if snapshot and snapshot.has_character:
+            await self.send_player_ui(ctx, snapshot)
         else:
             await ctx.send("Your player data could not be found.", ephemeral=True)
 
@@ -410,7 +300,7 @@ class playerinterface(Extension):
         player_id = await db.get_or_create_player(ctx.author.id)
         player_data = await db.fetch_player_details(player_id)
     
-        logging.info(f"Player Data: {player_data}")
+        logger.debug("Player Data: %s", player_data)
         if player_data:
             current_location_id = player_data['current_location']
             travel_system = self.bot.travel_system  # Access the TravelSystem instance directly
@@ -430,8 +320,11 @@ class playerinterface(Extension):
 
         inventory_system = self.bot.inventory_system  # Access InventorySystem directly
         if inventory_system:
-            player_id = await self.bot.db.get_or_create_player(ctx.author.id)
-            await inventory_system.display_inventory(ctx, player_id)
+            snapshot = await self.bot.player_snapshots.load(ctx)
+            if snapshot is None:
+                await ctx.send("Your player data could not be found.", ephemeral=True)
+                return
+            await inventory_system.display_inventory(ctx, snapshot.player_id)
         else:
             await ctx.send("Inventory system is not available.", ephemeral=True)
             
@@ -652,15 +545,14 @@ class playerinterface(Extension):
                 players_by_location[location] = []
             players_by_location[location].append(player)
         
+        # Resolve every player's name at once instead of one fetch per row
+        identities = await self.bot.identities.resolve_many(p['playerid'] for p in all_players)
+
         # Add fields for each location
         for location, players in sorted(players_by_location.items()):
             player_list = []
             for p in players:
-                try:
-                    user = await self.bot.fetch_user(p['discord_id'])
-                    player_name = user.display_name if user else f"Player {p['playerid']}"
-                except:
-                    player_name = f"Player {p['playerid']}"
+                player_name = identities[p['playerid']].name
                 
                 player_list.append(
                     f"**{player_name}** - HP: {p['health']}, Mana: {p['mana']}, Stamina: {p['stamina']}"
@@ -693,15 +585,13 @@ class playerinterface(Extension):
             await ctx.send("You are not authorized to interact with this button.", ephemeral=True)
             return
 
-        # Use self.bot.db to access the database
+        # One query for everything the travel requirements need
         player_id = await self.bot.db.get_or_create_player(ctx.author.id)
-        player_data = await self.bot.db.fetch_player_details(player_id)
+        snapshot = await self.bot.travel_system.get_snapshot(player_id)
 
-        if player_data:
-            current_location_id = player_data['current_location']
-        
-            # Fetch accessible locations using self.bot.db (pass player_id to check requirements)
-            accessible_locations = await self.bot.db.fetch_accessible_locations(current_location_id, player_id)
+        if snapshot:
+            world = self.bot.game_data.world
+            accessible_locations = world.neighbors(snapshot.current_location)
 
             if not accessible_locations:
                 await ctx.send("No locations available to travel to from here.", ephemeral=True)
@@ -710,82 +600,21 @@ class playerinterface(Extension):
             # Create buttons for each accessible location
             # Check requirements and style buttons accordingly
             location_buttons = []
-            for location in accessible_locations:
-                # Check if player meets requirements
-                player_id = await self.bot.db.get_or_create_player(ctx.author.id)
-                player_data = await self.bot.db.fetchrow("""
-                    SELECT pd.xp, pd.playerid
-                    FROM player_data pd
-                    WHERE pd.playerid = $1
-                """, player_id)
-                
-                has_required_item = True
-                meets_xp = True
-                meets_skills = True
-                meets_quest = True
-                
-                if location.get('required_item_id'):
-                    if location.get('required_item_equipped'):
-                        # Check if item is equipped
-                        has_item = await self.bot.db.fetchval("""
-                            SELECT COUNT(*) > 0
-                            FROM inventory
-                            WHERE playerid = $1 AND itemid = $2 AND isequipped = TRUE
-                        """, player_id, location['required_item_id'])
-                        has_required_item = has_item if has_item else False
-                    else:
-                        # Check if item is in inventory (not equipped)
-                        has_item = await self.bot.db.fetchval("""
-                            SELECT COUNT(*) > 0
-                            FROM inventory
-                            WHERE playerid = $1 AND itemid = $2 AND (isequipped = FALSE OR isequipped IS NULL)
-                        """, player_id, location['required_item_id'])
-                        has_required_item = has_item if has_item else False
-                
-                if location.get('xp_requirement') and player_data:
-                    meets_xp = player_data['xp'] >= location['xp_requirement']
-                
-                # Check quest requirement
-                if location.get('required_quest_id'):
-                    quest_completed = await self.bot.db.fetchval("""
-                        SELECT EXISTS(
-                            SELECT 1 FROM player_quests
-                            WHERE player_id = $1 AND quest_id = $2 AND status = 'completed'
-                        )
-                    """, player_id, location['required_quest_id'])
-                    meets_quest = quest_completed if quest_completed is not None else False
-                
-                # Check skill requirements if needed
-                if player_data:
-                    skill_check = await self.bot.db.fetchval("""
-                        SELECT NOT EXISTS (
-                            SELECT 1
-                            FROM location_skill_requirements lsr
-                            LEFT JOIN player_skills_xp ps ON ps.playerid = $1
-                            WHERE lsr.locationid = $2
-                            AND CASE 
-                                WHEN lsr.skill_id = 1 THEN ps.fire_magic_xp >= lsr.required_level
-                                WHEN lsr.skill_id = 2 THEN ps.water_magic_xp >= lsr.required_level
-                                WHEN lsr.skill_id = 3 THEN ps.earth_magic_xp >= lsr.required_level
-                                WHEN lsr.skill_id = 4 THEN ps.air_magic_xp >= lsr.required_level
-                                ELSE FALSE
-                            END = FALSE
-                        )
-                    """, player_id, location['locationid'])
-                    meets_skills = skill_check if skill_check is not None else True
+            for location in sorted(accessible_locations, key=lambda l: l['name'] or ''):
+                unmet = world.unmet_requirements(location, snapshot)
                 
                 # Determine button style based on requirements
-                can_travel = has_required_item and meets_xp and meets_skills and meets_quest
+                can_travel = not unmet
                 button_style = ButtonStyle.PRIMARY if can_travel else ButtonStyle.SECONDARY
                 
                 # Add indicator to label if requirements not met
                 label = location['name']
                 if not can_travel:
-                    if not has_required_item:
+                    if ITEM in unmet or EQUIPPED_ITEM in unmet:
                         label = f"{location['name']} 🔒"
-                    elif not meets_quest:
+                    elif QUEST in unmet:
                         label = f"{location['name']} 📜"
-                    elif not meets_xp:
+                    elif XP in unmet:
                         label = f"{location['name']} ⚠️"
                 
                 location_buttons.append(
@@ -820,129 +649,60 @@ class playerinterface(Extension):
         await ctx.defer(ephemeral=True)
         
         player_id = await self.bot.db.get_or_create_player(ctx.author.id)
-        player_data = await self.bot.db.fetchrow("""
-            SELECT pd.current_location, pd.xp, pd.playerid
-            FROM player_data pd
-            WHERE pd.playerid = $1
-        """, player_id)
+        snapshot = await self.bot.travel_system.get_snapshot(player_id)
         
-        if not player_data:
+        if not snapshot:
             await ctx.send("Your player data could not be found.", ephemeral=True)
             return
         
         # Get location details
-        location = await self.bot.db.fetchrow("""
-            SELECT locationid, name, required_item_id, xp_requirement, required_quest_id, required_item_equipped
-            FROM locations
-            WHERE locationid = $1
-        """, location_id)
+        world = self.bot.game_data.world
+        location = world.location(location_id)
         
         if not location:
             await ctx.send("Location not found.", ephemeral=True)
             return
         
         # Check if path exists
-        path_exists = await self.bot.db.fetchval("""
-            SELECT EXISTS(
-                SELECT 1 FROM paths
-                WHERE from_location_id = $1 AND to_location_id = $2
-            )
-        """, player_data['current_location'], location_id)
-        
-        if not path_exists:
+        if not world.has_path(snapshot.current_location, location_id):
             await ctx.send("There is no path to this location from your current location.", ephemeral=True)
             return
         
         # Check requirements
-        has_required_item = True
-        if location['required_item_id']:
-            if location.get('required_item_equipped'):
-                # Check if item is equipped (in any slot)
-                has_item = await self.bot.db.fetchval("""
-                    SELECT COUNT(*) > 0
-                    FROM inventory
-                    WHERE playerid = $1 AND itemid = $2 AND isequipped = TRUE
-                """, player_id, location['required_item_id'])
-                has_required_item = has_item if has_item else False
-                
-                if not has_required_item:
-                    item_name = await self.bot.db.fetchval("""
-                        SELECT name FROM items WHERE itemid = $1
-                    """, location['required_item_id'])
-                    await ctx.send(
-                        f"You must have **{item_name or 'a required item'}** equipped to travel to {location['name']}.",
-                        ephemeral=True
-                    )
-                    return
+        unmet = world.unmet_requirements(location, snapshot)
+        if EQUIPPED_ITEM in unmet or ITEM in unmet:
+            item_name = self.bot.game_data.get_item_name(location['required_item_id'])
+            if EQUIPPED_ITEM in unmet:
+                message = f"You must have **{item_name or 'a required item'}** equipped to travel to {location['name']}."
             else:
-                # Check if item is in inventory (not equipped)
-                has_item = await self.bot.db.fetchval("""
-                    SELECT COUNT(*) > 0
-                    FROM inventory
-                    WHERE playerid = $1 AND itemid = $2 AND (isequipped = FALSE OR isequipped IS NULL)
-                """, player_id, location['required_item_id'])
-                has_required_item = has_item if has_item else False
-                
-                if not has_required_item:
-                    item_name = await self.bot.db.fetchval("""
-                        SELECT name FROM items WHERE itemid = $1
-                    """, location['required_item_id'])
-                    await ctx.send(
-                        f"You need **{item_name or 'a required item'}** to travel to {location['name']}.",
-                        ephemeral=True
-                    )
-                    return
+                message = f"You need **{item_name or 'a required item'}** to travel to {location['name']}."
+            await ctx.send(message, ephemeral=True)
+            return
         
-        if location['xp_requirement'] and player_data['xp'] < location['xp_requirement']:
+        if XP in unmet:
             await ctx.send(
                 f"You need {location['xp_requirement']} XP to travel to {location['name']}. "
-                f"You currently have {player_data['xp']} XP.",
+                f"You currently have {snapshot.xp} XP.",
                 ephemeral=True
             )
             return
         
-        # Check skill requirements
-        skill_check = await self.bot.db.fetchval("""
-            SELECT EXISTS (
-                SELECT 1
-                FROM location_skill_requirements lsr
-                LEFT JOIN player_skills_xp ps ON ps.playerid = $1
-                WHERE lsr.locationid = $2
-                AND CASE 
-                    WHEN lsr.skill_id = 1 THEN ps.fire_magic_xp >= lsr.required_level
-                    WHEN lsr.skill_id = 2 THEN ps.water_magic_xp >= lsr.required_level
-                    WHEN lsr.skill_id = 3 THEN ps.earth_magic_xp >= lsr.required_level
-                    WHEN lsr.skill_id = 4 THEN ps.air_magic_xp >= lsr.required_level
-                    ELSE FALSE
-                END = FALSE
-            )
-        """, player_id, location_id)
-        
-        if skill_check:
+        if SKILL in unmet:
             await ctx.send(
                 f"You do not meet the skill requirements to travel to {location['name']}.",
                 ephemeral=True
             )
             return
         
-        # Check quest requirement
-        if location['required_quest_id']:
-            quest_completed = await self.bot.db.fetchval("""
-                SELECT EXISTS(
-                    SELECT 1 FROM player_quests
-                    WHERE player_id = $1 AND quest_id = $2 AND status = 'completed'
-                )
-            """, player_id, location['required_quest_id'])
-            
-            if not quest_completed:
-                quest_name = await self.bot.db.fetchval("""
-                    SELECT name FROM quests WHERE quest_id = $1
-                """, location['required_quest_id'])
-                await ctx.send(
-                    f"You must complete the quest **{quest_name or 'a required quest'}** to travel to {location['name']}.",
-                    ephemeral=True
-                )
-                return
+        if QUEST in unmet:
+            quest_name = await self.bot.db.fetchval("""
+                SELECT name FROM quests WHERE quest_id = $1
+            """, location['required_quest_id'])
+            await ctx.send(
+                f"You must complete the quest **{quest_name or 'a required quest'}** to travel to {location['name']}.",
+                ephemeral=True
+            )
+            return
         
         # Check if player is in a party
         party = await self.bot.db.fetchrow("""
@@ -957,22 +717,9 @@ class playerinterface(Extension):
                 # Leader can move party - travel_party will handle the UI refresh
                 await self.bot.travel_system.travel_party(ctx, player_id, location['name'], party['party_id'])
                 # After party travel, refresh UI for the leader
-                player_data = await self.bot.db.fetchrow("""
-                    SELECT pd.health, pd.mana, pd.stamina, l.name AS location_name, pd.current_location, pd.gold_balance
-                    FROM player_data pd
-                    JOIN locations l ON l.locationid = pd.current_location
-                    WHERE pd.playerid = $1
-                """, player_id)
-                if player_data:
-                    await self.send_player_ui(
-                        ctx,
-                        player_data['location_name'],
-                        player_data['health'],
-                        player_data['mana'],
-                        player_data['stamina'],
-                        player_data['current_location'],
-                        player_data['gold_balance']
-                    )
+                snapshot = await self.bot.player_snapshots.load(ctx, fresh=True)
+                if snapshot and snapshot.has_character:
+                    await self.send_player_ui(ctx, snapshot)
             else:
                 await ctx.send(
                     "You are in a party! Only the party leader can initiate travel. "
@@ -982,31 +729,19 @@ class playerinterface(Extension):
             return
         
         # Solo travel - update location
-        await self.bot.db.update_player_location(player_id, location_id)
+        await self.bot.travel_system.update_location(player_id, location_id)
         
         # Fetch updated player details to refresh the UI
-        player_data = await self.bot.db.fetchrow("""
-            SELECT pd.health, pd.mana, pd.stamina, l.name AS location_name, pd.current_location, pd.gold_balance
-            FROM player_data pd
-            JOIN locations l ON l.locationid = pd.current_location
-            WHERE pd.playerid = $1
-        """, player_id)
+        snapshot = await self.bot.player_snapshots.load(ctx, fresh=True)
         
-        if player_data:
+        if snapshot and snapshot.has_character:
             # Refresh the player UI with updated location
-            await self.send_player_ui(
-                ctx,
-                player_data['location_name'],
-                player_data['health'],
-                player_data['mana'],
-                player_data['stamina'],
-                player_data['current_location'],
-                player_data['gold_balance']
-            )
+            await self.send_player_ui(ctx, snapshot)
         else:
             await ctx.send(f"You have successfully traveled to **{location['name']}**.", ephemeral=True)
 
     @component_callback(re.compile(r"^fish_\d+$"))
+    @player_action
     async def fish_button_handler(self, ctx: ComponentContext):
         original_user_id = int(ctx.custom_id.split("_")[1])
         if ctx.author.id != original_user_id:
@@ -1067,74 +802,8 @@ class playerinterface(Extension):
         if party:
             # If player is party leader, move entire party
             if party['leader_id'] == player_id:
-                new_location_name = await self.bot.db.fetchval("SELECT name FROM locations WHERE locationid = $1", location_id)
-                
-                # Get location details to check requirements
-                location_details = await self.bot.db.fetchrow("""
-                    SELECT locationid, name, required_item_id, required_item_equipped
-                    FROM locations
-                    WHERE locationid = $1
-                """, location_id)
-                
-                # Get all party members
-                party_members = await self.bot.db.fetch("""
-                    SELECT pm.player_id, players.discord_id
-                    FROM party_members pm
-                    JOIN players ON pm.player_id = players.playerid
-                    WHERE pm.party_id = $1
-                """, party['party_id'])
-
-                # Check if location requires an equipped item - if so, verify all party members have it equipped
-                if location_details and location_details['required_item_id'] and location_details.get('required_item_equipped'):
-                    item_name = await self.bot.db.fetchval("""
-                        SELECT name FROM items WHERE itemid = $1
-                    """, location_details['required_item_id'])
-                    
-                    missing_members = []
-                    for member in party_members:
-                        has_item_equipped = await self.bot.db.fetchval("""
-                            SELECT COUNT(*) > 0
-                            FROM inventory
-                            WHERE playerid = $1 AND itemid = $2 AND isequipped = TRUE
-                        """, member['player_id'], location_details['required_item_id'])
-                        
-                        if not has_item_equipped:
-                            try:
-                                member_user = await self.bot.fetch_user(member['discord_id'])
-                                member_name = member_user.display_name if member_user else f"Player {member['player_id']}"
-                            except:
-                                member_name = f"Player {member['player_id']}"
-                            missing_members.append(member_name)
-                    
-                    if missing_members:
-                        member_list = ", ".join(missing_members)
-                        await ctx.send(
-                            f"❌ Cannot travel to **{location_details['name']}**! All party members must have **{item_name}** equipped.\n\n"
-                            f"Missing equipped item: {member_list}",
-                            ephemeral=True
-                        )
-                        return
-
-                # Update location for all party members
-                moved_count = 0
-                for member in party_members:
-                    await self.bot.db.update_player_location(member['player_id'], location_id)
-                    moved_count += 1
-                    
-                    # Notify each party member (except leader)
-                    if member['player_id'] != player_id:
-                        try:
-                            member_user = await self.bot.fetch_user(member['discord_id'])
-                            if member_user:
-                                await member_user.send(f"🎯 Your party leader has moved the party to **{new_location_name}**!")
-                        except:
-                            pass  # Silently fail if can't DM member
-
-                await ctx.send(
-                    f"✅ Party successfully traveled to **{new_location_name}**! "
-                    f"All {moved_count} party member(s) have been moved.",
-                    ephemeral=True
-                )
+                if not await self.bot.travel_system.move_party(ctx, player_id, party['party_id'], location_id):
+                    return
             else:
                 # Non-leaders cannot travel solo
                 await ctx.send(
@@ -1145,27 +814,17 @@ class playerinterface(Extension):
                 return
         else:
             # Solo travel (no party)
-            await self.bot.db.update_player_location(player_id, location_id)
-            new_location_name = await self.bot.db.fetchval("SELECT name FROM locations WHERE locationid = $1", location_id)
+            await self.bot.travel_system.update_location(player_id, location_id)
+            new_location = self.bot.game_data.get_location(location_id)
+            new_location_name = new_location['name'] if new_location else None
             await ctx.send(f"You have traveled to {new_location_name}.", ephemeral=True)
 
         # Fetch player details along with the gold balance in a single query
-        player_data = await self.bot.db.fetchrow("""
-            SELECT pd.health, pd.mana, pd.stamina, l.name AS location_name, pd.current_location, pd.gold_balance
-            FROM player_data pd
-            JOIN locations l ON l.locationid = pd.current_location
-            WHERE pd.playerid = $1
-        """, player_id)
-
-        await self.send_player_ui(
-            ctx,
-            player_data['location_name'],
-            player_data['health'],
-            player_data['mana'],
-            player_data['stamina'],
-            player_data['current_location'],
-            player_data['gold_balance']  # Pass the gold balance here
-        )
+        snapshot = await self.bot.player_snapshots.load(ctx, fresh=True)
+        if snapshot and snapshot.has_character:
+            await self.send_player_ui(ctx, snapshot)
+        else:
+            await ctx.send("Your player data could not be found.", ephemeral=True)
 
 
     @component_callback(re.compile(r"^party_menu_\d+$"))
@@ -0,0 +1,114 @@
+import logging
+import time
+from collections import OrderedDict
+
+
+class PlayerSnapshot:
+    """Everything the main UI shows about a player, loaded in one query."""
+
+    __slots__ = ('player_id', 'discord_id', 'has_character', 'health', 'mana', 'stamina',
+                 'max_health', 'max_mana', 'max_stamina', 'gold_balance', 'current_location',
+                 'location_name', 'location_type', 'inventory_used', 'inventory_slots',
+                 'battle_instance_id')
+
+    def __init__(self, discord_id, row):
+        self.discord_id = discord_id
+        self.player_id = row['playerid']
+        # A players row without player_data has not finished character creation
+        self.has_character = row['current_location'] is not None and row['location_name'] is not None
+        self.health = row['health']
+        self.mana = row['mana']
+        self.stamina = row['stamina']
+        self.max_health = row['max_health']
+        self.max_mana = row['max_mana']
+        self.max_stamina = row['max_stamina']
+        self.gold_balance = row['gold_balance']
+        self.current_location = row['current_location']
+        self.location_name = row['location_name']
+        self.location_type = row['location_type']
+        self.inventory_used = row['inventory_used']
+        self.inventory_slots = row['inventory_slots']
+        self.battle_instance_id = row['battle_instance_id']
+
+    @property
+    def in_battle(self):
+        return self.battle_instance_id is not None
+
+    @property
+    def at_bank(self):
+        return (self.location_type or '').lower() == "bank"
+
+
+class PlayerSnapshotLoader:
+    """Loads PlayerSnapshots by Discord user, memoized per interaction.
+
+    Within one interaction (same ctx.id) the snapshot is loaded once however many
+    handlers ask for it. Pass fresh=True after changing the player (travel, rest, ...).
+    """
+
+    # Creates the players row like get_or_create_player, in the same round trip
+    LOAD_SQL = """
+        WITH existing AS (
+            SELECT playerid FROM players WHERE discord_id = $1
+        ),
+        created AS (
+            INSERT INTO players (discord_id)
+            SELECT $1 WHERE NOT EXISTS (SELECT 1 FROM existing)
+            RETURNING playerid
+        ),
+        player AS (
+            SELECT playerid FROM existing
+            UNION ALL
+            SELECT playerid FROM created
+        )
+        SELECT p.playerid,
+               pd.health, pd.mana, pd.stamina,
+               pd.max_health, pd.max_mana, pd.max_stamina,
+               pd.gold_balance, pd.current_location, pd.inventory_slots,
+               l.name AS location_name, l.type AS location_type,
+               (SELECT COUNT(*) FROM inventory inv
+                WHERE inv.playerid = p.playerid AND inv.isequipped = FALSE
+                  AND (inv.in_bank = FALSE OR inv.in_bank IS NULL)) AS inventory_used,
+               (SELECT bi.instance_id
+                FROM battle_instances bi
+                JOIN battle_participants bp ON bi.instance_id = bp.instance_id
+                WHERE bp.player_id = p.playerid AND bi.is_active = true
+                ORDER BY bi.created_at DESC
+                LIMIT 1) AS battle_instance_id
+        FROM player p
+        LEFT JOIN player_data pd ON pd.playerid = p.playerid
+        LEFT JOIN locations l ON l.locationid = pd.current_location
+    """
+
+    def __init__(self, db, memo_ttl: float = 15.0, max_memo: int = 1000):
+        self.db = db
+        self.memo_ttl = memo_ttl
+        self.max_memo = max_memo
+        self._memo = OrderedDict()  # (interaction id, discord id) -> (snapshot, loaded_at)
+
+    async def load(self, ctx, fresh: bool = False):
+        """Snapshot of ctx.author, or None if the query failed."""
+        discord_id = int(ctx.author.id)
+        key = (getattr(ctx, 'id', None), discord_id)
+        now = time.monotonic()
+        if not fresh and key[0] is not None:
+            entry = self._memo.get(key)
+            if entry and now - entry[1] <= self.memo_ttl:
+                return entry[0]
+
+        snapshot = await self.load_by_discord_id(discord_id)
+        if snapshot is not None and key[0] is not None:
+            self._memo[key] = (snapshot, now)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_memo:
+                self._memo.popitem(last=False)
+        return snapshot
+
+    async def load_by_discord_id(self, discord_id: int):
+        """Uncached snapshot for a Discord user."""
+        try:
+            row = await self.db.fetchrow(self.LOAD_SQL, int(discord_id))
+        except Exception as e:
+            logging.error(f"Error loading player snapshot for {discord_id}: {e}")
+            return None
+        return PlayerSnapshot(int(discord_id), row) if row else None
@@ -0,0 +1,161 @@
+"""
+Per-query statistics for the Database helpers (fetch, fetchrow, fetchval, execute).
+
+Queries are grouped by fingerprint (the SQL with whitespace collapsed and literals
+replaced by ``?``) and by origin: the Extension and component custom_id / command
+that was running when the query was issued. Origins are set by the
+InteractionTracer pre-run hook (interaction_tracing.py); ids in custom_ids are
+folded (``mine_12`` -> ``mine_#``) so each handler gets one row.
+
+Queries slower than ``slow_ms`` are logged with their parameters redacted to types.
+"""
+import asyncio
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+# (extension name, custom_id or command) of the interaction currently running
+query_origin = ContextVar('query_origin', default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![$\w])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_CUSTOM_ID_NUMBER = re.compile(r"\d+")
+
+_fingerprints = {}
+
+
+def fingerprint(query):
+    """Normalized SQL used as the statistics key."""
+    cached = _fingerprints.get(query)
+    if cached is None:
+        text = _STRING_LITERAL.sub('?', query)
+        text = _NUMBER_LITERAL.sub('?', text)
+        cached = _WHITESPACE.sub(' ', text).strip()
+        if len(_fingerprints) < 5000:
+            _fingerprints[query] = cached
+    return cached
+
+
+def redact(args):
+    """Parameter types (and sizes) only, never values."""
+    redacted = []
+    for arg in args:
+        if isinstance(arg, (str, bytes, list, tuple)):
+            redacted.append(f"<{type(arg).__name__}:{len(arg)}>")
+        else:
+            redacted.append(f"<{type(arg).__name__}>")
+    return redacted
+
+
+def fold_action(action):
+    """custom_id or command name with numeric ids replaced by #."""
+    return _CUSTOM_ID_NUMBER.sub('#', str(action)) if action else action
+
+
+def set_origin(extension, action):
+    """Tag the queries of the current task with the running Extension and custom_id/command."""
+    return query_origin.set((extension, fold_action(action)))
+
+
+class _Stat:
+    __slots__ = ('calls', 'errors', 'total', 'max', 'rows', 'histogram')
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.histogram = [0] * (buckets + 1)
+
+
+class QueryStats:
+    """Call counts, latency histograms and row counts per query fingerprint and origin."""
+
+    # Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+    BUCKETS_MS = (1, 5, 20, 50, 100, 250, 1000)
+
+    def __init__(self, slow_ms: float = 200.0, max_fingerprints: int = 2000):
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self.started_at = time.time()
+        self._by_query = {}   # fingerprint -> _Stat
+        self._by_origin = {}  # (extension, action, fingerprint) -> _Stat
+        self._report_task = None
+
+    def record(self, query, args, elapsed, rows=0, error=None):
+        key = fingerprint(query)
+        origin = query_origin.get() or (None, None)
+        elapsed_ms = elapsed * 1000
+        for stats, stat_key in ((self._by_query, key), (self._by_origin, origin + (key,))):
+            stat = stats.get(stat_key)
+            if stat is None:
+                if len(stats) >= self.max_fingerprints:
+                    continue
+                stat = stats[stat_key] = _Stat(len(self.BUCKETS_MS))
+            stat.calls += 1
+            stat.total += elapsed_ms
+            stat.max = max(stat.max, elapsed_ms)
+            stat.rows += rows
+            if error is not None:
+                stat.errors += 1
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    stat.histogram[i] += 1
+                    break
+            else:
+                stat.histogram[-1] += 1
+
+        if elapsed_ms >= self.slow_ms:
+            logging.warning(f"Slow query ({elapsed_ms:.0f} ms, origin {origin[0]}/{origin[1]}): "
+                            f"{key[:300]} params={redact(args)}")
+
+    def reset(self):
+        self._by_query.clear()
+        self._by_origin.clear()
+        self.started_at = time.time()
+
+    # ---- reporting ------------------------------------------------------
+
+    def top_queries(self, limit=10, sort='total'):
+        """[(fingerprint, _Stat)] ordered by total time (or 'calls' / 'max')."""
+        return sorted(self._by_query.items(), key=lambda item: getattr(item[1], sort), reverse=True)[:limit]
+
+    def top_origins(self, limit=10, sort='calls'):
+        """[((extension, action, fingerprint), _Stat)] ordered by call count (or 'total' / 'max')."""
+        return sorted(self._by_origin.items(), key=lambda item: getattr(item[1], sort), reverse=True)[:limit]
+
+    def report(self, limit=10, sort='total', width=90):
+        """Plain text summary: top fingerprints (by total time by default), then busiest handlers."""
+        lines = [f"Query stats over {time.time() - self.started_at:.0f}s"]
+        lines.append("calls    total ms   avg ms   max ms     rows  query")
+        for key, stat in self.top_queries(limit, sort):
+            lines.append(f"{stat.calls:>5} {stat.total:>10.0f} {stat.total / stat.calls:>8.1f} {stat.max:>8.1f} "
+                         f"{stat.rows:>8}  {key[:width]}")
+        lines.append("")
+        lines.append("calls    total ms  origin -> query")
+        for (extension, action, key), stat in self.top_origins(limit):
+            lines.append(f"{stat.calls:>5} {stat.total:>10.0f}  {extension or '-'}/{action or '-'} -> {key[:width // 2]}")
+        return "\n".join(lines)
+
+    def start_reporting(self, interval: float):
+        """Log report() every interval seconds (0 disables)."""
+        if interval and self._report_task is None:
+            self._report_task = asyncio.create_task(self._report_loop(interval))
+
+    async def stop_reporting(self):
+        if self._report_task:
+            self._report_task.cancel()
+            try:
+                await self._report_task
+            except asyncio.CancelledError:
+                pass
+            self._report_task = None
+
+    async def _report_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if self._by_query:
+                logging.info(self.report())
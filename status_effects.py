@@ -0,0 +1,263 @@
+"""
+Status effects (temporary_effects for players, battle_effects inside a battle).
+
+Both tables store an absolute ``expires_at`` (migrations/add_effect_expiry.sql),
+so the database never evaluates ``start_time + duration * interval`` per row.
+EffectEngine keeps the active effects of every target it has loaded in memory:
+
+- one heap per target ordered by expiry, so dropping expired effects only looks
+  at the front of the heap,
+- a running total per attribute (e.g. dot_fire, damage_bonus_fire, strength),
+  adjusted when an effect is added or expires instead of summed on every read,
+- expired rows are deleted from both tables in batches by a background sweep.
+
+Expiry is tracked on the monotonic clock, from ``expires_at - NOW()`` computed by
+the database, so the bot's and the server's clocks never have to agree.
+
+Targets are keyed ('player', player_id) or ('battle', instance_id, target_type, target_id).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+PLAYER_EFFECTS_SQL = """
+    SELECT *, EXTRACT(EPOCH FROM (expires_at - NOW()))::float8 AS expires_in
+    FROM temporary_effects
+    WHERE player_id = ANY($1::int[]) AND expires_at > NOW()
+"""
+
+BATTLE_EFFECTS_SQL = """
+    SELECT *, EXTRACT(EPOCH FROM (expires_at - NOW()))::float8 AS expires_in
+    FROM battle_effects
+    WHERE instance_id = $1 AND expires_at > NOW()
+"""
+
+INSERT_PLAYER_EFFECT_SQL = """
+    INSERT INTO temporary_effects (player_id, attribute, modifier_value, duration, start_time, expires_at)
+    VALUES ($1, $2, $3, $4, NOW(), NOW() + $4 * interval '1 second')
+    RETURNING *, EXTRACT(EPOCH FROM (expires_at - NOW()))::float8 AS expires_in
+"""
+
+INSERT_BATTLE_EFFECT_SQL = """
+    INSERT INTO battle_effects
+    (instance_id, target_type, target_id, effect_type, effect_value, duration, expires_at)
+    VALUES ($1, $2, $3, $4, $5, $6, NOW() + $6 * interval '1 second')
+    RETURNING *, EXTRACT(EPOCH FROM (expires_at - NOW()))::float8 AS expires_in
+"""
+
+# Expired rows, oldest first, a batch at a time (served by the expires_at indexes)
+PURGE_SQL = """
+    DELETE FROM {table}
+    WHERE effect_id IN (
+        SELECT effect_id FROM {table}
+        WHERE expires_at <= NOW()
+        ORDER BY expires_at
+        LIMIT $1
+    )
+"""
+
+
+class _TargetEffects:
+    """Active effects of one target: an expiry heap and per-attribute totals."""
+
+    __slots__ = ('heap', 'totals', 'counts')
+
+    def __init__(self):
+        self.heap = []    # [(expires_at, seq, attribute, value, row)]
+        self.totals = {}  # attribute -> summed value of the active effects
+        self.counts = {}  # attribute -> number of active effects
+
+    def add(self, expires_at, seq, attribute, value, row):
+        heapq.heappush(self.heap, (expires_at, seq, attribute, value, row))
+        self.totals[attribute] = self.totals.get(attribute, 0) + value
+        self.counts[attribute] = self.counts.get(attribute, 0) + 1
+
+    def expire(self, now):
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            _, _, attribute, value, _ = heapq.heappop(heap)
+            self.counts[attribute] -= 1
+            if self.counts[attribute]:
+                self.totals[attribute] -= value
+            else:
+                del self.counts[attribute]
+                del self.totals[attribute]
+
+
+class EffectEngine:
+    """In-memory active status effects with incremental stat totals and batched purging."""
+
+    def __init__(self, db, purge_interval: float = 60, purge_batch: int = 1000):
+        self.db = db
+        self.purge_interval = purge_interval
+        self.purge_batch = purge_batch
+        self._targets = {}          # key -> _TargetEffects
+        self._loading = {}          # key -> Future of the load in flight
+        self._loaded_battles = set()
+        self._seq = itertools.count()
+        self._purge_task = None
+
+    # ---- loading --------------------------------------------------------
+
+    def _add_row(self, key, row, attribute, value):
+        target = self._targets.get(key)
+        if target is None:
+            target = self._targets[key] = _TargetEffects()
+        row = dict(row)
+        expires_in = row.pop('expires_in', None) or 0
+        target.add(time.monotonic() + expires_in, next(self._seq), attribute, value or 0, row)
+        return row
+
+    async def _load(self, keys, query, *args, add_rows):
+        """Run one load for every key not loaded yet; waits for loads already in flight."""
+        in_flight = {self._loading[key] for key in keys if key in self._loading}
+        missing = [key for key in keys if key not in self._targets and key not in self._loading]
+        if missing:
+            future = asyncio.get_running_loop().create_future()
+            for key in missing:
+                self._loading[key] = future
+            try:
+                rows = await self.db.fetch(query, *args)
+                for key in missing:
+                    self._targets.setdefault(key, _TargetEffects())
+                add_rows(rows)
+            finally:
+                for key in missing:
+                    self._loading.pop(key, None)
+                future.set_result(None)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def load_players(self, player_ids):
+        """Load the active effects of several players in one query (already loaded ones are skipped)."""
+        player_ids = list(dict.fromkeys(int(pid) for pid in player_ids))
+        keys = [('player', pid) for pid in player_ids]
+        unloaded = [key[1] for key in keys if key not in self._targets and key not in self._loading]
+
+        def add_rows(rows):
+            for row in rows:
+                self._add_row(('player', row['player_id']), row, row['attribute'], row['modifier_value'])
+
+        await self._load(keys, PLAYER_EFFECTS_SQL, unloaded, add_rows=add_rows)
+
+    async def load_battle(self, instance_id):
+        """Load the active effects of every target in a battle (once per battle)."""
+        if instance_id in self._loaded_battles:
+            return
+        key = ('battle', instance_id)
+
+        def add_rows(rows):
+            for row in rows:
+                self._add_row(self.battle_key(instance_id, row['target_type'], row['target_id']),
+                              row, row['effect_type'], row['effect_value'])
+
+        await self._load([key], BATTLE_EFFECTS_SQL, instance_id, add_rows=add_rows)
+        self._loaded_battles.add(instance_id)
+        self._targets.pop(key, None)
+
+    @staticmethod
+    def battle_key(instance_id, target_type, target_id):
+        return ('battle', instance_id, target_type, target_id)
+
+    # ---- reads ----------------------------------------------------------
+
+    def _target(self, key):
+        target = self._targets.get(key)
+        if target is not None:
+            target.expire(time.monotonic())
+        return target
+
+    def active(self, key):
+        """Rows of the target's active effects, soonest to expire first."""
+        target = self._target(key)
+        if target is None:
+            return []
+        return [entry[4] for entry in sorted(target.heap)]
+
+    def totals(self, key):
+        """{attribute: summed value} over the target's active effects."""
+        target = self._target(key)
+        return dict(target.totals) if target else {}
+
+    def total(self, key, prefix=''):
+        """Sum of the active values whose attribute starts with prefix (e.g. 'dot_')."""
+        target = self._target(key)
+        if target is None:
+            return 0
+        return sum(value for attribute, value in target.totals.items() if attribute.startswith(prefix))
+
+    async def player_effects(self, player_id):
+        await self.load_players([player_id])
+        return self.active(('player', int(player_id)))
+
+    async def battle_effects(self, instance_id, target_type, target_id):
+        await self.load_battle(instance_id)
+        return self.active(self.battle_key(instance_id, target_type, target_id))
+
+    # ---- writes ---------------------------------------------------------
+
+    async def add_player_effect(self, player_id, attribute, value, duration):
+        await self.load_players([player_id])
+        row = await self.db.fetchrow(INSERT_PLAYER_EFFECT_SQL, player_id, attribute, value, duration)
+        return self._add_row(('player', int(player_id)), row, attribute, value)
+
+    async def add_battle_effect(self, instance_id, target_type, target_id, effect_type, value, duration):
+        await self.load_battle(instance_id)
+        row = await self.db.fetchrow(INSERT_BATTLE_EFFECT_SQL, instance_id, target_type, target_id,
+                                     effect_type, value, duration)
+        return self._add_row(self.battle_key(instance_id, target_type, target_id), row, effect_type, value)
+
+    def forget_battle(self, instance_id):
+        """Drop a finished battle's effects from memory."""
+        self._loaded_battles.discard(instance_id)
+        for key in [k for k in self._targets if k[0] == 'battle' and k[1] == instance_id]:
+            del self._targets[key]
+
+    # ---- purging --------------------------------------------------------
+
+    def expire_all(self):
+        """Drop expired effects from memory, and targets left without any."""
+        now = time.monotonic()
+        for key in list(self._targets):
+            target = self._targets[key]
+            target.expire(now)
+            # Players are reloaded on next use; a loaded battle keeps its (empty) targets
+            if not target.heap and key[0] == 'player':
+                del self._targets[key]
+
+    async def purge(self):
+        """Delete expired rows from temporary_effects and battle_effects in batches; returns rows deleted."""
+        self.expire_all()
+        deleted = 0
+        for table in ('temporary_effects', 'battle_effects'):
+            while True:
+                status = await self.db.execute(PURGE_SQL.format(table=table), self.purge_batch)
+                count = int(status.split()[-1]) if status else 0
+                deleted += count
+                if count < self.purge_batch:
+                    break
+        return deleted
+
+    def start(self):
+        """Start the background purge loop (interval 0 disables it)."""
+        if self.purge_interval and (self._purge_task is None or self._purge_task.done()):
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def close(self):
+        if self._purge_task:
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await self.purge()
+            except Exception as e:
+                logging.error(f"Error purging expired effects: {e}")
@@ -0,0 +1,111 @@
+"""
+combat_simulator against combat_engine, plus benchmarks of the hot paths.
+
+Run with ``python -m pytest``; ``--benchmark-only`` runs just the benchmarks.
+"""
+import random
+
+import numpy as np
+import pytest
+
+import combat_engine
+from combat_simulator import simulate_attacks, simulate_fights
+from dice import compile_dice
+
+ATTACKER = {'total_dexterity': 6, 'total_strength': 8, 'total_luck': 3, 'total_intelligence': 2}
+DEFENDER = {'health': 60, 'agility': 3, 'dexterity': 2, 'slashing_resistance': 10}
+WEAPON_DICE = {'slashing': '1d6', 'crushing': '1d4+1'}
+
+SEED = 1234
+ATTACKS = 100_000
+FIGHTS = 5_000
+MAX_TURNS = 100
+
+
+def engine_attack(attacker, defender, weapon_dice, rng):
+    """One attack resolved the way BattleSystem does it, through combat_engine."""
+    hit, crit, blocked = combat_engine.attack_roll(attacker, defender, rng=rng)
+    if not hit or blocked:
+        return 0
+    return sum(combat_engine.damage_with_dice(attacker, defender, weapon_dice, crit, rng=rng).values())
+
+
+def engine_fight(attacker, defender, weapon_dice, rng):
+    """Turns until the defender drops (None if it survives MAX_TURNS)."""
+    dealt = 0
+    for turn in range(1, MAX_TURNS + 1):
+        dealt += engine_attack(attacker, defender, weapon_dice, rng)
+        if dealt >= defender['health']:
+            return turn
+    return None
+
+
+def test_damage_mean_matches_combat_engine():
+    rng = random.Random(SEED)
+    engine = [engine_attack(ATTACKER, DEFENDER, WEAPON_DICE, rng) for _ in range(ATTACKS)]
+    damage, hit, _, _ = simulate_attacks(ATTACKER, DEFENDER, WEAPON_DICE, n=ATTACKS,
+                                         rng=np.random.default_rng(SEED))
+
+    engine_mean = float(np.mean(engine))
+    engine_std = float(np.std(engine))
+    # Both are means of ATTACKS independent draws: allow 4 standard errors of their difference
+    tolerance = 4 * engine_std * (2 / ATTACKS) ** 0.5
+    assert abs(damage.mean() - engine_mean) < tolerance
+    assert abs(hit.mean() - np.mean([d > 0 for d in engine])) < 0.01
+
+
+def test_turns_to_kill_mean_matches_combat_engine():
+    rng = random.Random(SEED)
+    engine = [engine_fight(ATTACKER, DEFENDER, WEAPON_DICE, rng) for _ in range(FIGHTS)]
+    finished = [t for t in engine if t is not None]
+    result = simulate_fights(ATTACKER, DEFENDER, WEAPON_DICE, fights=FIGHTS, max_turns=MAX_TURNS, seed=SEED)
+
+    assert result['kill_rate'] == pytest.approx(len(finished) / FIGHTS, abs=0.01)
+    tolerance = 4 * float(np.std(finished)) * (2 / len(finished)) ** 0.5
+    assert abs(result['ttk_mean'] - float(np.mean(finished))) < tolerance
+
+
+def test_flat_damage_mean_matches_combat_engine():
+    # Enemies attack without dice: flat 'physical' damage from their strength
+    enemy = {'strength': 7, 'dexterity': 3, 'luck': 2}
+    player = {'total_agility': 4, 'total_dexterity': 5, 'total_physical_resistance': 15}
+    rng = random.Random(SEED)
+    engine = []
+    for _ in range(ATTACKS):
+        hit, crit, blocked = combat_engine.attack_roll(enemy, player, rng=rng)
+        engine.append(combat_engine.flat_damage(enemy, player, 'physical', 7, crit)
+                      if hit and not blocked else 0)
+    damage, _, _, _ = simulate_attacks(enemy, player, n=ATTACKS, rng=np.random.default_rng(SEED))
+
+    tolerance = 4 * float(np.std(engine)) * (2 / ATTACKS) ** 0.5
+    assert abs(damage.mean() - float(np.mean(engine))) < tolerance
+
+
+# ---- benchmarks -----------------------------------------------------------
+
+def test_benchmark_compile_dice(benchmark):
+    # Bypass the lru_cache so the parse and distribution are measured, not the cache hit
+    def compile_uncached():
+        expression = compile_dice.__wrapped__('2d6+1d4kh1+3')
+        return expression.distribution
+
+    benchmark(compile_uncached)
+
+
+def test_benchmark_compile_dice_cached(benchmark):
+    compile_dice('2d6+1d4kh1+3')
+    benchmark(compile_dice, '2d6+1d4kh1+3')
+
+
+def test_benchmark_engine_attack(benchmark):
+    rng = random.Random(SEED)
+    benchmark(engine_attack, ATTACKER, DEFENDER, WEAPON_DICE, rng)
+
+
+def test_benchmark_simulate_attacks(benchmark):
+    rng = np.random.default_rng(SEED)
+    benchmark(simulate_attacks, ATTACKER, DEFENDER, WEAPON_DICE, n=1_000_000, rng=rng)
+
+
+def test_benchmark_simulate_fights(benchmark):
+    benchmark(simulate_fights, ATTACKER, DEFENDER, WEAPON_DICE, fights=10_000, max_turns=MAX_TURNS, seed=SEED)
@@ -0,0 +1,137 @@
+"""
+Drop rates of the alias tables: seeded sampling checked against the source weights.
+
+Each check runs a chi-square goodness-of-fit test at p = 0.001, so a correct table
+fails about once in a thousand seeds; the seeds are fixed, so the tests are repeatable.
+"""
+import random
+from collections import Counter
+
+import pytest
+
+from drop_tables import AliasTable, DropTables, FISH_RARITY_WEIGHTS, HIGH_LEVEL_FISHING_XP, HIGH_LEVEL_RARITY_BONUS
+
+SEED = 20240
+SAMPLES = 200_000
+
+
+class GameData:
+    """The GameDataCache lookups DropTables uses, over fixed rows."""
+
+    def __init__(self, fish=(), ores=(), trees=(), tiers=None):
+        self.fish = list(fish)
+        self.ores = list(ores)
+        self.trees = list(trees)
+        self.tiers = tiers or {}
+
+    def get_fish_at(self, location, rod_type=None):
+        return [f for f in self.fish if f['location'] == location and (rod_type is None or f['rodtype'] == rod_type)]
+
+    def get_ores_at(self, location_id):
+        return [o for o in self.ores if o['locationid'] == location_id]
+
+    def get_trees_at(self, location_id):
+        return [t for t in self.trees if t['locationid'] == location_id]
+
+    def get_tier(self, material_name):
+        return self.tiers.get(material_name)
+
+
+def chi_square_critical(df, z=3.0902):
+    """Wilson-Hilferty approximation of the chi-square critical value (z = 3.0902 for p = 0.001)."""
+    h = 2 / (9 * df)
+    return df * (1 - h + z * h ** 0.5) ** 3
+
+
+def assert_matches_weights(counts, weights):
+    """Chi-square test of observed counts against weights (keys with zero weight must never occur)."""
+    total_weight = sum(weights.values())
+    samples = sum(counts.values())
+    for key, weight in weights.items():
+        if weight == 0:
+            assert counts.get(key, 0) == 0, f"{key} has no weight but was drawn"
+    expected = {key: samples * weight / total_weight for key, weight in weights.items() if weight > 0}
+    assert set(counts) <= set(expected)
+    if len(expected) == 1:
+        return
+    statistic = sum((counts.get(key, 0) - e) ** 2 / e for key, e in expected.items())
+    assert statistic < chi_square_critical(len(expected) - 1), (statistic, counts, expected)
+
+
+def sample(draw, n=SAMPLES):
+    return Counter(draw() for _ in range(n))
+
+
+@pytest.mark.parametrize('weights', [
+    {'a': 1},
+    {'a': 5, 'b': 3, 'c': 1, 'd': 1},
+    {'a': 0.001, 'b': 0.5, 'c': 120, 'd': 0, 'e': 7.25},
+    {chr(ord('a') + i): i + 1 for i in range(20)},
+])
+def test_alias_table_frequencies(weights):
+    table = AliasTable(list(weights), list(weights.values()))
+    rng = random.Random(SEED)
+    assert_matches_weights(sample(lambda: table.sample(rng)), weights)
+
+
+def test_alias_table_without_weights_is_uniform():
+    table = AliasTable(['a', 'b', 'c'], [0, None, 0])
+    rng = random.Random(SEED)
+    assert_matches_weights(sample(lambda: table.sample(rng)), {'a': 1, 'b': 1, 'c': 1})
+
+
+def test_seeded_drop_tables_repeat():
+    data = GameData(trees=[{'name': n, 'locationid': 1, 'probability': p} for n, p in (('oak', 3), ('ash', 1))])
+    first, second = DropTables(data, seed=SEED), DropTables(data, seed=SEED)
+    assert [first.roll_tree(1)['name'] for _ in range(100)] == [second.roll_tree(1)['name'] for _ in range(100)]
+
+
+@pytest.mark.parametrize('fishing_xp', [0, HIGH_LEVEL_FISHING_XP + 1])
+def test_fish_rarity_frequencies(fishing_xp):
+    tables = DropTables(GameData(), seed=SEED)
+    weights = dict(FISH_RARITY_WEIGHTS)
+    if fishing_xp > HIGH_LEVEL_FISHING_XP:
+        weights = {r: w + HIGH_LEVEL_RARITY_BONUS[r] for r, w in weights.items()}
+    assert_matches_weights(sample(lambda: tables.roll_fish_rarity(fishing_xp)), weights)
+
+
+def test_roll_fish_frequencies():
+    fish = [
+        # catch_probability * drop_modifier is the weight
+        {'name': 'minnow', 'location': '4', 'rodtype': 'basic', 'qualitytier': 'Common',
+         'catch_probability': 0.6, 'drop_modifier': None},
+        {'name': 'perch', 'location': '4', 'rodtype': 'basic', 'qualitytier': 'common',
+         'catch_probability': 0.3, 'drop_modifier': 2.0},
+        {'name': 'bream', 'location': '4', 'rodtype': 'basic', 'qualitytier': 'common',
+         'catch_probability': 0.1, 'drop_modifier': 0.5},
+        {'name': 'sunfish', 'location': '4', 'rodtype': 'basic', 'qualitytier': 'common',
+         'catch_probability': 0.2, 'drop_modifier': 0},
+        # Other rod, rarity and location are never drawn
+        {'name': 'pike', 'location': '4', 'rodtype': 'fine', 'qualitytier': 'common',
+         'catch_probability': 0.9, 'drop_modifier': 1},
+        {'name': 'eel', 'location': '4', 'rodtype': 'basic', 'qualitytier': 'rare',
+         'catch_probability': 0.9, 'drop_modifier': 1},
+        {'name': 'carp', 'location': '5', 'rodtype': 'basic', 'qualitytier': 'common',
+         'catch_probability': 0.9, 'drop_modifier': 1},
+    ]
+    tables = DropTables(GameData(fish=fish), seed=SEED)
+    counts = sample(lambda: tables.roll_fish(4, 'basic', 'common')['name'])
+    assert_matches_weights(counts, {'minnow': 0.6, 'perch': 0.6, 'bream': 0.05, 'sunfish': 0})
+    assert tables.roll_fish(4, 'basic', 'legendary') is None
+
+
+def test_roll_ore_frequencies():
+    ores = [
+        {'oretype': 'Copper', 'locationid': 7, 'probability': 50},
+        {'oretype': 'Tin', 'locationid': 7, 'probability': 30},
+        {'oretype': 'Iron', 'locationid': 7, 'probability': 15},
+        {'oretype': 'Mithril', 'locationid': 7, 'probability': 5},
+        # No material tier: never offered
+        {'oretype': 'Unobtainium', 'locationid': 7, 'probability': 500},
+        {'oretype': 'Gold', 'locationid': 8, 'probability': 10},
+    ]
+    tiers = {'Copper': 1, 'Tin': 1, 'Iron': 2, 'Mithril': 4, 'Gold': 3}
+    tables = DropTables(GameData(ores=ores, tiers=tiers), seed=SEED)
+    counts = sample(lambda: tables.roll_ore(7)['oretype'])
+    assert_matches_weights(counts, {'Copper': 50, 'Tin': 30, 'Iron': 15, 'Mithril': 5})
+    assert tables.roll_ore(9) is None
@@ -1,10 +1,17 @@
 import interactions
 from interactions import Extension, Embed, SlashContext, OptionType, slash_command, AutocompleteContext
 import logging
+import time
+from world_graph import TravelerSnapshot
 
 class TravelSystem(Extension):
+    # Autocomplete reuses a player's snapshot for this long; actual travel always reloads it
+    SNAPSHOT_TTL = 30
+
     def __init__(self, bot):
         self.bot = bot
+        self.world = bot.game_data.world
+        self._snapshots = {}  # player_id -> TravelerSnapshot
 
     @slash_command(
         name="travel_to",
@@ -47,12 +54,12 @@ class TravelSystem(Extension):
             return
 
         # Solo travel (no party)
-        current_location_id = await self.get_current_location_id(player_id)
-        if current_location_id is None:
+        snapshot = await self.get_snapshot(player_id)
+        if snapshot is None or snapshot.current_location is None:
             await ctx.send("Could not find your current location. Please try again later.", ephemeral=True)
             return
 
-        accessible_locations = await self.get_connected_locations(current_location_id, player_id)
+        accessible_locations = self.world.accessible_from(snapshot.current_location, snapshot)
         destination_location = next((loc for loc in accessible_locations if loc['name'] == destination), None)
 
         if destination_location:
@@ -63,17 +70,87 @@ class TravelSystem(Extension):
 
     @travel_to.autocomplete("destination")
     async def autocomplete(self, ctx: AutocompleteContext):
-        player_id = await self.get_player_id(ctx.user.id)
-        if player_id is None:
+        # Served from the world graph and a cached snapshot, no query per keystroke
+        snapshot = await self.get_cached_snapshot(ctx.user.id)
+        if snapshot is None:
             await ctx.send(choices=[])
             return
 
-        current_location_id = await self.get_current_location_id(player_id)
-        accessible_locations = await self.get_connected_locations(current_location_id, player_id)
-        matching_locations = [
-            loc['name'] for loc in accessible_locations if ctx.input_text.lower() in loc['name'].lower()
+        accessible_ids = [loc['locationid'] for loc in self.world.accessible_from(snapshot.current_location, snapshot)]
+        matching_locations = self.world.search(ctx.input_text, accessible_ids)
+        await ctx.send(choices=[loc['name'] for loc in matching_locations])
+
+    @slash_command(
+        name="travel_route",
+        description="Travel to any location you can reach, through the locations in between",
+        options=[
+            {
+                "name": "destination",
+                "description": "The location you want to reach",
+                "type": OptionType.STRING,
+                "required": True,
+                "autocomplete": True,
+            }
         ]
-        await ctx.send(choices=matching_locations)
+    )
+    async def travel_route(self, ctx: SlashContext, destination: str):
+        player_id = await self.get_player_id(ctx.author.id)
+        snapshot = await self.get_snapshot(player_id) if player_id is not None else None
+        if snapshot is None or snapshot.current_location is None:
+            await ctx.send("Could not find your current location. Please try again later.", ephemeral=True)
+            return
+
+        destination_location = self.bot.game_data.get_location_by_name(destination)
+        if not destination_location:
+            await ctx.send("That location does not exist.", ephemeral=True)
+            return
+        if destination_location['locationid'] == snapshot.current_location:
+            await ctx.send(f"You are already at {destination_location['name']}.", ephemeral=True)
+            return
+
+        route = self.world.find_route(snapshot.current_location, destination_location['locationid'], snapshot)
+        if not route:
+            await ctx.send("You cannot reach that location from here, or you do not meet the conditions required to travel there.", ephemeral=True)
+            return
+
+        party = await self.bot.db.fetchrow("""
+            SELECT p.party_id, p.leader_id
+            FROM parties p
+            JOIN party_members pm ON p.party_id = pm.party_id
+            WHERE pm.player_id = $1 AND p.is_active = true
+        """, player_id)
+        if party:
+            if party['leader_id'] != player_id:
+                await ctx.send(
+                    "You are in a party! Only the party leader can initiate travel. "
+                    "Ask your party leader to move the party, or leave the party to travel solo.",
+                    ephemeral=True
+                )
+            elif len(route) == 2:
+                await self.travel_party(ctx, player_id, destination_location['name'], party['party_id'])
+            else:
+                # Every member has to meet each stop's requirements, so parties move one stop at a time
+                next_stop = self.world.location(route[1])
+                await ctx.send(
+                    f"Parties travel one stop at a time. Head to **{next_stop['name']}** first with /travel_to.",
+                    ephemeral=True
+                )
+            return
+
+        await self.update_location(player_id, destination_location['locationid'])
+        stops = " → ".join(self.world.location(location_id)['name'] for location_id in route)
+        await ctx.send(f"You have successfully traveled to {destination_location['name']}.\nRoute: {stops}")
+
+    @travel_route.autocomplete("destination")
+    async def travel_route_autocomplete(self, ctx: AutocompleteContext):
+        snapshot = await self.get_cached_snapshot(ctx.user.id)
+        if snapshot is None:
+            await ctx.send(choices=[])
+            return
+
+        reachable_ids = self.world.reachable_from(snapshot.current_location, snapshot)
+        matching_locations = self.world.search(ctx.input_text, reachable_ids)
+        await ctx.send(choices=[loc['name'] for loc in matching_locations])
 
     async def get_player_id(self, discord_id):
         return await self.bot.db.get_or_create_player(discord_id)
@@ -84,40 +161,41 @@ class TravelSystem(Extension):
             result = await conn.fetchrow(query, player_id)
             return result['current_location'] if result else None
 
+    async def get_snapshot(self, player_id):
+        """Fresh TravelerSnapshot for a player (one query); also refreshes the autocomplete cache."""
+        snapshot = await TravelerSnapshot.load(self.bot.db, player_id)
+        if snapshot is not None:
+            self._snapshots[player_id] = snapshot
+        else:
+            self._snapshots.pop(player_id, None)
+        return snapshot
+
+    async def get_cached_snapshot(self, discord_id):
+        """Snapshot for autocomplete: reused for SNAPSHOT_TTL seconds."""
+        player_id = await self.bot.identities.get_player_id(discord_id)
+        if player_id is None:
+            return None
+        snapshot = self._snapshots.get(player_id)
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.SNAPSHOT_TTL:
+            snapshot = await self.get_snapshot(player_id)
+        return snapshot
+
     async def get_connected_locations(self, current_location_id, player_id):
-        query = """
-        SELECT l.locationid, l.name, l.description
-        FROM locations l
-        JOIN paths p ON p.from_location_id = $1 AND p.to_location_id = l.locationid
-        JOIN player_data pd ON pd.playerid = $2
-        LEFT JOIN inventory i ON i.playerid = pd.playerid AND i.itemid = l.required_item_id
-        WHERE 
-            (l.xp_requirement IS NULL OR pd.xp >= l.xp_requirement)
-        AND (l.required_item_id IS NULL OR i.itemid IS NOT NULL)
-        AND NOT EXISTS (
-            SELECT 1
-            FROM location_skill_requirements lsr
-            LEFT JOIN player_skills_xp ps ON ps.playerid = pd.playerid
-            WHERE lsr.locationid = l.locationid
-            AND CASE 
-                WHEN lsr.skill_id = 1 THEN ps.fire_magic_xp >= lsr.required_level
-                WHEN lsr.skill_id = 2 THEN ps.water_magic_xp >= lsr.required_level
-                WHEN lsr.skill_id = 3 THEN ps.earth_magic_xp >= lsr.required_level
-                WHEN lsr.skill_id = 4 THEN ps.air_magic_xp >= lsr.required_level
-                -- Add more conditions for other skill columns as needed
-                ELSE FALSE
-            END = FALSE
-        )
-        GROUP BY l.locationid, l.name, l.description;
-        """
-        async with self.bot.db.pool.acquire() as conn:
-            results = await conn.fetch(query, current_location_id, player_id)
-            return [{'locationid': row['locationid'], 'name': row['name'], 'description': row['description']} for row in results] if results else []
+        snapshot = await self.get_snapshot(player_id)
+        if snapshot is None:
+            return []
+        return [
+            {'locationid': loc['locationid'], 'name': loc['name'], 'description': loc['description']}
+            for loc in self.world.accessible_from(current_location_id, snapshot)
+        ]
 
     async def update_location(self, player_id, location_id):
         async with self.bot.db.pool.acquire() as conn:
             query = "UPDATE public.player_data SET current_location = $1 WHERE playerid = $2"
             await conn.execute(query, location_id, player_id)
+        snapshot = self._snapshots.get(player_id)
+        if snapshot is not None:
+            snapshot.current_location = location_id
 
     async def travel_party(self, ctx: SlashContext, leader_id: int, destination: str, party_id: int):
         """Move entire party to a destination."""
@@ -135,79 +213,71 @@ class TravelSystem(Extension):
             await ctx.send("The specified location is not accessible or you do not meet the conditions required to travel there.", ephemeral=True)
             return
 
-        # Get location details to check requirements
-        location_details = await self.bot.db.fetchrow("""
-            SELECT locationid, name, required_item_id, required_item_equipped
-            FROM locations
-            WHERE locationid = $1
-        """, destination_location['locationid'])
+        await self.move_party(ctx, leader_id, party_id, destination_location['locationid'])
+
+    async def move_party(self, ctx, leader_id: int, party_id: int, location_id: int):
+        """Check every member's equipped item in one query, move them in one UPDATE and DM them concurrently.
+
+        Returns True if the party moved.
+        """
+        location = self.world.location(location_id)
+        if not location:
+            await ctx.send("Location not found.", ephemeral=True)
+            return False
+        required_item_id = location.get('required_item_id') if location.get('required_item_equipped') else None
 
-        # Get all party members
+        # All party members, with whether each has the required item equipped
         party_members = await self.bot.db.fetch("""
-            SELECT pm.player_id, players.discord_id
+            SELECT pm.player_id,
+                   $2::int IS NULL OR EXISTS (
+                       SELECT 1 FROM inventory inv
+                       WHERE inv.playerid = pm.player_id AND inv.itemid = $2 AND inv.isequipped = TRUE
+                   ) AS has_item
             FROM party_members pm
-            JOIN players ON pm.player_id = players.playerid
             WHERE pm.party_id = $1
-        """, party_id)
+        """, party_id, required_item_id)
 
         if not party_members:
             await ctx.send("Error: Could not find party members.", ephemeral=True)
-            return
+            return False
 
-        # Check if location requires an equipped item - if so, verify all party members have it equipped
-        if location_details and location_details['required_item_id'] and location_details.get('required_item_equipped'):
-            item_name = await self.bot.db.fetchval("""
-                SELECT name FROM items WHERE itemid = $1
-            """, location_details['required_item_id'])
-            
-            missing_members = []
-            for member in party_members:
-                has_item_equipped = await self.bot.db.fetchval("""
-                    SELECT COUNT(*) > 0
-                    FROM inventory
-                    WHERE playerid = $1 AND itemid = $2 AND isequipped = TRUE
-                """, member['player_id'], location_details['required_item_id'])
-                
-                if not has_item_equipped:
-                    try:
-                        member_user = await self.bot.fetch_user(member['discord_id'])
-                        member_name = member_user.display_name if member_user else f"Player {member['player_id']}"
-                    except:
-                        member_name = f"Player {member['player_id']}"
-                    missing_members.append(member_name)
-            
-            if missing_members:
-                member_list = ", ".join(missing_members)
-                await ctx.send(
-                    f"❌ Cannot travel to **{location_details['name']}**! All party members must have **{item_name}** equipped.\n\n"
-                    f"Missing equipped item: {member_list}",
-                    ephemeral=True
-                )
-                return
+        missing = [member['player_id'] for member in party_members if not member['has_item']]
+        if missing:
+            item_name = self.bot.game_data.get_item_name(required_item_id)
+            identities = await self.bot.identities.resolve_many(missing)
+            member_list = ", ".join(identities[player_id].name for player_id in missing)
+            await ctx.send(
+                f"❌ Cannot travel to **{location['name']}**! All party members must have **{item_name}** equipped.\n\n"
+                f"Missing equipped item: {member_list}",
+                ephemeral=True
+            )
+            return False
 
         # Update location for all party members
-        location_name = destination_location['name']
-        moved_count = 0
-        
-        for member in party_members:
-            await self.update_location(member['player_id'], destination_location['locationid'])
-            moved_count += 1
-            
-            # Notify each party member (except leader, who gets the main message)
-            if member['player_id'] != leader_id:
-                try:
-                    member_user = await self.bot.fetch_user(member['discord_id'])
-                    if member_user:
-                        await member_user.send(f"🎯 Your party leader has moved the party to **{location_name}**!")
-                except:
-                    pass  # Silently fail if can't DM member
+        member_ids = [member['player_id'] for member in party_members]
+        moved = await self.bot.db.fetch("""
+            UPDATE player_data SET current_location = $1
+            WHERE playerid = ANY($2::int[])
+            RETURNING playerid
+        """, location_id, member_ids)
+        for row in moved:
+            snapshot = self._snapshots.get(row['playerid'])
+            if snapshot is not None:
+                snapshot.current_location = location_id
+
+        # Notify party members (except leader, who gets the main message)
+        self.bot.outbox.dm_many(
+            [player_id for player_id in member_ids if player_id != leader_id],
+            f"🎯 Your party leader has moved the party to **{location['name']}**!"
+        )
 
         # Send confirmation to leader
         await ctx.send(
-            f"✅ Party successfully traveled to **{location_name}**! "
-            f"All {moved_count} party member(s) have been moved.",
+            f"✅ Party successfully traveled to **{location['name']}**! "
+            f"All {len(moved)} party member(s) have been moved.",
             ephemeral=True
         )
+        return True
 
     async def display_locations(self, ctx, current_location_id):
         player_id = await self.get_player_id(ctx.author.id)
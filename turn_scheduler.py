@@ -0,0 +1,196 @@
+"""
+Turn scheduling for party battles.
+
+Each active party battle gets a TurnScheduler holding its turn order as a circular
+linked list of the players still able to act. Advancing follows one link (dead
+players are unlinked the first time they are passed, so every player costs at
+most one extra hop per battle), and liveness comes from the in-memory
+BattleInstance instead of per-candidate queries.
+
+Every turn has a deadline: if the current player has not acted within
+``timeout`` seconds, the on_timeout callback (BattleSystem.handle_turn_timeout)
+skips them so an AFK player does not stall the party (a party that lets two
+full rounds time out is ended as abandoned). Turn order, current player
+and turn number live in battle_instances (written by BattleStateManager), so
+TurnSchedulers.recover rebuilds every scheduler after a restart.
+"""
+import asyncio
+import logging
+
+
+class TurnScheduler:
+    """Turn order, current player and turn deadline of one party battle."""
+
+    def __init__(self, battle, timeout, on_timeout):
+        self.battle = battle
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.turn_seq = 0  # bumped on every turn change; stale deadlines compare against it
+        self.idle_turns = 0  # turns skipped by deadline in a row
+        self._deadline = None
+
+        order = list(battle.instance.get('turn_order') or ())
+        self._position = {player_id: i for i, player_id in enumerate(order)}
+        self._next = {}
+        self._prev = {}
+        self._linked = set()
+        for i, player_id in enumerate(order):
+            self._next[player_id] = order[(i + 1) % len(order)]
+            self._prev[player_id] = order[i - 1]
+            self._linked.add(player_id)
+
+    @property
+    def instance_id(self):
+        return self.battle.instance_id
+
+    @property
+    def active_players(self):
+        return len(self._linked)
+
+    @property
+    def current(self):
+        return self.battle.instance.get('current_turn_player_id')
+
+    def _can_act(self, player_id):
+        participant = self.battle.get_participant(player_id)
+        return participant is not None and participant['current_health'] > 0
+
+    def _unlink(self, player_id):
+        # The removed node keeps its own _next so advancing from it still works
+        if player_id not in self._linked:
+            return
+        self._linked.discard(player_id)
+        prev_id, next_id = self._prev[player_id], self._next[player_id]
+        self._next[prev_id] = next_id
+        self._prev[next_id] = prev_id
+
+    def advance(self, expected=None, timed_out=False):
+        """Move to the next living player; returns them, or None.
+
+        With expected set, only advance if it is still expected's turn (so an action
+        finishing after its deadline already skipped the player does not skip twice).
+        """
+        current = self.current
+        if expected is not None and current != expected:
+            return None
+        if current not in self._next:
+            return None
+        self.idle_turns = self.idle_turns + 1 if timed_out else 0
+
+        turn_number = self.battle.instance.get('turn_number') or 0
+        candidate = current
+        for _ in range(len(self._position) + 1):
+            previous, candidate = candidate, self._next[candidate]
+            if self._position[candidate] <= self._position[previous]:
+                turn_number += 1  # wrapped around: a new round
+            if candidate in self._linked and self._can_act(candidate):
+                break
+            self._unlink(candidate)
+        else:
+            candidate = None
+
+        if candidate is None or not self._linked:
+            self.stop()
+            return None
+        self.battle.set_fields(current_turn_player_id=candidate, turn_number=turn_number)
+        self.arm()
+        return candidate
+
+    def remove(self, player_id):
+        """Take a player out of the turn order (fled); advances first if it was their turn.
+
+        Returns the new current player if the turn moved, else None.
+        """
+        next_player = None
+        if self.current == player_id:
+            self._unlink(player_id)
+            next_player = self.advance()
+        self._unlink(player_id)
+        order = self.battle.instance.get('turn_order') or []
+        if player_id in order:
+            self.battle.set_fields(turn_order=[p for p in order if p != player_id])
+        return next_player
+
+    # ---- deadlines ------------------------------------------------------
+
+    def arm(self, delay: float = None):
+        """Start the deadline for the current turn (replacing any previous one)."""
+        self.stop()
+        self.turn_seq += 1
+        delay = self.timeout if delay is None else delay
+        if self.current is None or not delay:
+            return
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.call_later(delay, self._expired, self.turn_seq)
+
+    def stop(self):
+        if self._deadline:
+            self._deadline.cancel()
+            self._deadline = None
+
+    def _expired(self, turn_seq):
+        self._deadline = None
+        if turn_seq != self.turn_seq or not self.battle.instance.get('is_active', True):
+            return
+        task = asyncio.create_task(self.on_timeout(self, self.current))
+        task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task):
+        if not task.cancelled() and task.exception():
+            logging.error(f"Turn timeout handler failed for battle {self.instance_id}: {task.exception()}")
+
+
+class TurnSchedulers:
+    """The TurnScheduler of every active party battle."""
+
+    def __init__(self, states, timeout: float = 90.0, on_timeout=None):
+        self.states = states
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self._schedulers = {}
+
+    def get(self, battle):
+        """Scheduler for a loaded BattleInstance, created from its turn_order on first use."""
+        scheduler = self._schedulers.get(battle.instance_id)
+        if scheduler is None or scheduler.battle is not battle:
+            if scheduler is not None:
+                scheduler.stop()
+            scheduler = self._schedulers[battle.instance_id] = TurnScheduler(battle, self.timeout, self.on_timeout)
+        return scheduler
+
+    def start(self, battle):
+        """Create the scheduler for a new battle and start the first player's deadline."""
+        self.discard(battle.instance_id)
+        scheduler = self.get(battle)
+        scheduler.arm()
+        return scheduler
+
+    def discard(self, instance_id):
+        scheduler = self._schedulers.pop(instance_id, None)
+        if scheduler:
+            scheduler.stop()
+
+    def stop(self):
+        for scheduler in self._schedulers.values():
+            scheduler.stop()
+        self._schedulers.clear()
+
+    async def recover(self, db):
+        """Rebuild schedulers (with fresh deadlines) for party battles still active in battle_instances."""
+        rows = await db.fetch("""
+            SELECT instance_id FROM battle_instances
+            WHERE is_active = true AND instance_type = 'party' AND current_turn_player_id IS NOT NULL
+        """)
+        recovered = 0
+        for row in rows:
+            try:
+                battle = await self.states.get(row['instance_id'])
+            except Exception as e:
+                logging.error(f"Error loading battle {row['instance_id']} for turn recovery: {e}")
+                continue
+            if battle and battle.instance.get('is_active'):
+                self.start(battle)
+                recovered += 1
+        if recovered:
+            logging.info(f"Recovered turn schedulers for {recovered} party battle(s)")
+        return recovered
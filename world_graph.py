@@ -0,0 +1,223 @@
+"""
+In-memory world graph built from the cached ``locations``, ``paths`` and
+``location_skill_requirements`` tables.
+
+Answers "where can this player go from here" against a TravelerSnapshot (one query
+per player) instead of joining paths, inventory and skills on every travel or
+autocomplete keystroke. Also finds multi-hop routes (BFS, paths have no cost) and
+keeps a word-prefix index over location names for autocomplete.
+"""
+import time
+from bisect import bisect_left
+from collections import deque
+
+# location_skill_requirements.skill_id -> player_skills_xp column
+SKILL_COLUMNS = {
+    1: 'fire_magic_xp',
+    2: 'water_magic_xp',
+    3: 'earth_magic_xp',
+    4: 'air_magic_xp',
+}
+
+# Requirement codes, in the order they are reported
+ITEM, EQUIPPED_ITEM, XP, SKILL, QUEST = 'item', 'equipped_item', 'xp', 'skill', 'quest'
+
+
+class TravelerSnapshot:
+    """What travel requirements need to know about one player, loaded in a single query."""
+
+    __slots__ = ('player_id', 'current_location', 'xp', 'skills', 'items', 'equipped_items',
+                 'completed_quests', 'loaded_at')
+
+    # Only items that some location requires are collected
+    LOAD_SQL = f"""
+        SELECT pd.current_location, pd.xp,
+               {', '.join(f'ps.{column}' for column in SKILL_COLUMNS.values())},
+               ARRAY(
+                   SELECT inv.itemid FROM inventory inv
+                   WHERE inv.playerid = pd.playerid
+                     AND inv.itemid IN (SELECT required_item_id FROM locations WHERE required_item_id IS NOT NULL)
+               ) AS items,
+               ARRAY(
+                   SELECT inv.itemid FROM inventory inv
+                   WHERE inv.playerid = pd.playerid AND inv.isequipped = TRUE
+                     AND inv.itemid IN (SELECT required_item_id FROM locations WHERE required_item_id IS NOT NULL)
+               ) AS equipped_items,
+               ARRAY(
+                   SELECT pq.quest_id FROM player_quests pq
+                   WHERE pq.player_id = pd.playerid AND pq.status = 'completed'
+               ) AS completed_quests
+        FROM player_data pd
+        LEFT JOIN player_skills_xp ps ON ps.playerid = pd.playerid
+        WHERE pd.playerid = $1
+    """
+
+    def __init__(self, player_id, current_location, xp=0, skills=None, items=(), equipped_items=(), completed_quests=()):
+        self.player_id = player_id
+        self.current_location = current_location
+        self.xp = xp or 0
+        self.skills = skills or {}
+        self.items = set(items)
+        self.equipped_items = set(equipped_items)
+        self.completed_quests = set(completed_quests)
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    async def load(cls, db, player_id):
+        row = await db.fetchrow(cls.LOAD_SQL, player_id)
+        if not row:
+            return None
+        return cls(
+            player_id,
+            row['current_location'],
+            row['xp'],
+            {column: row[column] or 0 for column in SKILL_COLUMNS.values()},
+            row['items'] or (),
+            row['equipped_items'] or (),
+            row['completed_quests'] or (),
+        )
+
+
+class WorldGraph:
+    """Adjacency, requirement checks, routes and name search over the cached world."""
+
+    SOURCES = ('locations', 'paths', 'location_skill_requirements')
+
+    def __init__(self, game_data):
+        self.game_data = game_data
+        self._built = False
+        self._adjacency = {}    # location id -> [location ids], in paths order
+        self._name_index = []   # sorted [(name key, location id)]
+
+    def invalidate(self, tables=None):
+        if tables is None or any(t in self.SOURCES for t in tables):
+            self._built = False
+
+    def _build(self):
+        locations = self.game_data.locations
+        adjacency = {}
+        for from_id, paths in self.game_data.paths_from.items():
+            targets = adjacency.setdefault(from_id, [])
+            for path in paths:
+                to_id = path['to_location_id']
+                if to_id in locations and to_id not in targets:
+                    targets.append(to_id)
+
+        # Every word start of a name is a key, so "mine" finds "Old Mine Shaft"
+        index = []
+        for location_id, location in locations.items():
+            name = (location.get('name') or '').lower()
+            words = name.split()
+            for i in range(len(words)):
+                index.append((' '.join(words[i:]), location_id))
+        index.sort()
+
+        self._adjacency = adjacency
+        self._name_index = index
+        self._built = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    # ---- lookups --------------------------------------------------------
+
+    def location(self, location_id):
+        return self.game_data.get_location(location_id)
+
+    def neighbors(self, location_id):
+        """Location rows one path away, in paths order."""
+        self._ensure_built()
+        return [self.game_data.get_location(i) for i in self._adjacency.get(location_id, ())]
+
+    def has_path(self, from_id, to_id):
+        self._ensure_built()
+        return to_id in self._adjacency.get(from_id, ())
+
+    def search(self, text, location_ids=None, limit=25):
+        """Locations whose name (or a word in it) starts with text, optionally limited to location_ids."""
+        self._ensure_built()
+        text = (text or '').strip().lower()
+        allowed = set(location_ids) if location_ids is not None else None
+        found = []
+        seen = set()
+        for key, location_id in self._name_index[bisect_left(self._name_index, (text,)):]:
+            if not key.startswith(text):
+                break
+            if location_id in seen or (allowed is not None and location_id not in allowed):
+                continue
+            seen.add(location_id)
+            found.append(self.game_data.get_location(location_id))
+        # Whole-name matches first, then alphabetical
+        found.sort(key=lambda l: (not (l.get('name') or '').lower().startswith(text), (l.get('name') or '').lower()))
+        return found[:limit]
+
+    # ---- requirements ---------------------------------------------------
+
+    def unmet_requirements(self, location, snapshot):
+        """Requirement codes the player does not meet for entering location (empty list if none)."""
+        unmet = []
+        item_id = location.get('required_item_id')
+        if item_id:
+            if location.get('required_item_equipped'):
+                if item_id not in snapshot.equipped_items:
+                    unmet.append(EQUIPPED_ITEM)
+            elif item_id not in snapshot.items:
+                unmet.append(ITEM)
+
+        if location.get('xp_requirement') and snapshot.xp < location['xp_requirement']:
+            unmet.append(XP)
+
+        for requirement in self.game_data.get_skill_requirements(location['locationid']):
+            column = SKILL_COLUMNS.get(requirement['skill_id'])
+            if column is None or snapshot.skills.get(column, 0) < requirement['required_level']:
+                unmet.append(SKILL)
+                break
+
+        quest_id = location.get('required_quest_id')
+        if quest_id and quest_id not in snapshot.completed_quests:
+            unmet.append(QUEST)
+        return unmet
+
+    def can_enter(self, location, snapshot):
+        return not self.unmet_requirements(location, snapshot)
+
+    def accessible_from(self, location_id, snapshot):
+        """Neighbouring locations the player meets the requirements for."""
+        return [l for l in self.neighbors(location_id) if self.can_enter(l, snapshot)]
+
+    # ---- routes ---------------------------------------------------------
+
+    def _search_from(self, start_id, snapshot=None, goal_id=None):
+        self._ensure_built()
+        previous = {start_id: None}
+        queue = deque([start_id])
+        while queue:
+            current = queue.popleft()
+            if current == goal_id:
+                break
+            for next_id in self._adjacency.get(current, ()):
+                if next_id in previous:
+                    continue
+                if snapshot is not None and not self.can_enter(self.game_data.get_location(next_id), snapshot):
+                    continue
+                previous[next_id] = current
+                queue.append(next_id)
+        return previous
+
+    def find_route(self, start_id, goal_id, snapshot=None):
+        """Fewest-stops route as location ids [start, ..., goal], or None.
+
+        With a snapshot, only locations the player may enter are used.
+        """
+        previous = self._search_from(start_id, snapshot, goal_id)
+        if goal_id not in previous:
+            return None
+        route = [goal_id]
+        while previous[route[-1]] is not None:
+            route.append(previous[route[-1]])
+        return route[::-1]
+
+    def reachable_from(self, start_id, snapshot=None):
+        """Ids of every location reachable from start_id (excluding it)."""
+        return [location_id for location_id in self._search_from(start_id, snapshot) if location_id != start_id]